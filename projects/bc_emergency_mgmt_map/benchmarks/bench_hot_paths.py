@@ -0,0 +1,254 @@
+"""
+Hot Path Benchmark Suite
+------------------------
+Times the data and rendering hot paths on synthetic BC-shaped data, offline:
+
+  parse_alerts     bc_alerts_api() on a FeatureServer payload (synthetic or --payload recording)
+  spatial_join     check_sites_in_emergencies()
+  filter_city      filter_sites() with a city + affected filter
+  filter_radius    filter_sites() with an address radius
+  map_full         update_map_and_table request after a data version change (full figure)
+  map_patch        update_map_and_table request after a filter change (Patch)
+  metric_cards     update_metric_cards request
+
+The callback benchmarks go through the Flask test client, so they include Dash
+deserialization and serialization. Each result is the best of --repeats runs
+plus the peak Python memory (tracemalloc) of one extra run; map_full also
+reports the first (cold) run, which builds the cached polygon traces.
+
+Usage:
+    python benchmarks/bench_hot_paths.py [--preset quick|full] [--repeats 3]
+        [--payload recorded.json] [--save results.json]
+        [--compare baseline.json] [--threshold 1.25]
+
+--compare exits with status 1 if any benchmark is slower than the baseline
+by more than --threshold, so it can gate a CI job.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# Keep the per-request JSON perf logs out of the timings
+os.environ.setdefault('PERF_LOG', '0')
+
+from synthetic import load_app, make_alerts, make_alerts_payload, make_raw_sites
+from bench_payload_size import callback_body, filter_values
+
+import utils  # importable once synthetic has put src/ on sys.path
+
+PRESETS = {
+    'quick': {'sites': [1_000, 10_000, 100_000], 'alerts': [10, 100, 1_000]},
+    'full': {'sites': [1_000, 10_000, 100_000, 1_000_000], 'alerts': [10, 100, 1_000, 10_000]},
+}
+
+# Realistic vertex count for an evacuation area boundary
+VERTICES = 200
+
+# The real functions, before load_app() swaps in synthetic data sources
+real_bc_alerts_api = utils.bc_alerts_api
+
+
+class RecordedResponse:
+    """requests.Response stand-in replaying a recorded body"""
+
+    status_code = 200
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+def measure(func, repeats):
+    """Best-of-N wall clock seconds, then peak traced memory (bytes) of one more run"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best, peak
+
+
+class Report:
+    """Collects results and prints them as a table"""
+
+    def __init__(self):
+        self.results = []
+        print(f"{'benchmark':14} {'sites':>10} {'alerts':>7} {'best ms':>10} {'items/s':>12} {'peak MB':>9}  notes")
+        print("-" * 78)
+
+    def add(self, benchmark, sites, alerts, seconds, peak_bytes, items, notes=''):
+        result = {
+            'benchmark': benchmark,
+            'sites': sites,
+            'alerts': alerts,
+            'seconds': seconds,
+            'items_per_sec': items / seconds if seconds > 0 else None,
+            'peak_mb': peak_bytes / 1e6,
+        }
+        self.results.append(result)
+
+        throughput = f"{result['items_per_sec']:,.0f}" if result['items_per_sec'] else '-'
+        print(f"{benchmark:14} {sites or '-':>10} {alerts or '-':>7} {seconds * 1000:>10.1f} "
+              f"{throughput:>12} {result['peak_mb']:>9.1f}  {notes}", flush=True)
+
+
+def bench_parse_alerts(report, alert_counts, repeats, payload_path=None):
+    """bc_alerts_api() parsing a recorded or synthetic FeatureServer response"""
+    if payload_path:
+        with open(payload_path, 'rb') as f:
+            payloads = [(None, f.read())]
+    else:
+        payloads = [(n, json.dumps(make_alerts_payload(n, vertices=VERTICES)).encode()) for n in alert_counts]
+
+    original_get = utils.requests.get
+    try:
+        for num_alerts, body in payloads:
+            utils.requests.get = lambda *args, **kwargs: RecordedResponse(body)
+            num_features = len(json.loads(body)['features'])
+
+            def run():
+                # bc_alerts_api prints a line per event; keep it off the terminal
+                with contextlib.redirect_stdout(io.StringIO()):
+                    return real_bc_alerts_api()
+
+            seconds, peak = measure(run, repeats)
+            report.add('parse_alerts', None, num_alerts or num_features, seconds, peak, num_features,
+                       f"{len(body) / 1e6:.1f} MB payload" + (f" ({payload_path})" if payload_path else ''))
+    finally:
+        utils.requests.get = original_get
+
+
+def bench_callback(client, body):
+    """Time a /_dash-update-component request"""
+    def run():
+        response = client.post('/_dash-update-component', json=body)
+        assert response.status_code == 200, response.status_code
+        return response
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--preset', choices=PRESETS, default='quick')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--payload', help='recorded FeatureServer pgeojson response to parse')
+    parser.add_argument('--save', help='write results as JSON')
+    parser.add_argument('--compare', help='baseline JSON from an earlier --save')
+    parser.add_argument('--threshold', type=float, default=1.25, help='allowed slowdown vs baseline')
+    args = parser.parse_args()
+
+    site_counts = PRESETS[args.preset]['sites']
+    alert_counts = PRESETS[args.preset]['alerts']
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        app_module = load_app(num_sites=1_000, num_alerts=10, vertices=VERTICES)
+    client = app_module.app.server.test_client()
+    store = app_module.get_snapshot_store()
+
+    print("=" * 78)
+    print(f"Hot path benchmarks ({args.preset}: sites {site_counts}, alerts {alert_counts}, "
+          f"{VERTICES} vertices, best of {args.repeats})")
+    print("=" * 78)
+    report = Report()
+
+    bench_parse_alerts(report, alert_counts, args.repeats, args.payload)
+
+    alerts_by_count = {n: make_alerts(n, vertices=VERTICES) for n in alert_counts}
+    victoria = json.dumps({'lat': 48.4284, 'lon': -123.3656})
+
+    for num_sites in site_counts:
+        raw_sites = make_raw_sites(num_sites)
+
+        for num_alerts in alert_counts:
+            alerts = alerts_by_count[num_alerts]
+
+            seconds, peak = measure(lambda: utils.check_sites_in_emergencies(raw_sites, alerts), args.repeats)
+            report.add('spatial_join', num_sites, num_alerts, seconds, peak, num_sites)
+
+            sites_with_events = utils.check_sites_in_emergencies(raw_sites, alerts)
+            with contextlib.redirect_stdout(io.StringIO()):
+                snapshot = store.publish(alerts, sites_with_events, raw_sites)
+            version = snapshot.version
+
+            # Filter logic only depends on the sites, so time it once per site count
+            if num_alerts == alert_counts[0]:
+                sites = snapshot.sites
+
+                seconds, peak = measure(lambda: utils.filter_sites(
+                    sites, 'Vancouver', 'all', 'all', ['affected'], None, '10'), args.repeats)
+                report.add('filter_city', num_sites, None, seconds, peak, num_sites)
+
+                seconds, peak = measure(lambda: utils.filter_sites(
+                    sites, 'all', 'all', 'all', [], victoria, '10'), args.repeats)
+                report.add('filter_radius', num_sites, None, seconds, peak, num_sites)
+
+                metric_body = callback_body(
+                    [('total-sites-number', 'children'), ('total-spaces-number', 'children')],
+                    filter_values(version), changed=['data-version-store.children'])
+                seconds, peak = measure(bench_callback(client, metric_body), args.repeats)
+                report.add('metric_cards', num_sites, None, seconds, peak, num_sites)
+
+            full_body = callback_body(
+                [('emergency-map', 'figure'), ('map-version-store', 'children')],
+                filter_values(version) + [('emergency-map', 'relayoutData', None)],
+                [('map-version-store', 'children', None)],
+                ['data-version-store.children'])
+
+            start = time.perf_counter()
+            response = bench_callback(client, full_body)()
+            cold = time.perf_counter() - start
+            map_state = response.get_json()['response']['map-version-store']['children']
+
+            seconds, peak = measure(bench_callback(client, full_body), args.repeats)
+            report.add('map_full', num_sites, num_alerts, seconds, peak, num_sites,
+                       f"cold {cold * 1000:.0f} ms, {len(response.data) / 1e6:.1f} MB")
+
+            patch_body = callback_body(
+                [('emergency-map', 'figure'), ('map-version-store', 'children')],
+                filter_values(version, 'Victoria') + [('emergency-map', 'relayoutData', None)],
+                [('map-version-store', 'children', map_state)],
+                ['city-filter.value'])
+            seconds, peak = measure(bench_callback(client, patch_body), args.repeats)
+            report.add('map_patch', num_sites, num_alerts, seconds, peak, num_sites)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'preset': args.preset, 'results': report.results}, f, indent=2)
+        print(f"\nSaved {len(report.results)} results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {(r['benchmark'], r['sites'], r['alerts']): r for r in json.load(f)['results']}
+
+        regressions = []
+        for result in report.results:
+            previous = baseline.get((result['benchmark'], result['sites'], result['alerts']))
+            if previous and result['seconds'] > previous['seconds'] * args.threshold:
+                regressions.append((result, previous))
+
+        print(f"\nCompared with {args.compare} (threshold {args.threshold:.2f}x):")
+        for result, previous in regressions:
+            print(f"  REGRESSION {result['benchmark']} sites={result['sites']} alerts={result['alerts']}: "
+                  f"{previous['seconds'] * 1000:.1f} ms -> {result['seconds'] * 1000:.1f} ms")
+        if not regressions:
+            print("  no regressions")
+        else:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
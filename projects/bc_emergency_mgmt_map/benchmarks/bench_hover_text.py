@@ -0,0 +1,71 @@
+"""
+Hover Text Benchmark
+--------------------
+Compares the old per-row f-string hover text against the vectorized
+build_site_hover_text() on synthetic sites.
+
+Usage:
+    python benchmarks/bench_hover_text.py [num_sites]
+"""
+
+import sys
+import time
+
+from synthetic import make_sites
+from utils import build_site_hover_text
+
+
+def iterrows_hover_text(sites):
+    """The original per-row implementation from update_map_and_table"""
+    affected_sites = sites[sites['event_type'].notna()]
+    unaffected_sites = sites[sites['event_type'].isna()]
+
+    affected = [
+        f"<b>{row['site_name']}</b><br>"
+        f"City: {row['city']}<br>"
+        f"Facility Type: {row['property_type']}<br>"
+        f"Capacity: {row['max_capacity']}<br>"
+        f"<b>⚠️ Affected by: {row['event_type']}</b>"
+        for _, row in affected_sites.iterrows()
+    ]
+    unaffected = [
+        f"<b>{row['site_name']}</b><br>"
+        f"City: {row['city']}<br>"
+        f"Facility Type: {row['property_type']}<br>"
+        f"Capacity: {row['max_capacity']}<br>"
+        f"Status: Not affected"
+        for _, row in unaffected_sites.iterrows()
+    ]
+    return affected, unaffected
+
+
+def time_it(func, *args, repeats=3):
+    """Best-of-N wall clock time in seconds"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    num_sites = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    sites = make_sites(num_sites)
+
+    print("=" * 60)
+    print(f"Hover text build time for {num_sites:,} markers")
+    print("=" * 60)
+
+    old_time = time_it(iterrows_hover_text, sites)
+    new_time = time_it(build_site_hover_text, sites)
+
+    print(f"  iterrows f-strings:       {old_time * 1000:10.1f} ms")
+    print(f"  vectorized (per version): {new_time * 1000:10.1f} ms")
+    print(f"  speedup: {old_time / new_time:.1f}x")
+    print("\nThe vectorized column is built once per data version, so filter")
+    print("callbacks only pay a column lookup afterwards.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Callback Payload Size Benchmark
+-------------------------------
+Measures bytes on the wire for the map, table and metric callbacks, as plain
+JSON, gzip and brotli, with and without COMPACT_COORDS typed arrays.
+
+Requests go through the Flask test client, so the numbers are the real
+/_dash-update-component response bodies.
+
+Usage:
+    python benchmarks/bench_payload_size.py [num_sites] [num_alerts]
+"""
+
+import gzip
+import json
+import sys
+
+from synthetic import load_app
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+FILTER_INPUTS = [
+    ('city-filter', 'value'),
+    ('event-type-filter', 'value'),
+    ('facility-type-filter', 'value'),
+    ('affected-toggle', 'value'),
+    ('data-version-store', 'children'),
+    ('user-location-store', 'children'),
+    ('selected-radius-store', 'children'),
+]
+
+
+def callback_body(outputs, inputs, state=(), changed=()):
+    """Build a /_dash-update-component request body"""
+    output_ids = [{'id': cid, 'property': prop} for cid, prop in outputs]
+
+    if len(outputs) > 1:
+        output = '..' + '...'.join(f'{cid}.{prop}' for cid, prop in outputs) + '..'
+    else:
+        output = f'{outputs[0][0]}.{outputs[0][1]}'
+        output_ids = output_ids[0]
+
+    return {
+        'output': output,
+        'outputs': output_ids,
+        'inputs': [{'id': cid, 'property': prop, 'value': value} for cid, prop, value in inputs],
+        'state': [{'id': cid, 'property': prop, 'value': value} for cid, prop, value in state],
+        'changedPropIds': list(changed)
+    }
+
+
+def filter_values(version, city='all', location=None):
+    """Values for FILTER_INPUTS in order"""
+    values = [city, 'all', 'all', [], version, location, '10']
+    return [(cid, prop, value) for (cid, prop), value in zip(FILTER_INPUTS, values)]
+
+
+def wire_sizes(body):
+    """Raw, gzip and brotli sizes of a response body"""
+    sizes = {'json': len(body), 'gzip': len(gzip.compress(body, compresslevel=6))}
+    if brotli is not None:
+        sizes['brotli'] = len(brotli.compress(body, quality=4))
+    return sizes
+
+
+def main():
+    num_sites = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    num_alerts = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    app_module = load_app(num_sites=num_sites, num_alerts=num_alerts)
+    client = app_module.app.server.test_client()
+    version = app_module.initial_snapshot.version
+
+    victoria = json.dumps({'lat': 48.4284, 'lon': -123.3656})
+
+    scenarios = [
+        ('map: first load (full figure)', callback_body(
+            [('emergency-map', 'figure'), ('map-version-store', 'children')],
+            filter_values(version) + [('emergency-map', 'relayoutData', None)],
+            [('map-version-store', 'children', None)],
+            ['data-version-store.children'])),
+        ('map: city filter (Patch)', 'patch', 'Victoria'),
+        ('map: address search (Patch)', 'patch', 'all', victoria),
+        ('table: one page', callback_body(
+            [('sites-table', 'data'), ('sites-table', 'page_count'), ('sites-table', 'page_current')],
+            filter_values(version) + [('sites-table', 'page_current', 0), ('sites-table', 'page_size', 15),
+                                      ('sites-table', 'sort_by', []), ('sites-table', 'filter_query', '')],
+            changed=['data-version-store.children'])),
+        ('metric cards', callback_body(
+            [('total-sites-number', 'children'), ('total-spaces-number', 'children')],
+            filter_values(version),
+            changed=['data-version-store.children'])),
+    ]
+
+    print("=" * 78)
+    print(f"Bytes on the wire per callback ({num_sites:,} sites, {num_alerts} alert polygons)")
+    print("=" * 78)
+    print(f"{'callback':34} {'coords':8} {'json':>10} {'gzip':>10} {'brotli':>10}")
+    print("-" * 78)
+
+    for compact in (False, True):
+        app_module.COMPACT_COORDS = compact
+        map_state = None
+
+        for scenario in scenarios:
+            name = scenario[0]
+
+            if scenario[1] == 'patch':
+                city = scenario[2]
+                location = scenario[3] if len(scenario) > 3 else None
+                body = callback_body(
+                    [('emergency-map', 'figure'), ('map-version-store', 'children')],
+                    filter_values(version, city, location) + [('emergency-map', 'relayoutData', None)],
+                    [('map-version-store', 'children', map_state)],
+                    ['city-filter.value'])
+            else:
+                body = scenario[1]
+
+            response = client.post('/_dash-update-component', json=body)
+            if response.status_code != 200:
+                print(f"{name:34} ERROR {response.status_code}")
+                continue
+
+            if name.startswith('map: first load'):
+                map_state = response.get_json()['response']['map-version-store']['children']
+
+            sizes = wire_sizes(response.data)
+            print(f"{name:34} {'typed' if compact else 'json':8} {sizes['json']:>10,} {sizes['gzip']:>10,} "
+                  f"{sizes.get('brotli', 0):>10,}")
+
+        print("-" * 78)
+
+    if brotli is None:
+        print("(install 'brotli' to measure brotli sizes)")
+
+
+if __name__ == "__main__":
+    main()
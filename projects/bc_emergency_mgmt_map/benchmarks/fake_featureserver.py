@@ -0,0 +1,277 @@
+"""
+Fake ArcGIS FeatureServer
+-------------------------
+A local stand-in for the Evacuation_Orders_and_Alerts layer on services6.arcgis.com,
+so bc_alerts_api(), refresh and load tests can run offline.
+
+Serves <layer>/query with the parameters the app and paging clients use:
+    where               1=1, FIELD = 'x', FIELD <> 'x', FIELD IN ('a', 'b'),
+                        FIELD > 123 (also >=, <, <=), joined with AND
+    resultOffset        skip N features
+    resultRecordCount   page size (0 or missing = --max-records)
+    returnIdsOnly       {"objectIdFieldName": "OBJECTID", "objectIds": [...]}
+    returnCountOnly     {"count": N}
+    returnGeometry      false drops geometries
+    f                   pgeojson / geojson (FeatureCollection) or json (Esri-style ids/counts only)
+
+Pages past --max-records set exceededTransferLimit like the real service.
+GET /__stats returns request counters; POST /__reset clears them.
+
+Latency and failures can be injected:
+    --latency-ms 300 --jitter-ms 200   delay every query
+    --failure-rate 0.1                 fail 10% of queries
+    --failure-mode http|arcgis|timeout HTTP 500, ArcGIS error body with HTTP 200, or hang for 60 s
+
+Usage:
+    python benchmarks/fake_featureserver.py [--port 8765] [--alerts 200 --vertices 200 | --payload recorded.json]
+
+Then run the app against it:
+    ALERTS_LAYER_URL=http://localhost:8765/Evacuation_Orders_and_Alerts/FeatureServer/0 python src/app.py
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from synthetic import make_alerts_payload
+
+LAYER_PATH = '/Evacuation_Orders_and_Alerts/FeatureServer/0'
+OBJECT_ID_FIELD = 'OBJECTID'
+
+CONDITION = re.compile(
+    r"^\s*(\w+)\s*(=|<>|>=|<=|>|<|IN)\s*(\(.*\)|'[^']*'|-?[\d.]+)\s*$",
+    re.IGNORECASE
+)
+
+
+class QueryError(ValueError):
+    """An unsupported or malformed query (answered like ArcGIS does: HTTP 200 + error body)"""
+
+
+def _literal(text):
+    """Parse a SQL literal: 'string' or number"""
+    text = text.strip()
+    if text.startswith("'") and text.endswith("'"):
+        return text[1:-1]
+    try:
+        return float(text) if '.' in text else int(text)
+    except ValueError:
+        raise QueryError(f"Bad literal: {text}")
+
+
+def parse_where(where):
+    """Turn a simple SQL where clause into a predicate on feature properties"""
+    where = (where or '1=1').strip()
+    if where.replace(' ', '') == '1=1':
+        return lambda properties: True
+
+    checks = []
+    for clause in re.split(r'\s+AND\s+', where, flags=re.IGNORECASE):
+        match = CONDITION.match(clause)
+        if not match:
+            raise QueryError(f"Unsupported where clause: {clause}")
+
+        field, op, value = match.group(1).upper(), match.group(2).upper(), match.group(3)
+
+        if op == 'IN':
+            values = {_literal(v) for v in value.strip('()').split(',')}
+            checks.append(lambda p, f=field, vs=values: p.get(f) in vs)
+        else:
+            target = _literal(value)
+            compare = {
+                '=': lambda a, b: a == b, '<>': lambda a, b: a != b,
+                '>': lambda a, b: a > b, '>=': lambda a, b: a >= b,
+                '<': lambda a, b: a < b, '<=': lambda a, b: a <= b,
+            }[op]
+            checks.append(lambda p, f=field, t=target, c=compare: p.get(f) is not None and c(p.get(f), t))
+
+    return lambda properties: all(check(properties) for check in checks)
+
+
+class FakeFeatureServer:
+    """Threaded HTTP server answering FeatureServer queries from an in-memory FeatureCollection"""
+
+    def __init__(self, payload, host='127.0.0.1', port=8765, max_records=2000,
+                 latency_ms=0, jitter_ms=0, failure_rate=0.0, failure_mode='http', seed=0):
+        self.features = payload['features']
+        for feature in self.features:
+            feature['properties'].setdefault(OBJECT_ID_FIELD, feature.get('id'))
+
+        self.max_records = max_records
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self.random = random.Random(seed)
+
+        self.stats = {'queries': 0, 'failures': 0, 'features_served': 0}
+        self.lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.thread = None
+
+    @property
+    def layer_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{LAYER_PATH}"
+
+    def start(self):
+        """Serve in a background thread; returns the layer URL for ALERTS_LAYER_URL"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self.layer_url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _count(self, key, value=1):
+        with self.lock:
+            self.stats[key] += value
+
+    def query(self, params):
+        """Answer a query; returns (status, body dict)"""
+        if self.latency_ms or self.jitter_ms:
+            time.sleep((self.latency_ms + self.random.uniform(0, self.jitter_ms)) / 1000)
+
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            self._count('failures')
+            if self.failure_mode == 'timeout':
+                time.sleep(60)
+            if self.failure_mode == 'arcgis':
+                return 200, {'error': {'code': 503, 'message': 'Service unavailable (injected)', 'details': []}}
+            return 500, {'error': 'injected failure'}
+
+        def param(name, default=''):
+            return params.get(name, [default])[0]
+
+        try:
+            predicate = parse_where(param('where', '1=1'))
+            offset = int(param('resultOffset') or 0)
+            record_count = int(param('resultRecordCount') or 0)
+        except (QueryError, ValueError) as e:
+            return 200, {'error': {'code': 400, 'message': 'Unable to complete operation.', 'details': [str(e)]}}
+
+        matched = [feature for feature in self.features if predicate(feature['properties'])]
+
+        if param('returnCountOnly').lower() == 'true':
+            return 200, {'count': len(matched)}
+
+        if param('returnIdsOnly').lower() == 'true':
+            return 200, {
+                'objectIdFieldName': OBJECT_ID_FIELD,
+                'objectIds': [feature['properties'][OBJECT_ID_FIELD] for feature in matched]
+            }
+
+        page_size = min(record_count or self.max_records, self.max_records)
+        page = matched[offset:offset + page_size]
+        exceeded = offset + page_size < len(matched)
+
+        if param('returnGeometry', 'true').lower() == 'false':
+            page = [dict(feature, geometry=None) for feature in page]
+
+        self._count('features_served', len(page))
+
+        body = {'type': 'FeatureCollection', 'features': page}
+        if exceeded:
+            body['properties'] = {'exceededTransferLimit': True}
+        return 200, body
+
+    def layer_info(self):
+        """Minimal layer metadata (what paging clients read maxRecordCount from)"""
+        return {
+            'name': 'Evacuation_Orders_and_Alerts',
+            'objectIdField': OBJECT_ID_FIELD,
+            'maxRecordCount': self.max_records,
+            'supportsPagination': True,
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _params(self):
+                url = urlparse(self.path)
+                params = parse_qs(url.query, keep_blank_values=True)
+                if self.command == 'POST':
+                    length = int(self.headers.get('Content-Length') or 0)
+                    params.update(parse_qs(self.rfile.read(length).decode(), keep_blank_values=True))
+                return url.path.rstrip('/'), params
+
+            def _route(self):
+                path, params = self._params()
+
+                if path == '/__stats':
+                    return self._send(200, server.stats)
+                if path == '/__reset':
+                    with server.lock:
+                        server.stats = {key: 0 for key in server.stats}
+                    return self._send(200, server.stats)
+                if path == LAYER_PATH:
+                    return self._send(200, server.layer_info())
+                if path == LAYER_PATH + '/query':
+                    server._count('queries')
+                    return self._send(*server.query(params))
+
+                self._send(404, {'error': {'code': 404, 'message': f'Not found: {path}'}})
+
+            do_GET = _route
+            do_POST = _route
+
+            def log_message(self, format, *args):
+                pass  # Keep load tests quiet; /__stats has the counts
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the Evacuation_Orders_and_Alerts FeatureServer')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--payload', help='recorded pgeojson response to replay')
+    parser.add_argument('--alerts', type=int, default=200, help='synthetic alert polygons (without --payload)')
+    parser.add_argument('--vertices', type=int, default=200)
+    parser.add_argument('--max-records', type=int, default=2000, help='page size limit (maxRecordCount)')
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--failure-mode', choices=['http', 'arcgis', 'timeout'], default='http')
+    args = parser.parse_args()
+
+    if args.payload:
+        with open(args.payload) as f:
+            payload = json.load(f)
+    else:
+        payload = make_alerts_payload(args.alerts, vertices=args.vertices)
+
+    server = FakeFeatureServer(
+        payload, host=args.host, port=args.port, max_records=args.max_records,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate, failure_mode=args.failure_mode
+    )
+
+    print(f"Serving {len(server.features)} features at {server.layer_url}/query")
+    print(f"  ALERTS_LAYER_URL={server.layer_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+"""
+Callback Load Test
+------------------
+Simulates concurrent dashboard users against /_dash-update-component and
+reports latency percentiles and error rates per callback.
+
+Each virtual user loads the page (map, table, metric cards, filter options,
+data age), then repeats random actions with think time between them:
+
+  slicer    change the city, event type, facility type or affected toggle
+  search    address search (geocoder stubbed), then the filtered views
+  radius    2 / 5 / 10 km radius toggle
+  page      table paging
+  refresh   Refresh Data click; a new data version re-renders everything
+
+Every action sends the same chain of requests the browser would, including
+map Patch state and background callback job polling.
+
+By default the app runs in this process on a threaded HTTP server, with
+synthetic sites, alerts from benchmarks/fake_featureserver.py and a stub
+geocoder that resolves BC city names. With --url the load goes to an
+already-running server (e.g. gunicorn started with ALERTS_LAYER_URL pointing at
+the fake FeatureServer); address searches then use that server's geocoder.
+
+Usage:
+    python benchmarks/load_test.py [--users 10] [--duration 30] [--think-ms 500]
+        [--sites 20000] [--alerts 100] [--upstream-latency-ms 300]
+        [--freshness 0] [--url http://localhost:8050] [--save results.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import requests
+
+# Keep the per-request JSON perf logs out of the output
+os.environ.setdefault('PERF_LOG', '0')
+
+from synthetic import BC_CITIES, load_app, make_alerts_payload
+from bench_payload_size import FILTER_INPUTS, callback_body
+from fake_featureserver import FakeFeatureServer
+
+CALLBACK_PATH = '/_dash-update-component'
+
+# Relative frequency of each user action
+ACTION_WEIGHTS = {'slicer': 0.5, 'search': 0.15, 'radius': 0.15, 'page': 0.1, 'refresh': 0.1}
+
+CITIES = [city for city, *_ in BC_CITIES]
+EVENT_TYPES = ['all', 'Fire', 'Flood', 'Landslide']
+FACILITY_TYPES = ['all', 'School', 'Daycare', 'Community Centre']
+
+# Addresses the stub geocoder resolves, plus one it can't (exercises the suggestion path)
+SEARCH_ADDRESSES = [f'100 Main St, {city}, BC' for city in CITIES] + ['1 Nowhere Rd']
+
+# Background callbacks: how often to poll for the job result, and for how long
+POLL_INTERVAL = 0.1
+POLL_TIMEOUT = 120
+
+
+def stub_geocoder(latency_ms):
+    """geocode_address() stand-in: BC city centres after a simulated API delay"""
+    centres = {city.lower(): (lat, lon) for city, lat, lon, _ in BC_CITIES}
+
+    def geocode_address(address):
+        time.sleep(latency_ms / 1000)
+        for city, (lat, lon) in centres.items():
+            if city in address.lower():
+                return lat, lon
+        return None, None
+
+    return geocode_address
+
+
+def find_prop(component, component_id, prop):
+    """Look up a component property in the /_dash-layout JSON"""
+    if isinstance(component, dict):
+        props = component.get('props', {})
+        if props.get('id') == component_id:
+            return props.get(prop)
+        children = props.get('children')
+        return find_prop(children, component_id, prop) if children is not None else None
+    if isinstance(component, list):
+        for child in component:
+            found = find_prop(child, component_id, prop)
+            if found is not None:
+                return found
+    return None
+
+
+class Results:
+    """Latencies and errors per callback, shared by all users"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = {}
+        self.lock = threading.Lock()
+
+    def add(self, callback, seconds, error=None):
+        with self.lock:
+            self.latencies[callback].append(seconds)
+            if error:
+                self.errors[callback] += 1
+                self.error_samples.setdefault(callback, error)
+
+    def summary(self, elapsed):
+        rows = []
+        for callback in sorted(self.latencies, key=lambda c: -len(self.latencies[c])):
+            latencies = np.array(self.latencies[callback]) * 1000
+            p50, p90, p95, p99 = np.percentile(latencies, [50, 90, 95, 99])
+            rows.append({
+                'callback': callback,
+                'requests': len(latencies),
+                'errors': self.errors[callback],
+                'error_rate': self.errors[callback] / len(latencies),
+                'rps': len(latencies) / elapsed,
+                'p50_ms': p50, 'p90_ms': p90, 'p95_ms': p95, 'p99_ms': p99,
+                'max_ms': latencies.max(),
+            })
+        return rows
+
+
+class VirtualUser:
+    """One browser session: its filter state and the requests its actions trigger"""
+
+    def __init__(self, base_url, version, results, rng):
+        self.base_url = base_url
+        self.session = requests.Session()
+        self.results = results
+        self.rng = rng
+
+        self.version = version
+        self.city = 'all'
+        self.event_type = 'all'
+        self.facility_type = 'all'
+        self.affected = []
+        self.location = None
+        self.radius = '10'
+        self.map_state = None
+        self.page = 0
+
+    def filters(self):
+        values = [self.city, self.event_type, self.facility_type, self.affected,
+                  self.version, self.location, self.radius]
+        return [(cid, prop, value) for (cid, prop), value in zip(FILTER_INPUTS, values)]
+
+    def post(self, callback, body):
+        """Send one callback request (polling background jobs); returns the response dict or None"""
+        url = self.base_url + CALLBACK_PATH
+        start = time.perf_counter()
+        try:
+            response = self.session.post(url, json=body, timeout=POLL_TIMEOUT)
+
+            # Background callback: the first response is a job handle, then poll until it finishes
+            data = response.json() if response.status_code == 200 else None
+            if data and 'cacheKey' in data:
+                params = {'cacheKey': data['cacheKey'], 'job': data['job']}
+                while True:
+                    if time.perf_counter() - start > POLL_TIMEOUT:
+                        raise TimeoutError('background job did not finish')
+                    time.sleep(POLL_INTERVAL)
+                    response = self.session.post(url, params=params, json=body, timeout=POLL_TIMEOUT)
+                    data = response.json() if response.status_code == 200 else None
+                    if response.status_code != 200 or 'response' in data:
+                        break
+
+            # 204 is PreventUpdate / no_update, a normal outcome
+            if response.status_code not in (200, 204):
+                raise RuntimeError(f'HTTP {response.status_code}')
+
+            self.results.add(callback, time.perf_counter() - start)
+            return data.get('response') if data else None
+
+        except Exception as e:
+            self.results.add(callback, time.perf_counter() - start, error=str(e)[:200])
+            return None
+
+    # ------------------------------------------------------------------
+    # Requests (one per callback)
+    # ------------------------------------------------------------------
+
+    def update_map(self, changed):
+        response = self.post('update_map_and_table', callback_body(
+            [('emergency-map', 'figure'), ('map-version-store', 'children')],
+            self.filters() + [('emergency-map', 'relayoutData', None)],
+            [('map-version-store', 'children', self.map_state)],
+            [changed]))
+        if response:
+            self.map_state = response['map-version-store']['children']
+
+    def update_table(self, changed):
+        response = self.post('update_table_page', callback_body(
+            [('sites-table', 'data'), ('sites-table', 'page_count'), ('sites-table', 'page_current')],
+            self.filters() + [('sites-table', 'page_current', self.page), ('sites-table', 'page_size', 15),
+                              ('sites-table', 'sort_by', []), ('sites-table', 'filter_query', '')],
+            changed=[changed]))
+        if response:
+            self.page = response['sites-table']['page_current']
+
+    def update_metrics(self, changed):
+        self.post('update_metric_cards', callback_body(
+            [('total-sites-number', 'children'), ('total-spaces-number', 'children')],
+            self.filters(), changed=[changed]))
+
+    def update_filter_options(self, changed):
+        self.post('update_filter_options', callback_body(
+            [('event-type-filter', 'options'), ('facility-type-filter', 'options')],
+            [('city-filter', 'value', self.city), ('data-version-store', 'children', self.version)],
+            changed=[changed]))
+
+    def update_data_age(self):
+        self.post('update_data_age', callback_body(
+            [('data-age', 'children')],
+            [('data-version-store', 'children', self.version), ('data-age-interval', 'n_intervals', None)],
+            changed=['data-version-store.children']))
+
+    def filtered_views(self, changed):
+        """Everything that depends on the filters, as the browser fires it"""
+        self.update_map(changed)
+        self.update_table(changed)
+        self.update_metrics(changed)
+
+    # ------------------------------------------------------------------
+    # Actions
+    # ------------------------------------------------------------------
+
+    def load_page(self):
+        self.map_state = None
+        self.update_filter_options('data-version-store.children')
+        self.update_data_age()
+        self.filtered_views('data-version-store.children')
+
+    def slicer(self):
+        choice = self.rng.choice(['city', 'event_type', 'facility_type', 'affected'])
+        if choice == 'city':
+            self.city = self.rng.choice(['all'] + CITIES)
+            self.update_filter_options('city-filter.value')
+            changed = 'city-filter.value'
+        elif choice == 'event_type':
+            self.event_type = self.rng.choice(EVENT_TYPES)
+            changed = 'event-type-filter.value'
+        elif choice == 'facility_type':
+            self.facility_type = self.rng.choice(FACILITY_TYPES)
+            changed = 'facility-type-filter.value'
+        else:
+            self.affected = [] if self.affected else ['affected']
+            changed = 'affected-toggle.value'
+        self.filtered_views(changed)
+
+    def search(self):
+        address = self.rng.choice(SEARCH_ADDRESSES)
+        response = self.post('handle_location_search', callback_body(
+            [('user-location-store', 'children'), ('address-search', 'style'),
+             ('search-error-message', 'children'), ('search-error-message', 'style')],
+            [('search-button', 'n_clicks', 1), ('reset-button', 'n_clicks', None)],
+            [('address-search', 'value', address)],
+            ['search-button.n_clicks']))
+        if response:
+            self.location = response['user-location-store']['children']
+            self.filtered_views('user-location-store.children')
+
+    def radius_toggle(self):
+        button = self.rng.choice(['radius-2km', 'radius-5km', 'radius-10km'])
+        response = self.post('update_selected_radius', callback_body(
+            [('selected-radius-store', 'children'), ('radius-2km', 'style'),
+             ('radius-5km', 'style'), ('radius-10km', 'style')],
+            [('radius-2km', 'n_clicks', 1), ('radius-5km', 'n_clicks', 1),
+             ('radius-10km', 'n_clicks', 1), ('reset-button', 'n_clicks', None)],
+            changed=[f'{button}.n_clicks']))
+        if response:
+            self.radius = response['selected-radius-store']['children']
+            self.filtered_views('selected-radius-store.children')
+
+    def page_table(self):
+        self.page += 1
+        self.update_table('sites-table.page_current')
+
+    def refresh(self):
+        response = self.post('refresh_emergency_data', callback_body(
+            [('data-version-store', 'children')],
+            [('refresh-button', 'n_clicks', 1)],
+            changed=['refresh-button.n_clicks']))
+        if response:
+            version = response['data-version-store']['children']
+            if version != self.version:
+                self.version = version
+                self.load_page()
+            else:
+                self.update_data_age()
+
+    def run(self, stop_at, think_ms):
+        actions = {'slicer': self.slicer, 'search': self.search, 'radius': self.radius_toggle,
+                   'page': self.page_table, 'refresh': self.refresh}
+        names, weights = zip(*ACTION_WEIGHTS.items())
+
+        self.load_page()
+        while time.time() < stop_at:
+            time.sleep(self.rng.expovariate(1000 / think_ms) if think_ms > 0 else 0)
+            actions[self.rng.choices(names, weights)[0]]()
+
+
+def start_local_app(args):
+    """Run the app on a threaded local server with synthetic data and stubbed upstreams"""
+    from werkzeug.serving import make_server
+
+    if args.freshness is not None:
+        os.environ['REFRESH_FRESHNESS_SECONDS'] = str(args.freshness)
+
+    feature_server = FakeFeatureServer(
+        make_alerts_payload(args.alerts, vertices=args.vertices), port=0,
+        latency_ms=args.upstream_latency_ms, failure_rate=args.upstream_failure_rate
+    )
+    alerts_url = feature_server.start()
+
+    app_module = load_app(num_sites=args.sites, alerts_url=alerts_url)
+    app_module.geocode_address = stub_geocoder(args.geocode_latency_ms)
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # No access log line per request
+    httpd = make_server('127.0.0.1', 0, app_module.app.server, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    return f'http://127.0.0.1:{httpd.server_port}', feature_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent user load test for the Dash callbacks')
+    parser.add_argument('--users', type=int, default=10, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='seconds of load')
+    parser.add_argument('--ramp-up', type=float, default=5, help='seconds over which users start')
+    parser.add_argument('--think-ms', type=float, default=500, help='mean pause between user actions')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--url', help='target an already-running server instead of starting one')
+    parser.add_argument('--sites', type=int, default=20_000)
+    parser.add_argument('--alerts', type=int, default=100)
+    parser.add_argument('--vertices', type=int, default=200)
+    parser.add_argument('--upstream-latency-ms', type=float, default=300, help='fake FeatureServer delay')
+    parser.add_argument('--upstream-failure-rate', type=float, default=0.0)
+    parser.add_argument('--geocode-latency-ms', type=float, default=150, help='stub geocoder delay')
+    parser.add_argument('--freshness', type=int, help='REFRESH_FRESHNESS_SECONDS for the local app')
+    parser.add_argument('--save', help='write the per-callback summary as JSON')
+    args = parser.parse_args()
+
+    feature_server = None
+    print("Starting app..." if not args.url else f"Target: {args.url}", flush=True)
+
+    # The app prints per event and per refresh; keep that off the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        if args.url:
+            base_url = args.url.rstrip('/')
+        else:
+            base_url, feature_server = start_local_app(args)
+
+        layout = requests.get(base_url + '/_dash-layout', timeout=30).json()
+        version = find_prop(layout, 'data-version-store', 'children')
+
+        results = Results()
+        rng = random.Random(args.seed)
+        users = [VirtualUser(base_url, version, results, random.Random(rng.random())) for _ in range(args.users)]
+
+        start = time.time()
+        stop_at = start + args.duration
+        threads = []
+        for i, user in enumerate(users):
+            delay = args.ramp_up * i / max(len(users), 1)
+            thread = threading.Timer(delay, user.run, args=(stop_at, args.think_ms))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+
+        sys.__stdout__.write(f"Running {args.users} users for {args.duration:.0f}s against {base_url}...\n")
+        sys.__stdout__.flush()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - start
+
+    rows = results.summary(elapsed)
+
+    print("=" * 100)
+    print(f"{args.users} users, {elapsed:.0f}s, think time {args.think_ms:.0f} ms"
+          + (f", {args.sites:,} sites, {args.alerts} alerts" if not args.url else ''))
+    print("=" * 100)
+    print(f"{'callback':26} {'requests':>9} {'req/s':>7} {'errors':>7} {'p50 ms':>9} {'p90 ms':>9} "
+          f"{'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    print("-" * 100)
+    for row in rows:
+        print(f"{row['callback']:26} {row['requests']:>9} {row['rps']:>7.1f} {row['error_rate']:>7.1%} "
+              f"{row['p50_ms']:>9.0f} {row['p90_ms']:>9.0f} {row['p95_ms']:>9.0f} {row['p99_ms']:>9.0f} "
+              f"{row['max_ms']:>9.0f}")
+
+    total = sum(row['requests'] for row in rows)
+    errors = sum(row['errors'] for row in rows)
+    print("-" * 100)
+    print(f"{'total':26} {total:>9} {total / elapsed:>7.1f} {errors / max(total, 1):>7.1%}")
+
+    for callback, error in results.error_samples.items():
+        print(f"  {callback}: {error}")
+
+    if feature_server:
+        print(f"\nFake FeatureServer: {feature_server.stats}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'users': args.users, 'duration': elapsed, 'results': rows}, f, indent=2, default=float)
+        print(f"Saved results to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Synthetic BC-shaped fixtures for the benchmarks.
+
+Sites are scattered around real BC population centres and alert polygons are
+irregular rings inside the province, with the same columns that
+retrieve_site_data() and bc_alerts_api() produce.
+"""
+
+import sys
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from pathlib import Path
+from shapely.geometry import Polygon, mapping
+
+SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+# (city, lat, lon, share of sites)
+BC_CITIES = [
+    ('Vancouver', 49.2827, -123.1207, 0.25),
+    ('Surrey', 49.1913, -122.8490, 0.15),
+    ('Victoria', 48.4284, -123.3656, 0.12),
+    ('Kelowna', 49.8880, -119.4960, 0.10),
+    ('Nanaimo', 49.1659, -123.9401, 0.08),
+    ('Kamloops', 50.6745, -120.3273, 0.08),
+    ('Prince George', 53.9171, -122.7497, 0.08),
+    ('Cranbrook', 49.5097, -115.7688, 0.05),
+    ('Prince Rupert', 54.3150, -130.3208, 0.04),
+    ('Fort St. John', 56.2524, -120.8466, 0.05),
+]
+
+# Rough BC extent used for alert polygon placement
+BC_LAT_RANGE = (48.5, 58.5)
+BC_LON_RANGE = (-129.0, -115.5)
+
+
+def make_sites(num_sites, seed=0, affected_share=0.1):
+    """Sites shaped like retrieve_site_data() output + event columns from the spatial join"""
+    rng = np.random.default_rng(seed)
+
+    names, lats, lons, shares = zip(*BC_CITIES)
+    city_idx = rng.choice(len(BC_CITIES), size=num_sites, p=np.array(shares) / sum(shares))
+
+    affected = rng.random(num_sites) < affected_share
+
+    return pd.DataFrame({
+        'site_name': [f'Site {i}' for i in range(num_sites)],
+        'lat': np.array(lats)[city_idx] + rng.normal(0, 0.12, num_sites),
+        'lon': np.array(lons)[city_idx] + rng.normal(0, 0.18, num_sites),
+        'max_capacity': rng.integers(0, 500, num_sites),
+        'full_address': [f'{i} Main St, BC' for i in range(num_sites)],
+        'property_type': rng.choice(['School', 'Daycare', 'Community Centre'], num_sites),
+        'city': np.array(names)[city_idx],
+        'event_name': np.where(affected, 'Synthetic Event', None),
+        'event_type': np.where(affected, rng.choice(['Fire', 'Flood', 'Landslide'], num_sites), None),
+    })
+
+
+def make_raw_sites(num_sites, seed=0):
+    """Sites as retrieve_site_data() returns them (before the spatial join)"""
+    return make_sites(num_sites, seed=seed).drop(columns=['event_name', 'event_type'])
+
+
+def make_ring(rng, center_lat, center_lon, radius_deg, vertices):
+    """An irregular closed ring around a centre point"""
+    angles = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    radii = radius_deg * (1 + 0.35 * rng.standard_normal(vertices).cumsum() / np.sqrt(vertices))
+    radii = np.clip(radii, radius_deg * 0.3, radius_deg * 2)
+
+    lons = center_lon + radii * np.cos(angles) / np.cos(np.radians(center_lat))
+    lats = center_lat + radii * np.sin(angles)
+    return Polygon(zip(lons, lats))
+
+
+def make_alerts(num_alerts, vertices=200, seed=0):
+    """Alert polygons shaped like bc_alerts_api() output"""
+    rng = np.random.default_rng(seed)
+    rows = []
+
+    for i in range(num_alerts):
+        center_lat = rng.uniform(*BC_LAT_RANGE)
+        center_lon = rng.uniform(*BC_LON_RANGE)
+
+        rows.append({
+            'event_id': i,
+            'event_name': f'Synthetic Event {i}',
+            'event_type': rng.choice(['Fire', 'Flood', 'Landslide']),
+            'order_alert_status': rng.choice(['Alert', 'Order']),
+            'issuing_agency': 'Synthetic Regional District',
+            'preoc_code': 'SWE',
+            'order_alert_name': f'Order {i}',
+            'event_number': f'E{i:05d}',
+            'date_modified': 1700000000000 + i,
+            'feature_area_sqm': 0.0,
+            'feature_length_m': 0.0,
+            'geometry': make_ring(rng, center_lat, center_lon, rng.uniform(0.03, 0.4), vertices),
+            'part_num': 1,
+            'total_parts': 1
+        })
+
+    return gpd.GeoDataFrame(rows, crs='EPSG:4326')
+
+
+def make_alerts_payload(num_alerts, vertices=200, seed=0):
+    """
+    An Evacuation_Orders_and_Alerts FeatureServer response (f=pgeojson) for make_alerts() polygons.
+
+    Stands in for a recorded API payload so bc_alerts_api() parsing can be timed offline.
+    """
+    alerts = make_alerts(num_alerts, vertices=vertices, seed=seed)
+
+    features = []
+    for row in alerts.itertuples():
+        features.append({
+            'type': 'Feature',
+            'id': int(row.event_id),
+            'geometry': mapping(row.geometry),
+            'properties': {
+                'EVENT_NAME': row.event_name,
+                'EVENT_TYPE': str(row.event_type),
+                'ORDER_ALERT_STATUS': str(row.order_alert_status),
+                'ISSUING_AGENCY': row.issuing_agency,
+                'PREOC_CODE': row.preoc_code,
+                'ORDER_ALERT_NAME': row.order_alert_name,
+                'EVENT_NUMBER': row.event_number,
+                'DATE_MODIFIED': int(row.date_modified),
+                'FEATURE_AREA_SQM': float(row.feature_area_sqm),
+                'FEATURE_LENGTH_M': float(row.feature_length_m),
+            }
+        })
+
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def load_app(num_sites=5000, num_alerts=50, vertices=200, alerts_url=None):
+    """
+    Import src/app.py with synthetic data instead of the live API and CSV.
+
+    With alerts_url, the alerts come through the real bc_alerts_api() from that
+    FeatureServer (e.g. benchmarks/fake_featureserver.py) instead.
+
+    app.py loads its data at import time, so this can only be called once per process.
+    """
+    import utils
+
+    if alerts_url:
+        utils.ALERTS_LAYER_URL = alerts_url
+    else:
+        utils.bc_alerts_api = lambda: make_alerts(num_alerts, vertices=vertices)
+    utils.retrieve_site_data = lambda: make_raw_sites(num_sites)
+
+    import app
+    return app
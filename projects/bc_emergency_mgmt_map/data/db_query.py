@@ -1,8 +1,20 @@
 import sqlite3
+import numpy as np
 import pandas as pd
 import os
+import sys
 from pathlib import Path
 
+SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+# Written by init_sqlite_db.create_spatial_index() and sites_db (for facilities):
+# indexed table -> R*Tree and coordinate columns
+from sites_db import SPATIAL_INDEX_TABLE, bbox_filter
+
+EARTH_RADIUS_KM = 6371
+
 # db_name = "bc_assets.db"
 # conn = sqlite3.connect(db_name)
 # cursor = conn.cursor()
@@ -34,6 +46,56 @@ def is_read_only_query(query):
     
     return False
 
+def get_spatial_index(conn, table):
+    """Look up a table's R*Tree and coordinate columns, as (rtree, lat_col, lon_col)."""
+    try:
+        row = conn.execute(
+            f"SELECT rtree_name, lat_col, lon_col FROM {SPATIAL_INDEX_TABLE} WHERE table_name = ?", (table,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    
+    if row is None:
+        raise ValueError(f"Table '{table}' has no spatial index "
+                         f"(run: python init_sqlite_db.py --spatial-index <db> {table})")
+    return row
+
+def query_bbox(conn, table, bbox, columns='*'):
+    """
+    Rows of `table` inside a (min_lon, min_lat, max_lon, max_lat) bounding box,
+    found through its R*Tree instead of a full table scan. Returns a DataFrame.
+    """
+    rtree, lat_col, lon_col = get_spatial_index(conn, table)
+    condition, params = bbox_filter(rtree, lat_col, lon_col, bbox)
+    return pd.read_sql_query(f"SELECT {columns} FROM {table} WHERE {condition}", conn, params=params)
+
+def query_radius(conn, table, lat, lon, radius_km, columns='*'):
+    """
+    Rows of `table` within `radius_km` of (lat, lon), nearest first, with a
+    distance_km column. The R*Tree narrows the search to the circle's bounding
+    box; exact haversine distances are only computed for those rows.
+    """
+    _, lat_col, lon_col = get_spatial_index(conn, table)
+    
+    # Exact lat/lon extent of the circle on the sphere
+    angle = radius_km / EARTH_RADIUS_KM
+    lat_delta = np.degrees(angle)
+    lon_delta = np.degrees(np.arcsin(min(np.sin(angle) / max(np.cos(np.radians(lat)), 1e-9), 1.0)))
+    
+    # Select the coordinates under reserved names too, whatever `columns` is
+    candidates = query_bbox(
+        conn, table, (lon - lon_delta, lat - lat_delta, lon + lon_delta, lat + lat_delta),
+        columns=f"{columns}, {lat_col} AS _lat, {lon_col} AS _lon"
+    )
+    
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(candidates.pop('_lat')), np.radians(candidates.pop('_lon'))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    candidates['distance_km'] = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    
+    nearby = candidates[candidates['distance_km'] <= radius_km]
+    return nearby.sort_values('distance_km').reset_index(drop=True)
+
 def get_multiline_query():
     """Get multi-line SQL query from user. Executes when `;` is followed by Enter."""
     print("\nEnter your SQL query (type `;` and press Enter to execute):")
@@ -4,14 +4,22 @@ SQLite Data Ingestion Tool
 Robust, interactive tool to ingest CSV datasets into SQLite with validation and logging.
 """
 
+import argparse
+import json
 import requests
 import sqlite3
+import sys
 import pandas as pd
 import logging
 import re
+import time
+import tomllib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager, ExitStack
+from itertools import chain
 from pathlib import Path
 from datetime import datetime
-from typing import Tuple, Dict, Optional, List
+from typing import Tuple, Dict, Optional, List, Iterable
 from urllib.parse import urlparse
 
 
@@ -43,6 +51,22 @@ MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_GB * 1024 * 1024 * 1024
 NETWORK_TIMEOUT = 30  # seconds
 MAX_URL_RETRIES = 3
 
+# Streaming ingestion: files above this size are offered chunked loading
+STREAMING_THRESHOLD_BYTES = 200 * 1024 * 1024
+STREAM_CHUNK_ROWS = 50_000
+
+# Rows per executemany() call in the bulk loader (bounds the temporary row tuples)
+BULK_BATCH_ROWS = 10_000
+
+# Resumable ingestion: local copies of downloads, and per-table load progress
+DOWNLOAD_DIR = Path("downloads")
+DOWNLOAD_BLOCK_BYTES = 1024 * 1024
+PROGRESS_TABLE = "ingest_progress"
+
+# Spatial indexes: R*Tree table suffix, and the table recording indexed tables and their coordinate columns
+SPATIAL_INDEX_SUFFIX = "_rtree"
+SPATIAL_INDEX_TABLE = "spatial_indexes"
+
 # BC Boundaries for validation
 BC_LAT_MIN, BC_LAT_MAX = 48.0, 60.0
 BC_LON_MIN, BC_LON_MAX = -139.0, -114.0
@@ -88,120 +112,132 @@ def clean_column_name(col_name: str) -> str:
     return cleaned
 
 
-def validate_bc_coordinates(df: pd.DataFrame) -> Dict[str, any]:
+# Validation rules: mask key -> description (reported in this order)
+VALIDATION_RULES = {
+    'missing_name_address': "BOTH name AND address missing",
+    'null_coords': "null/invalid coordinates",
+    'outside_bc': "coordinates outside BC boundaries",
+    'unreasonable_capacity': f"capacity negative or > {MAX_REASONABLE_CAPACITY}",
+}
+
+
+def find_validation_columns(columns: Iterable[str]) -> Dict[str, Optional[str]]:
     """
-    Validate that lat/lon coordinates fall within BC boundaries.
+    Identify the columns the validation rules look at (first match wins).
     
     Args:
-        df: DataFrame with potential 'lat'/'latitude' and 'lon'/'longitude' columns
+        columns: DataFrame column names
         
     Returns:
-        Dictionary with validation results including problematic row indices
+        Dictionary with 'name', 'address', 'lat', 'lon' and 'capacity' column names (None if not found)
     """
-    # Find latitude column
-    lat_cols = [col for col in df.columns if col.lower() in ['lat', 'latitude']]
-    lon_cols = [col for col in df.columns if col.lower() in ['lon', 'long', 'longitude']]
-    
-    if not lat_cols or not lon_cols:
-        return {'has_coords': False}
-    
-    lat_col = lat_cols[0]
-    lon_col = lon_cols[0]
+    columns = list(columns)
     
-    # Convert to numeric
-    lat_numeric = pd.to_numeric(df[lat_col], errors='coerce')
-    lon_numeric = pd.to_numeric(df[lon_col], errors='coerce')
-    
-    # Identify problem types
-    null_coords = df[lat_numeric.isna() | lon_numeric.isna()].index.tolist()
-    
-    # Check bounds (only for valid numeric values)
-    valid_lat = (lat_numeric >= BC_LAT_MIN) & (lat_numeric <= BC_LAT_MAX)
-    valid_lon = (lon_numeric >= BC_LON_MIN) & (lon_numeric <= BC_LON_MAX)
-    outside_bc = df[~(valid_lat & valid_lon) & lat_numeric.notna() & lon_numeric.notna()].index.tolist()
-    
-    total_coords = (lat_numeric.notna() & lon_numeric.notna()).sum()
-    total_problems = len(null_coords) + len(outside_bc)
+    def first(matches):
+        return next((col for col in columns if matches(col.lower())), None)
     
     return {
-        'has_coords': True,
-        'lat_col': lat_col,
-        'lon_col': lon_col,
-        'total_rows': len(df),
-        'total_with_coords': int(total_coords),
-        'null_coords': null_coords,
-        'outside_bc': outside_bc,
-        'total_problems': total_problems,
-        'valid_percentage': (int(total_coords) - len(outside_bc)) / int(total_coords) * 100 if total_coords > 0 else 0
+        'name': first(lambda col: any(keyword in col for keyword in ['name', 'facility', 'school', 'site'])),
+        'address': first(lambda col: any(keyword in col for keyword in ['address', 'street', 'location'])),
+        'lat': first(lambda col: col in ['lat', 'latitude']),
+        'lon': first(lambda col: col in ['lon', 'long', 'longitude']),
+        'capacity': first(lambda col: 'capacity' in col or 'spaces' in col),
     }
 
 
-def validate_capacity(df: pd.DataFrame) -> Dict[str, any]:
+def compute_validation_masks(df: pd.DataFrame, columns: Optional[Dict[str, Optional[str]]] = None) -> Dict:
     """
-    Validate capacity values are reasonable.
+    Evaluate every validation rule in one vectorized pass.
+    
+    Coordinates and capacity are converted to numbers once; each rule is a
+    boolean mask aligned with df (all False when its columns are missing).
     
     Args:
-        df: DataFrame with potential capacity column
+        df: DataFrame to validate
+        columns: Result of find_validation_columns() (detected from df if None)
         
     Returns:
-        Dictionary with validation results
+        Dictionary with 'columns', 'masks' (rule -> boolean Series), numeric
+        'lat'/'lon'/'capacity' Series (None if the columns are missing) and
+        'has_coords'/'has_capacity' flags
     """
-    # Find capacity column
-    capacity_cols = [col for col in df.columns if 'capacity' in col.lower() or 'spaces' in col.lower()]
-    
-    if not capacity_cols:
-        return {'has_capacity': False}
-    
-    capacity_col = capacity_cols[0]
-    
-    # Convert to numeric
-    capacity_numeric = pd.to_numeric(df[capacity_col], errors='coerce')
+    if columns is None:
+        columns = find_validation_columns(df.columns)
+    
+    no_rows = pd.Series(False, index=df.index)
+    masks = dict.fromkeys(VALIDATION_RULES, no_rows)
+    
+    # Rows where BOTH name AND address are null or empty
+    if columns['name'] and columns['address']:
+        name, address = df[columns['name']], df[columns['address']]
+        masks['missing_name_address'] = (name.isna() | (name == '')) & (address.isna() | (address == ''))
+    
+    lat = lon = capacity = None
+    has_coords = bool(columns['lat'] and columns['lon'])
+    if has_coords:
+        lat = pd.to_numeric(df[columns['lat']], errors='coerce')
+        lon = pd.to_numeric(df[columns['lon']], errors='coerce')
+        
+        masks['null_coords'] = lat.isna() | lon.isna()
+        in_bc = lat.between(BC_LAT_MIN, BC_LAT_MAX) & lon.between(BC_LON_MIN, BC_LON_MAX)
+        masks['outside_bc'] = ~in_bc & ~masks['null_coords']
     
-    # Check reasonable bounds
-    unreasonable = (capacity_numeric > MAX_REASONABLE_CAPACITY) | (capacity_numeric < 0)
-    unreasonable_count = (unreasonable & capacity_numeric.notna()).sum()
-    total_capacity = capacity_numeric.notna().sum()
+    has_capacity = columns['capacity'] is not None
+    if has_capacity:
+        capacity = pd.to_numeric(df[columns['capacity']], errors='coerce')
+        masks['unreasonable_capacity'] = (capacity > MAX_REASONABLE_CAPACITY) | (capacity < 0)
     
     return {
-        'has_capacity': True,
-        'capacity_col': capacity_col,
-        'total_with_capacity': int(total_capacity),
-        'unreasonable_count': int(unreasonable_count),
-        'max_capacity': int(capacity_numeric.max()) if total_capacity > 0 else 0,
-        'min_capacity': int(capacity_numeric.min()) if total_capacity > 0 else 0
+        'columns': columns,
+        'masks': masks,
+        'lat': lat,
+        'lon': lon,
+        'capacity': capacity,
+        'has_coords': has_coords,
+        'has_capacity': has_capacity,
     }
 
 
-def identify_missing_name_address(df: pd.DataFrame) -> List[int]:
+def print_violations_report(validation: Dict, total_rows: int):
     """
-    Identify rows where BOTH name AND address are null.
+    Print one line per validation rule with its violation count.
     
     Args:
-        df: DataFrame to check
-        
-    Returns:
-        List of row indices with both name and address null
+        validation: Result of compute_validation_masks()
+        total_rows: Rows validated
     """
-    # Find name columns (flexible matching)
-    name_cols = [col for col in df.columns if any(keyword in col.lower() 
-                 for keyword in ['name', 'facility', 'school', 'site'])]
-    
-    # Find address columns
-    address_cols = [col for col in df.columns if any(keyword in col.lower() 
-                   for keyword in ['address', 'street', 'location'])]
-    
-    if not name_cols or not address_cols:
-        logger.warning("Could not identify name or address columns for validation")
-        return []
+    print(f"\n  {'rule':<45} {'rows':>10} {'%':>7}")
+    print("  " + "-" * 64)
+    for rule, description in VALIDATION_RULES.items():
+        count = int(validation['masks'][rule].sum())
+        percentage = count / total_rows * 100 if total_rows else 0
+        print(f"  {description:<45} {count:>10,} {percentage:>6.2f}%")
+    
+    logger.info("Validation: " + ", ".join(
+        f"{rule}={int(mask.sum())}" for rule, mask in validation['masks'].items()
+    ))
+
+
+def print_violation_examples(df: pd.DataFrame, mask: pd.Series, columns: List[str], limit: int):
+    """
+    Print up to `limit` flagged rows (index, name and the offending values).
     
-    name_col = name_cols[0]
-    address_col = address_cols[0]
+    Args:
+        df: Validated DataFrame
+        mask: Rule mask from compute_validation_masks()
+        columns: Columns to show; the first is used as the row label
+        limit: Maximum rows to print
+    """
+    flagged = int(mask.sum())
+    examples = df.loc[mask, columns].head(limit)
     
-    # Find rows where BOTH are null
-    both_null = df[(df[name_col].isna() | (df[name_col] == '')) & 
-                   (df[address_col].isna() | (df[address_col] == ''))].index.tolist()
+    print("  " + "-" * 76)
+    for idx, label, *values in examples.itertuples(name=None):
+        shown = ", ".join(f"{col}={value}" for col, value in zip(columns[1:], values))
+        print(f"  [{idx}] {label} - {shown}")
     
-    return both_null
+    if flagged > limit:
+        print(f"  ... and {flagged - limit:,} more")
 
 
 def map_dtype_to_sqlite(dtype) -> str:
@@ -224,52 +260,111 @@ def map_dtype_to_sqlite(dtype) -> str:
 # CORE FUNCTIONS
 # ============================================================================
 
-def fetch_csv_from_url(url: str, retries: int = MAX_URL_RETRIES) -> pd.DataFrame:
+def check_file_size(url: str) -> Optional[int]:
     """
-    Fetch CSV from URL with validation and error handling.
+    Validate the URL and check the remote file size with a HEAD request.
     
     Args:
         url: URL to CSV file
-        retries: Number of retry attempts
         
     Returns:
-        Pandas DataFrame
+        File size in bytes, or None if the server doesn't report it
         
     Raises:
         ValueError: If URL is invalid or file too large
         requests.RequestException: If network error occurs
     """
-    logger.info(f"Fetching data from: {url}")
+    return check_remote_file(url)[0]
+
+
+def download_validator(headers) -> Optional[str]:
+    """
+    Value identifying this version of a remote file, as If-Range accepts it.
+    
+    A strong ETag, else Last-Modified (weak ETags can't be used with If-Range).
+    
+    Args:
+        headers: Response headers
+        
+    Returns:
+        Validator string, or None if the server sends neither
+    """
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return headers.get('Last-Modified')
+
+
+def check_remote_file(url: str) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Validate the URL and HEAD the remote file for its size and validator.
     
+    Args:
+        url: URL to CSV file
+        
+    Returns:
+        (file size in bytes, validator from download_validator()); either is
+        None if the server doesn't report it
+        
+    Raises:
+        ValueError: If URL is invalid or file too large
+        requests.RequestException: If network error occurs
+    """
     # Validate URL format
     parsed = urlparse(url)
     if not all([parsed.scheme, parsed.netloc]):
         raise ValueError(f"Invalid URL format: {url}")
     
+    head_response = requests.head(url, timeout=NETWORK_TIMEOUT, allow_redirects=True)
+    validator = download_validator(head_response.headers)
+    
+    if 'content-length' not in head_response.headers:
+        return None, validator
+    
+    file_size = int(head_response.headers['content-length'])
+    file_size_gb = file_size / (1024 ** 3)
+    
+    logger.info(f"File size: {file_size_gb:.2f} GB")
+    
+    if file_size > MAX_FILE_SIZE_BYTES:
+        raise ValueError(
+            f"File too large: {file_size_gb:.2f} GB. "
+            f"Maximum allowed: {MAX_FILE_SIZE_GB} GB"
+        )
+    
+    return file_size, validator
+
+
+def fetch_csv_from_url(url: str, retries: int = MAX_URL_RETRIES) -> pd.DataFrame:
+    """
+    Fetch CSV from URL with validation and error handling.
+    
+    Args:
+        url: URL to CSV file
+        retries: Number of retry attempts
+        
+    Returns:
+        Pandas DataFrame
+        
+    Raises:
+        ValueError: If URL is invalid or file too large
+        requests.RequestException: If network error occurs
+    """
+    logger.info(f"Fetching data from: {url}")
+    
     attempt = 0
     while attempt < retries:
         try:
             # Check file size first (HEAD request)
             logger.info(f"Checking file size... (Attempt {attempt + 1}/{retries})")
-            head_response = requests.head(url, timeout=NETWORK_TIMEOUT, allow_redirects=True)
+            file_size = check_file_size(url)
             
-            if 'content-length' in head_response.headers:
-                file_size = int(head_response.headers['content-length'])
-                file_size_gb = file_size / (1024 ** 3)
-                
-                logger.info(f"File size: {file_size_gb:.2f} GB")
-                
-                if file_size > MAX_FILE_SIZE_BYTES:
-                    raise ValueError(
-                        f"File too large: {file_size_gb:.2f} GB. "
-                        f"Maximum allowed: {MAX_FILE_SIZE_GB} GB"
-                    )
-                
-                if file_size_gb > 1:
-                    print(f"\n⚠️  WARNING: Large file detected ({file_size_gb:.2f} GB)")
-                    response = input("Continue? (yes/no): ").strip().lower()
-                    if response not in ['yes', 'y']:
-                        raise ValueError("Download cancelled by user")
+            if file_size and file_size > 1024 ** 3:
+                print(f"\n⚠️  WARNING: Large file detected ({file_size / 1024 ** 3:.2f} GB)")
+                print("   The whole file is loaded into memory; streaming mode loads it in chunks.")
+                response = input("Continue? (yes/no): ").strip().lower()
+                if response not in ['yes', 'y']:
+                    raise ValueError("Download cancelled by user")
             
             # Fetch CSV
             logger.info("Downloading CSV...")
@@ -295,6 +390,159 @@ def fetch_csv_from_url(url: str, retries: int = MAX_URL_RETRIES) -> pd.DataFrame
             raise ValueError(f"Malformed CSV file: {e}")
 
 
+def download_with_resume(url: str, dest: Optional[Path] = None, retries: int = MAX_URL_RETRIES,
+                         fresh: bool = False) -> Path:
+    """
+    Download a file to disk, resuming a partial download with an HTTP Range request.
+    
+    Bytes go to `<dest>.part` until the download is complete, so an
+    interrupted run (or a failed attempt) continues where it stopped.
+    
+    The server's ETag (or Last-Modified) is kept in `<dest>.validator`. A
+    complete or partial local copy is only used while the server still reports
+    the same validator, and resumes send it as If-Range, so a file that changed
+    on the server is downloaded again instead of being reused or spliced onto
+    the old bytes. Without a validator the file is always downloaded again.
+    
+    Args:
+        url: URL to download
+        dest: Local file (default: downloads/<file name from URL>)
+        retries: Number of attempts
+        fresh: Discard any earlier local copy (complete or partial) and download again
+        
+    Returns:
+        Path of the complete local file
+        
+    Raises:
+        ValueError: If URL is invalid, file too large or download incomplete
+        requests.RequestException: If network error occurs
+    """
+    expected_size, validator = check_remote_file(url)
+    
+    if dest is None:
+        DOWNLOAD_DIR.mkdir(exist_ok=True)
+        dest = DOWNLOAD_DIR / (Path(urlparse(url).path).name or "download.csv")
+    
+    part = dest.with_name(dest.name + ".part")
+    validator_file = dest.with_name(dest.name + ".validator")
+    stored_validator = validator_file.read_text() if validator_file.exists() else None
+    
+    if fresh or validator is None or validator != stored_validator:
+        # The local copies may be of another version of the file
+        if dest.exists() or part.exists():
+            if fresh:
+                logger.info(f"Discarding earlier download of {dest.name}")
+            else:
+                reason = "has no ETag or Last-Modified" if validator is None else "changed on the server"
+                logger.info(f"File {reason}; downloading it again")
+        dest.unlink(missing_ok=True)
+        part.unlink(missing_ok=True)
+        validator_file.unlink(missing_ok=True)
+    elif dest.exists() and (expected_size is None or dest.stat().st_size == expected_size):
+        logger.info(f"Using downloaded file: {dest}")
+        return dest
+    
+    for attempt in range(retries):
+        # Without a validator a partial file can't be checked, so it is never resumed
+        offset = part.stat().st_size if part.exists() and validator else 0
+        
+        # identity encoding so the byte offsets match the file on the server
+        headers = {'Accept-Encoding': 'identity'}
+        if offset:
+            # If-Range: the server sends the whole file (200) instead if it changed since
+            headers['Range'] = f"bytes={offset}-"
+            headers['If-Range'] = validator
+            logger.info(f"Resuming download at {offset:,} bytes")
+        
+        try:
+            with requests.get(url, headers=headers, stream=True, timeout=NETWORK_TIMEOUT) as response:
+                if offset and response.status_code == 416:
+                    # Range starts at the end: the partial file is already complete
+                    break
+                response.raise_for_status()
+                
+                if offset and response.status_code != 206:
+                    logger.warning("File changed or server ignored the Range request; downloading from the start")
+                    offset = 0
+                
+                if not offset:
+                    # Record the version being downloaded before any of its bytes
+                    validator = download_validator(response.headers) or validator
+                    if validator:
+                        validator_file.write_text(validator)
+                    else:
+                        validator_file.unlink(missing_ok=True)
+                
+                with open(part, 'ab' if offset else 'wb') as f:
+                    for block in response.iter_content(DOWNLOAD_BLOCK_BYTES):
+                        f.write(block)
+            break
+        
+        except requests.RequestException as e:
+            if attempt < retries - 1:
+                logger.warning(f"Download interrupted: {e}. Retrying...")
+            else:
+                logger.error(f"Download failed after {retries} attempts; rerun to resume")
+                raise
+    
+    downloaded = part.stat().st_size
+    if expected_size is not None and downloaded != expected_size:
+        raise ValueError(f"Incomplete download: {downloaded:,} of {expected_size:,} bytes; rerun to resume")
+    
+    part.replace(dest)
+    logger.info(f"✓ Downloaded {downloaded:,} bytes to {dest}")
+    return dest
+
+
+def stream_csv_chunks(url: str, chunksize: int = STREAM_CHUNK_ROWS,
+                      retries: int = MAX_URL_RETRIES) -> Iterable[pd.DataFrame]:
+    """
+    Stream a CSV from URL as DataFrames of `chunksize` rows.
+    
+    The response body is parsed as it downloads, so memory stays bounded by
+    the chunk size rather than the file size (pd.read_csv(url) buffers the
+    whole download first).
+    
+    Args:
+        url: URL to CSV file
+        chunksize: Rows per chunk
+        retries: Number of attempts to open the download
+        
+    Yields:
+        Pandas DataFrames (row index continues across chunks)
+        
+    Raises:
+        ValueError: If URL is invalid, file too large or CSV malformed
+        requests.RequestException: If network error occurs
+    """
+    logger.info(f"Streaming data from: {url} ({chunksize:,} rows per chunk)")
+    check_file_size(url)
+    
+    for attempt in range(retries):
+        try:
+            response = requests.get(url, stream=True, timeout=NETWORK_TIMEOUT)
+            response.raise_for_status()
+            break
+        except requests.RequestException as e:
+            if attempt < retries - 1:
+                logger.warning(f"Network error: {e}. Retrying...")
+            else:
+                logger.error(f"Failed after {retries} attempts")
+                raise
+    
+    # Let urllib3 undo any Content-Encoding (gzip) while reading
+    response.raw.decode_content = True
+    
+    try:
+        with pd.read_csv(response.raw, chunksize=chunksize) as reader:
+            yield from reader
+    except pd.errors.ParserError as e:
+        logger.error(f"CSV parsing error: {e}")
+        raise ValueError(f"Malformed CSV file: {e}")
+    finally:
+        response.close()
+
+
 def preview_and_clean_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, str]]:
     """
     Preview data and clean column names.
@@ -354,6 +602,10 @@ def validate_data(df: pd.DataFrame) -> pd.DataFrame:
     """
     Run BC-specific validations on the data and optionally remove problematic rows.
     
+    All rules are evaluated up front as boolean masks (see
+    compute_validation_masks()); removals are combined into one mask and
+    applied once.
+    
     Args:
         df: DataFrame to validate
         
@@ -364,63 +616,50 @@ def validate_data(df: pd.DataFrame) -> pd.DataFrame:
     print("DATA VALIDATION")
     print("=" * 80)
     
-    rows_to_remove = set()  # Track all problematic row indices
+    validation = compute_validation_masks(df)
+    columns = validation['columns']
+    masks = validation['masks']
+    name_col = columns['name'] or df.columns[0]
+    
+    print_violations_report(validation, len(df))
     
     # ========================================================================
     # AUTO-REMOVAL: Rows with BOTH name AND address null
     # ========================================================================
-    missing_both = identify_missing_name_address(df)
+    if not (columns['name'] and columns['address']):
+        logger.warning("Could not identify name or address columns for validation")
+    
+    rows_to_remove = masks['missing_name_address'].copy()
+    missing_both = int(rows_to_remove.sum())
     if missing_both:
-        print(f"\n⚠️  AUTO-REMOVING: {len(missing_both)} rows with BOTH name AND address missing")
-        logger.warning(f"Auto-removing {len(missing_both)} rows with missing name AND address")
-        rows_to_remove.update(missing_both)
+        print(f"\n⚠️  AUTO-REMOVING: {missing_both} rows with BOTH name AND address missing")
+        logger.warning(f"Auto-removing {missing_both} rows with missing name AND address")
     
     # ========================================================================
     # Coordinate validation
     # ========================================================================
-    coord_results = validate_bc_coordinates(df)
-    if coord_results['has_coords']:
-        print(f"\n✓ Found coordinate columns: '{coord_results['lat_col']}', '{coord_results['lon_col']}'")
-        print(f"  Total rows with coordinates: {coord_results['total_with_coords']}")
+    if validation['has_coords']:
+        lat_col, lon_col = columns['lat'], columns['lon']
+        coord_problems = masks['null_coords'] | masks['outside_bc']
+        total_problems = int(coord_problems.sum())
+        
+        print(f"\n✓ Found coordinate columns: '{lat_col}', '{lon_col}'")
+        print(f"  Total rows with coordinates: {len(df) - int(masks['null_coords'].sum())}")
         
-        # Show problems
-        total_problems = coord_results['total_problems']
         if total_problems > 0:
             print(f"\n  ⚠️  COORDINATE PROBLEMS DETECTED: {total_problems} rows")
-            print(f"     - {len(coord_results['null_coords'])} with null/invalid coordinates")
-            print(f"     - {len(coord_results['outside_bc'])} outside BC boundaries")
+            print(f"     - {int(masks['null_coords'].sum())} with null/invalid coordinates")
+            print(f"     - {int(masks['outside_bc'].sum())} outside BC boundaries")
             print(f"     BC bounds: Lat [{BC_LAT_MIN}, {BC_LAT_MAX}], Lon [{BC_LON_MIN}, {BC_LON_MAX}]")
             
-            # Find name column for display
-            name_cols = [col for col in df.columns if any(keyword in col.lower() 
-                         for keyword in ['name', 'facility', 'school', 'site'])]
-            name_col = name_cols[0] if name_cols else df.columns[0]
-            
-            # Show problematic facilities
-            problem_indices = coord_results['null_coords'] + coord_results['outside_bc']
-            
             print(f"\n  Facilities with coordinate problems (showing up to 20):")
-            print("  " + "-" * 76)
-            for idx in problem_indices[:20]:
-                facility_name = df.loc[idx, name_col]
-                lat_val = df.loc[idx, coord_results['lat_col']]
-                lon_val = df.loc[idx, coord_results['lon_col']]
-                
-                if pd.isna(lat_val) or pd.isna(lon_val):
-                    issue = "NULL coordinates"
-                else:
-                    issue = f"Outside BC (lat={lat_val}, lon={lon_val})"
-                
-                print(f"  [{idx}] {facility_name} - {issue}")
-            
-            if len(problem_indices) > 20:
-                print(f"  ... and {len(problem_indices) - 20} more")
+            print_violation_examples(df, coord_problems, [name_col, lat_col, lon_col], 20)
             
             # Ask user if they want to remove
             print("\n" + "-" * 80)
             response = input(f"Remove these {total_problems} rows with coordinate problems? (yes/no): ").strip().lower()
             if response in ['yes', 'y']:
-                rows_to_remove.update(problem_indices)
+                rows_to_remove |= coord_problems
                 logger.info(f"User opted to remove {total_problems} rows with coordinate problems")
                 print(f"  ✓ Will remove {total_problems} rows")
             else:
@@ -434,44 +673,31 @@ def validate_data(df: pd.DataFrame) -> pd.DataFrame:
     # ========================================================================
     # Capacity validation
     # ========================================================================
-    capacity_results = validate_capacity(df)
-    if capacity_results['has_capacity']:
-        print(f"\n✓ Found capacity column: '{capacity_results['capacity_col']}'")
-        print(f"  Total rows with capacity: {capacity_results['total_with_capacity']}")
-        print(f"  Range: {capacity_results['min_capacity']} - {capacity_results['max_capacity']}")
-        
-        if capacity_results['unreasonable_count'] > 0:
-            print(f"\n  ⚠️  WARNING: {capacity_results['unreasonable_count']} unreasonable capacity values")
+    if validation['has_capacity']:
+        capacity_col = columns['capacity']
+        capacity = validation['capacity']
+        unreasonable = masks['unreasonable_capacity']
+        unreasonable_count = int(unreasonable.sum())
+        
+        print(f"\n✓ Found capacity column: '{capacity_col}'")
+        print(f"  Total rows with capacity: {int(capacity.notna().sum())}")
+        if capacity.notna().any():
+            print(f"  Range: {int(capacity.min())} - {int(capacity.max())}")
+        
+        if unreasonable_count > 0:
+            print(f"\n  ⚠️  WARNING: {unreasonable_count} unreasonable capacity values")
             print(f"     (negative or > {MAX_REASONABLE_CAPACITY})")
             
-            # Show problematic facilities
-            capacity_col = capacity_results['capacity_col']
-            capacity_numeric = pd.to_numeric(df[capacity_col], errors='coerce')
-            unreasonable = (capacity_numeric > MAX_REASONABLE_CAPACITY) | (capacity_numeric < 0)
-            unreasonable_indices = df[unreasonable & capacity_numeric.notna()].index.tolist()
-            
-            # Find name column
-            name_cols = [col for col in df.columns if any(keyword in col.lower() 
-                         for keyword in ['name', 'facility', 'school', 'site'])]
-            name_col = name_cols[0] if name_cols else df.columns[0]
-            
             print(f"\n  Facilities with unreasonable capacity (showing up to 10):")
-            print("  " + "-" * 76)
-            for idx in unreasonable_indices[:10]:
-                facility_name = df.loc[idx, name_col]
-                capacity_val = df.loc[idx, capacity_col]
-                print(f"  [{idx}] {facility_name} - Capacity: {capacity_val}")
-            
-            if len(unreasonable_indices) > 10:
-                print(f"  ... and {len(unreasonable_indices) - 10} more")
+            print_violation_examples(df, unreasonable, [name_col, capacity_col], 10)
             
             # Ask user if they want to remove
             print("\n" + "-" * 80)
-            response = input(f"Remove these {capacity_results['unreasonable_count']} rows with unreasonable capacity? (yes/no): ").strip().lower()
+            response = input(f"Remove these {unreasonable_count} rows with unreasonable capacity? (yes/no): ").strip().lower()
             if response in ['yes', 'y']:
-                rows_to_remove.update(unreasonable_indices)
-                logger.info(f"User opted to remove {capacity_results['unreasonable_count']} rows with unreasonable capacity")
-                print(f"  ✓ Will remove {capacity_results['unreasonable_count']} rows")
+                rows_to_remove |= unreasonable
+                logger.info(f"User opted to remove {unreasonable_count} rows with unreasonable capacity")
+                print(f"  ✓ Will remove {unreasonable_count} rows")
             else:
                 logger.info("User opted to keep rows with unreasonable capacity")
                 print(f"  ℹ️  Keeping problematic rows")
@@ -481,9 +707,9 @@ def validate_data(df: pd.DataFrame) -> pd.DataFrame:
     # ========================================================================
     # Apply removals
     # ========================================================================
-    if rows_to_remove:
+    if rows_to_remove.any():
         original_count = len(df)
-        df_cleaned = df.drop(index=list(rows_to_remove)).reset_index(drop=True)
+        df_cleaned = df[~rows_to_remove].reset_index(drop=True)
         removed_count = original_count - len(df_cleaned)
         
         print("\n" + "=" * 80)
@@ -501,6 +727,103 @@ def validate_data(df: pd.DataFrame) -> pd.DataFrame:
         return df
 
 
+def clean_chunk(
+    chunk: pd.DataFrame,
+    column_mapping: Dict[str, str],
+    remove_coord_problems: bool = False,
+    remove_capacity_problems: bool = False
+) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Non-interactive column cleaning and validation for one streamed chunk.
+    
+    Applies the same rules as validate_data(), with the remove/keep choices
+    made once up front instead of prompted per chunk.
+    
+    Args:
+        chunk: Raw chunk (original column names)
+        column_mapping: Original to cleaned column names
+        remove_coord_problems: Drop rows with null or out-of-BC coordinates
+        remove_capacity_problems: Drop rows with unreasonable capacity
+        
+    Returns:
+        Tuple of (cleaned chunk, removed row counts per rule)
+    """
+    chunk = chunk.rename(columns=column_mapping)
+    masks = compute_validation_masks(chunk)['masks']
+    
+    # Rows with BOTH name AND address null are always removed
+    rows_to_remove = masks['missing_name_address']
+    removed = {'missing_name_address': int(rows_to_remove.sum()), 'coordinates': 0, 'capacity': 0}
+    
+    if remove_coord_problems:
+        coord_problems = masks['null_coords'] | masks['outside_bc']
+        removed['coordinates'] = int(coord_problems.sum())
+        rows_to_remove = rows_to_remove | coord_problems
+    
+    if remove_capacity_problems:
+        removed['capacity'] = int(masks['unreasonable_capacity'].sum())
+        rows_to_remove = rows_to_remove | masks['unreasonable_capacity']
+    
+    if rows_to_remove.any():
+        chunk = chunk[~rows_to_remove]
+    
+    return chunk, removed
+
+
+def ensure_progress_table(conn: sqlite3.Connection):
+    """Create the table that tracks resumable loads, if needed."""
+    with conn:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {PROGRESS_TABLE} (
+                table_name TEXT PRIMARY KEY,
+                source TEXT,
+                options TEXT,
+                rows_read INTEGER,
+                rows_inserted INTEGER,
+                chunks INTEGER,
+                completed INTEGER,
+                updated_at TEXT
+            )
+        """)
+
+
+def get_progress(conn: sqlite3.Connection, table_name: str) -> Optional[Dict]:
+    """
+    Look up the load progress recorded for a table.
+    
+    Returns:
+        Progress record as a dict (options decoded), or None if never checkpointed
+    """
+    ensure_progress_table(conn)
+    cursor = conn.execute(f"SELECT * FROM {PROGRESS_TABLE} WHERE table_name = ?", (table_name,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    
+    progress = dict(zip([col[0] for col in cursor.description], row))
+    progress['options'] = json.loads(progress['options'] or '{}')
+    return progress
+
+
+def save_progress(conn: sqlite3.Connection, table_name: str, **fields):
+    """
+    Insert or update a table's load progress.
+    
+    Runs in the caller's transaction, so call it in the same `with conn:`
+    block as the insert it records.
+    """
+    fields['updated_at'] = datetime.now().isoformat(timespec='seconds')
+    columns = ', '.join(fields)
+    placeholders = ', '.join('?' * len(fields))
+    updates = ', '.join(f"{col} = excluded.{col}" for col in fields)
+    
+    conn.execute(
+        f"INSERT INTO {PROGRESS_TABLE} (table_name, {columns}) VALUES (?, {placeholders}) "
+        f"ON CONFLICT(table_name) DO UPDATE SET {updates}",
+        (table_name, *fields.values())
+    )
+
+
 def get_type_overrides(df: pd.DataFrame) -> Dict[str, str]:
     """
     Interactively allow user to override data types.
@@ -542,6 +865,31 @@ def get_type_overrides(df: pd.DataFrame) -> Dict[str, str]:
     return overrides
 
 
+def get_index_columns(df: pd.DataFrame) -> List[str]:
+    """
+    Interactively choose columns to index once the data is loaded.
+    
+    Args:
+        df: DataFrame with cleaned column names
+        
+    Returns:
+        List of column names to index
+    """
+    print("\n" + "=" * 80)
+    print("INDEXES")
+    print("=" * 80)
+    print(f"Columns: {', '.join(df.columns)}")
+    
+    answer = input("Columns to index after loading (comma-separated, Enter for none): ").strip()
+    columns = [clean_column_name(col) for col in answer.split(',') if col.strip()]
+    
+    unknown = [col for col in columns if col not in df.columns]
+    if unknown:
+        print(f"  ℹ️  Skipping unknown columns: {', '.join(unknown)}")
+    
+    return [col for col in columns if col in df.columns]
+
+
 def generate_create_table_sql(df: pd.DataFrame, table_name: str, type_overrides: Dict[str, str]) -> str:
     """
     Generate CREATE TABLE SQL with type overrides.
@@ -565,17 +913,17 @@ def generate_create_table_sql(df: pd.DataFrame, table_name: str, type_overrides:
     return create_sql
 
 
-def create_and_populate_table(
+def create_table(
     df: pd.DataFrame,
     db_path: str,
     table_name: str,
     type_overrides: Dict[str, str]
 ) -> sqlite3.Connection:
     """
-    Create SQLite table and insert data.
+    Create an empty SQLite table for the DataFrame's columns.
     
     Args:
-        df: DataFrame to insert
+        df: DataFrame (only the columns are used)
         db_path: Database path
         table_name: Table name
         type_overrides: Type mapping
@@ -608,7 +956,8 @@ def create_and_populate_table(
         conn.close()
         raise ValueError(
             f"Table '{table_name}' already exists in '{db_path}'. "
-            f"Choose a different name or delete the existing table."
+            f"Choose a different name or delete the existing table "
+            f"(or use --resume for an interrupted resumable load)."
         )
     
     # Generate and execute CREATE TABLE
@@ -623,58 +972,1069 @@ def create_and_populate_table(
     conn.commit()
     logger.info(f"✓ Table '{table_name}' created successfully")
     
-    # Insert data
-    print("\n" + "=" * 80)
-    print("INSERTING DATA")
-    print("=" * 80)
+    return conn
+
+
+@contextmanager
+def bulk_load_pragmas(conn: sqlite3.Connection):
+    """
+    Tune SQLite for a bulk load: WAL journaling and synchronous=OFF until the
+    load finishes. The WAL is then checkpointed into the database file and the
+    previous journal mode and synchronous level are restored, so readers of the
+    file (e.g. the app's sites_db) see the same database they did before.
     
-    df.to_sql(table_name, conn, if_exists='append', index=False)
+    synchronous=OFF skips fsync on commit; a power loss mid-load can corrupt
+    the database, which is acceptable for a load that can simply be re-run.
     
-    rows_inserted = len(df)
-    logger.info(f"✓ Inserted {rows_inserted} rows")
-    print(f"✓ Successfully inserted {rows_inserted} rows")
+    Args:
+        conn: Database connection (no open transaction)
+    """
+    conn.commit()
+    previous_synchronous = conn.execute("PRAGMA synchronous").fetchone()[0]
+    previous_journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    journal_mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+    conn.execute("PRAGMA synchronous=OFF")
+    logger.info(f"Bulk load pragmas: journal_mode={journal_mode}, synchronous=OFF")
     
-    return conn
+    try:
+        yield
+    finally:
+        conn.commit()
+        conn.execute(f"PRAGMA synchronous={int(previous_synchronous)}")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        logger.info(f"Restored synchronous={previous_synchronous}")
+        
+        if journal_mode != previous_journal_mode:
+            try:
+                restored = conn.execute(f"PRAGMA journal_mode={previous_journal_mode}").fetchone()[0]
+                logger.info(f"Restored journal_mode={restored}")
+            except sqlite3.OperationalError as e:
+                # Leaving WAL needs the only connection to the database
+                logger.warning(f"Could not restore journal_mode={previous_journal_mode}: {e}")
 
 
-def verify_insertion(conn: sqlite3.Connection, table_name: str):
+def column_values_for_sqlite(series: pd.Series) -> list:
     """
-    Verify data was inserted correctly.
+    Convert a column to Python values sqlite3 can bind (None for missing).
+    
+    Plain numpy numeric columns convert directly; SQLite stores NaN as NULL.
+    """
+    if series.dtype.kind in 'iufb' and not pd.api.types.is_extension_array_dtype(series):
+        return series.tolist()
+    
+    if series.dtype.kind == 'M':
+        # Same text form to_sql() wrote for datetimes
+        series = series.dt.strftime('%Y-%m-%d %H:%M:%S')
+    
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def bulk_insert(
+    conn: sqlite3.Connection,
+    table_name: str,
+    df: pd.DataFrame,
+    batch_size: int = BULK_BATCH_ROWS
+) -> int:
+    """
+    Insert a DataFrame with executemany() in batches of `batch_size` rows.
+    
+    Runs in the caller's transaction (sqlite3 opens one on the first INSERT),
+    so wrap the call in `with conn:` to commit once at the end.
     
     Args:
         conn: Database connection
-        table_name: Table to verify
+        table_name: Existing table
+        df: Rows to insert (columns must match the table's)
+        batch_size: Rows converted and sent per executemany() call
+        
+    Returns:
+        Number of rows inserted
     """
-    print("\n" + "=" * 80)
-    print("VERIFICATION: Database Contents")
-    print("=" * 80)
+    columns = ', '.join(df.columns)
+    placeholders = ', '.join('?' * len(df.columns))
+    insert_sql = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
     
-    cursor = conn.cursor()
+    for start in range(0, len(df), batch_size):
+        batch = df.iloc[start:start + batch_size]
+        rows = zip(*[column_values_for_sqlite(batch[col]) for col in batch.columns])
+        conn.executemany(insert_sql, rows)
     
-    # Row count
-    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-    count = cursor.fetchone()[0]
-    print(f"\nTotal rows in table: {count}")
+    return len(df)
+
+
+def create_indexes(conn: sqlite3.Connection, table_name: str, columns: List[str]):
+    """
+    Create single-column indexes (done after loading, so rows aren't indexed one at a time).
     
-    # First 3 rows
-    cursor.execute(f"SELECT * FROM {table_name} LIMIT 3")
-    rows = cursor.fetchall()
+    Args:
+        conn: Database connection
+        table_name: Table to index
+        columns: Columns to index
+    """
+    with conn:
+        for col in columns:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_{col} ON {table_name} ({col})")
+            logger.info(f"✓ Created index idx_{table_name}_{col}")
+
+
+def find_coordinate_columns(columns: Iterable[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Find the latitude and longitude columns (lat/latitude, or a *_lat/*_latitude
+    name such as school_latitude; likewise for longitude).
     
-    # Get column names
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    columns = [col[1] for col in cursor.fetchall()]
+    Returns:
+        Tuple of (lat column, lon column), None where not found
+    """
+    columns = list(columns)
     
-    print("\nFirst 3 rows:")
-    print("-" * 80)
-    for row in rows:
-        print(dict(zip(columns, row)))
+    def first(names):
+        return next((col for col in columns
+                     if col.lower() in names or col.lower().endswith(tuple(f"_{name}" for name in names))), None)
     
-    logger.info(f"✓ Verification complete: {count} rows in table '{table_name}'")
+    return first(['lat', 'latitude']), first(['lon', 'long', 'longitude'])
+
+
+def create_spatial_index(
+    conn: sqlite3.Connection,
+    table_name: str,
+    lat_col: Optional[str] = None,
+    lon_col: Optional[str] = None
+) -> Optional[str]:
+    """
+    Build an R*Tree index over a table's coordinates, replacing any existing one.
+    
+    The R*Tree ({table}_rtree) holds one point box per row with valid
+    coordinates, keyed by the row's rowid. Triggers keep it in sync with
+    later inserts, coordinate updates and deletes. Rowids only change on a
+    VACUUM of a table without an INTEGER PRIMARY KEY, so rebuild the index
+    after a VACUUM. The table and columns are recorded in SPATIAL_INDEX_TABLE
+    for the bbox/radius helpers in db_query.py.
+    
+    Args:
+        conn: Database connection
+        table_name: Table to index
+        lat_col: Latitude column (detected if None)
+        lon_col: Longitude column (detected if None)
+        
+    Returns:
+        Name of the R*Tree table, or None if the table has no coordinate columns
+    """
+    cursor = conn.execute(f"PRAGMA table_info({table_name})")
+    detected_lat, detected_lon = find_coordinate_columns(col[1] for col in cursor.fetchall())
+    lat_col, lon_col = lat_col or detected_lat, lon_col or detected_lon
+    
+    if not lat_col or not lon_col:
+        logger.info(f"No coordinate columns in '{table_name}'; skipping spatial index")
+        return None
+    
+    rtree = f"{table_name}{SPATIAL_INDEX_SUFFIX}"
+    
+    # Only rows with numeric coordinates go in the index
+    has_point = (f"typeof({{row}}.{lat_col}) IN ('real', 'integer') "
+                 f"AND typeof({{row}}.{lon_col}) IN ('real', 'integer')")
+    
+    with conn:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {SPATIAL_INDEX_TABLE} (
+                table_name TEXT PRIMARY KEY,
+                rtree_name TEXT,
+                lat_col TEXT,
+                lon_col TEXT
+            )
+        """)
+        conn.execute(f"DROP TABLE IF EXISTS {rtree}")
+        conn.execute(f"CREATE VIRTUAL TABLE {rtree} USING rtree(id, min_lat, max_lat, min_lon, max_lon)")
+        conn.execute(
+            f"INSERT INTO {rtree} SELECT rowid, {lat_col}, {lat_col}, {lon_col}, {lon_col} "
+            f"FROM {table_name} WHERE {has_point.format(row=table_name)}"
+        )
+        
+        conn.execute(f"DROP TRIGGER IF EXISTS {rtree}_insert")
+        conn.execute(f"""
+            CREATE TRIGGER {rtree}_insert AFTER INSERT ON {table_name}
+            WHEN {has_point.format(row='NEW')}
+            BEGIN
+                INSERT INTO {rtree} VALUES (NEW.rowid, NEW.{lat_col}, NEW.{lat_col}, NEW.{lon_col}, NEW.{lon_col});
+            END
+        """)
+        conn.execute(f"DROP TRIGGER IF EXISTS {rtree}_update")
+        conn.execute(f"""
+            CREATE TRIGGER {rtree}_update AFTER UPDATE OF {lat_col}, {lon_col} ON {table_name}
+            BEGIN
+                DELETE FROM {rtree} WHERE id = OLD.rowid;
+                INSERT INTO {rtree}
+                    SELECT NEW.rowid, NEW.{lat_col}, NEW.{lat_col}, NEW.{lon_col}, NEW.{lon_col}
+                    WHERE {has_point.format(row='NEW')};
+            END
+        """)
+        conn.execute(f"DROP TRIGGER IF EXISTS {rtree}_delete")
+        conn.execute(f"""
+            CREATE TRIGGER {rtree}_delete AFTER DELETE ON {table_name}
+            BEGIN
+                DELETE FROM {rtree} WHERE id = OLD.rowid;
+            END
+        """)
+        
+        conn.execute(
+            f"INSERT OR REPLACE INTO {SPATIAL_INDEX_TABLE} VALUES (?, ?, ?, ?)",
+            (table_name, rtree, lat_col, lon_col)
+        )
+    
+    count = conn.execute(f"SELECT COUNT(*) FROM {rtree}").fetchone()[0]
+    logger.info(f"✓ Created spatial index {rtree} on ({lat_col}, {lon_col}): {count:,} points")
+    return rtree
+
+
+def drop_table(conn: sqlite3.Connection, table_name: str):
+    """Drop a table with its spatial index and load progress (runs in the caller's transaction)."""
+    conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+    conn.execute(f"DROP TABLE IF EXISTS {table_name}{SPATIAL_INDEX_SUFFIX}")
+    conn.execute(f"DELETE FROM {PROGRESS_TABLE} WHERE table_name = ?", (table_name,))
+    
+    registered = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (SPATIAL_INDEX_TABLE,)).fetchone()
+    if registered:
+        conn.execute(f"DELETE FROM {SPATIAL_INDEX_TABLE} WHERE table_name = ?", (table_name,))
+
+
+def print_timing_report(timings: Dict[str, float], rows: int):
+    """
+    Print and log how long each load phase took.
+    
+    Args:
+        timings: Phase name to seconds (should include 'total')
+        rows: Rows inserted
+    """
+    print("\n" + "=" * 80)
+    print("LOAD TIMING")
+    print("=" * 80)
+    for phase, seconds in timings.items():
+        print(f"  {phase:<24} {seconds:>9.2f} s")
+    
+    insert_seconds = timings.get('insert', 0)
+    if insert_seconds > 0:
+        print(f"  {'insert rate':<24} {rows / insert_seconds:>9,.0f} rows/s")
+    
+    logger.info(
+        "Load timing: " + ", ".join(f"{phase}={seconds:.2f}s" for phase, seconds in timings.items())
+        + f", rows={rows}"
+    )
+
+
+def create_and_populate_table(
+    df: pd.DataFrame,
+    db_path: str,
+    table_name: str,
+    type_overrides: Dict[str, str],
+    indexes: Optional[List[str]] = None
+) -> sqlite3.Connection:
+    """
+    Create SQLite table and bulk insert data.
+    
+    All rows go in with executemany() in one transaction under
+    bulk_load_pragmas(); indexes and the spatial index are created once
+    the rows are in.
+    
+    Args:
+        df: DataFrame to insert
+        db_path: Database path
+        table_name: Table name
+        type_overrides: Type mapping
+        indexes: Columns to index after loading
+        
+    Returns:
+        Database connection
+        
+    Raises:
+        ValueError: If table already exists
+    """
+    timings = {}
+    load_start = time.perf_counter()
+    
+    conn = create_table(df, db_path, table_name, type_overrides)
+    timings['create_table'] = time.perf_counter() - load_start
+    
+    # Insert data
+    print("\n" + "=" * 80)
+    print("INSERTING DATA")
+    print("=" * 80)
+    
+    with bulk_load_pragmas(conn):
+        start = time.perf_counter()
+        with conn:
+            rows_inserted = bulk_insert(conn, table_name, df)
+        timings['insert'] = time.perf_counter() - start
+        
+        if indexes:
+            start = time.perf_counter()
+            create_indexes(conn, table_name, indexes)
+            timings['index'] = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        if create_spatial_index(conn, table_name):
+            timings['spatial_index'] = time.perf_counter() - start
+    
+    timings['total'] = time.perf_counter() - load_start
+    
+    logger.info(f"✓ Inserted {rows_inserted} rows")
+    print(f"✓ Successfully inserted {rows_inserted} rows")
+    print_timing_report(timings, rows_inserted)
+    
+    return conn
+
+
+def ingest_chunks(
+    chunks: Iterable[pd.DataFrame],
+    db_path: str,
+    table_name: str,
+    column_mapping: Dict[str, str],
+    type_overrides: Optional[Dict[str, str]] = None,
+    remove_coord_problems: bool = False,
+    remove_capacity_problems: bool = False,
+    indexes: Optional[List[str]] = None,
+    checkpoint_source: Optional[str] = None,
+    chunksize: Optional[int] = None,
+    resume_progress: Optional[Dict] = None
+) -> Tuple[sqlite3.Connection, Dict[str, int]]:
+    """
+    Clean, validate and insert streamed chunks, one transaction per chunk.
+    
+    The table is created from the first chunk (types detected there unless
+    overridden). Only one chunk is held in memory at a time. Chunks are bulk
+    inserted under bulk_load_pragmas(); indexes and the spatial index are
+    created after the last one.
+    
+    With checkpoint_source, each chunk's transaction also records how many CSV
+    rows have been consumed in the progress table, so an interrupted load can
+    continue with resume_ingestion().
+    
+    Args:
+        chunks: Raw DataFrames, e.g. from stream_csv_chunks()
+        db_path: Database path
+        table_name: Table name
+        column_mapping: Original to cleaned column names
+        type_overrides: Column name to SQLite type mapping
+        remove_coord_problems: Drop rows with null or out-of-BC coordinates
+        remove_capacity_problems: Drop rows with unreasonable capacity
+        indexes: Columns to index after loading
+        checkpoint_source: Source URL to record progress under (None = no checkpoints)
+        chunksize: Rows per chunk (stored with the checkpoint for resuming)
+        resume_progress: Progress record of an interrupted load to continue
+            (the table already exists and `chunks` start after its rows)
+        
+    Returns:
+        Tuple of (database connection, summary counts for this run and 'timings')
+        
+    Raises:
+        ValueError: If table already exists (and not resuming)
+    """
+    conn = None
+    summary = {'chunks': 0, 'rows_read': 0, 'rows_inserted': 0,
+               'missing_name_address': 0, 'coordinates': 0, 'capacity': 0}
+    timings = {'create_table': 0.0, 'insert': 0.0}
+    load_start = time.perf_counter()
+    
+    # Totals from earlier runs of a resumed load
+    previous = resume_progress or {'rows_read': 0, 'rows_inserted': 0, 'chunks': 0}
+    
+    def checkpoint(**fields):
+        save_progress(
+            conn, table_name,
+            rows_read=previous['rows_read'] + summary['rows_read'],
+            rows_inserted=previous['rows_inserted'] + summary['rows_inserted'],
+            chunks=previous['chunks'] + summary['chunks'],
+            **fields
+        )
+    
+    try:
+        with ExitStack() as stack:
+            if resume_progress:
+                conn = sqlite3.connect(db_path)
+                stack.enter_context(bulk_load_pragmas(conn))
+                logger.info(f"Resuming '{table_name}' after {previous['rows_read']:,} CSV rows")
+            
+            for raw_chunk in chunks:
+                chunk, removed = clean_chunk(raw_chunk, column_mapping, remove_coord_problems, remove_capacity_problems)
+                
+                if conn is None:
+                    # First chunk: create the table from its columns and dtypes
+                    start = time.perf_counter()
+                    overrides = dict(type_overrides or {})
+                    for col_name, dtype in chunk.dtypes.items():
+                        overrides.setdefault(col_name, map_dtype_to_sqlite(dtype))
+                    conn = create_table(chunk, db_path, table_name, overrides)
+                    stack.enter_context(bulk_load_pragmas(conn))
+                    
+                    if checkpoint_source:
+                        # Everything needed to carry on with the same settings later
+                        options = {
+                            'column_mapping': column_mapping,
+                            'type_overrides': overrides,
+                            'remove_coord_problems': remove_coord_problems,
+                            'remove_capacity_problems': remove_capacity_problems,
+                            'indexes': indexes or [],
+                            'chunksize': chunksize or len(raw_chunk),
+                        }
+                        with conn:
+                            checkpoint(source=checkpoint_source, options=json.dumps(options), completed=0)
+                    timings['create_table'] = time.perf_counter() - start
+                
+                summary['chunks'] += 1
+                summary['rows_read'] += len(raw_chunk)
+                summary['rows_inserted'] += len(chunk)
+                for rule, count in removed.items():
+                    summary[rule] += count
+                
+                # One transaction per chunk (rows + checkpoint): committed on success, rolled back on error
+                start = time.perf_counter()
+                with conn:
+                    bulk_insert(conn, table_name, chunk)
+                    if checkpoint_source:
+                        checkpoint()
+                timings['insert'] += time.perf_counter() - start
+                
+                logger.info(
+                    f"Chunk {summary['chunks']}: inserted {len(chunk):,} of {len(raw_chunk):,} rows "
+                    f"({previous['rows_inserted'] + summary['rows_inserted']:,} total)"
+                )
+            
+            if conn is not None and indexes:
+                start = time.perf_counter()
+                create_indexes(conn, table_name, indexes)
+                timings['index'] = time.perf_counter() - start
+            
+            if conn is not None:
+                start = time.perf_counter()
+                if create_spatial_index(conn, table_name):
+                    timings['spatial_index'] = time.perf_counter() - start
+            
+            if conn is not None and checkpoint_source:
+                with conn:
+                    checkpoint(completed=1)
+    except Exception:
+        if conn is not None:
+            conn.close()
+        raise
+    
+    if conn is None:
+        raise ValueError("CSV contained no rows")
+    
+    total = time.perf_counter() - load_start
+    timings['download_parse_validate'] = total - sum(timings.values())
+    timings['total'] = total
+    summary['timings'] = timings
+    print_timing_report(timings, summary['rows_inserted'])
+    
+    return conn, summary
+
+
+def ingest_csv_streaming(
+    url: str,
+    db_path: str,
+    table_name: str,
+    chunksize: int = STREAM_CHUNK_ROWS,
+    type_overrides: Optional[Dict[str, str]] = None,
+    remove_coord_problems: bool = False,
+    remove_capacity_problems: bool = False,
+    indexes: Optional[List[str]] = None
+) -> Tuple[sqlite3.Connection, Dict[str, int]]:
+    """
+    Stream a CSV from URL into a new SQLite table with bounded memory.
+    
+    Args:
+        url: URL to CSV file
+        db_path: Database path
+        table_name: Table name
+        chunksize: Rows per chunk
+        type_overrides: Column name to SQLite type mapping
+        remove_coord_problems: Drop rows with null or out-of-BC coordinates
+        remove_capacity_problems: Drop rows with unreasonable capacity
+        indexes: Columns to index after loading
+        
+    Returns:
+        Tuple of (database connection, summary counts)
+    """
+    chunks = stream_csv_chunks(url, chunksize)
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        raise ValueError("CSV contained no rows")
+    
+    column_mapping = {col: clean_column_name(col) for col in first_chunk.columns}
+    
+    return ingest_chunks(
+        chain([first_chunk], chunks), db_path, table_name, column_mapping,
+        type_overrides, remove_coord_problems, remove_capacity_problems, indexes
+    )
+
+
+def ingest_csv_resumable(
+    url: str,
+    db_path: str,
+    table_name: str,
+    chunksize: int = STREAM_CHUNK_ROWS,
+    type_overrides: Optional[Dict[str, str]] = None,
+    remove_coord_problems: bool = False,
+    remove_capacity_problems: bool = False,
+    indexes: Optional[List[str]] = None,
+    path: Optional[Path] = None
+) -> Tuple[sqlite3.Connection, Dict[str, int]]:
+    """
+    Download a CSV to disk (resumable) and load it in checkpointed chunks.
+    
+    If the table already has an unfinished checkpoint from the same URL, the
+    load continues from it instead (see resume_ingestion()).
+    
+    Args:
+        url: URL to CSV file
+        db_path: Database path
+        table_name: Table name
+        chunksize: Rows per chunk
+        type_overrides: Column name to SQLite type mapping
+        remove_coord_problems: Drop rows with null or out-of-BC coordinates
+        remove_capacity_problems: Drop rows with unreasonable capacity
+        indexes: Columns to index after loading
+        path: Local copy of the URL already downloaded (default: download_with_resume(url))
+        
+    Returns:
+        Tuple of (database connection, summary counts)
+    """
+    conn = sqlite3.connect(db_path)
+    progress = get_progress(conn, table_name)
+    conn.close()
+    
+    if progress and progress['source'] == url:
+        return resume_ingestion(db_path, table_name)
+    
+    path = path or download_with_resume(url)
+    
+    with pd.read_csv(path, chunksize=chunksize) as reader:
+        first_chunk = next(reader, None)
+        if first_chunk is None:
+            raise ValueError("CSV contained no rows")
+        
+        column_mapping = {col: clean_column_name(col) for col in first_chunk.columns}
+        
+        return ingest_chunks(
+            chain([first_chunk], reader), db_path, table_name, column_mapping,
+            type_overrides, remove_coord_problems, remove_capacity_problems, indexes,
+            checkpoint_source=url, chunksize=chunksize
+        )
+
+
+def resume_ingestion(db_path: str, table_name: str) -> Tuple[sqlite3.Connection, Dict[str, int]]:
+    """
+    Continue an interrupted resumable load from its last committed chunk.
+    
+    The download resumes (or is reused if complete), the CSV rows already
+    committed are skipped, and the remaining chunks are loaded with the
+    options stored at the start of the load.
+    
+    Args:
+        db_path: Database path
+        table_name: Table being loaded
+        
+    Returns:
+        Tuple of (database connection, summary counts for this run)
+        
+    Raises:
+        ValueError: If the table has no checkpoint
+    """
+    conn = sqlite3.connect(db_path)
+    progress = get_progress(conn, table_name)
+    
+    if progress is None:
+        conn.close()
+        raise ValueError(f"No resumable load recorded for '{table_name}' in '{db_path}'")
+    
+    if progress['completed']:
+        logger.info(f"✓ Load of '{table_name}' already completed ({progress['rows_inserted']:,} rows)")
+        return conn, {'chunks': 0, 'rows_read': 0, 'rows_inserted': 0,
+                      'missing_name_address': 0, 'coordinates': 0, 'capacity': 0}
+    conn.close()
+    
+    options = progress['options']
+    path = download_with_resume(progress['source'])
+    
+    # Skip the CSV rows already committed (row 0 is the header)
+    skip = progress['rows_read']
+    print(f"\nResuming '{table_name}' from CSV row {skip + 1:,} ({progress['rows_inserted']:,} rows already loaded)")
+    
+    with pd.read_csv(path, chunksize=options['chunksize'], skiprows=lambda i: 0 < i <= skip) as reader:
+        return ingest_chunks(
+            reader, db_path, table_name, options['column_mapping'], options['type_overrides'],
+            options['remove_coord_problems'], options['remove_capacity_problems'], options['indexes'],
+            checkpoint_source=progress['source'], chunksize=options['chunksize'],
+            resume_progress=progress
+        )
+
+
+def verify_insertion(conn: sqlite3.Connection, table_name: str):
+    """
+    Verify data was inserted correctly.
+    
+    Args:
+        conn: Database connection
+        table_name: Table to verify
+    """
+    print("\n" + "=" * 80)
+    print("VERIFICATION: Database Contents")
+    print("=" * 80)
+    
+    cursor = conn.cursor()
+    
+    # Row count
+    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+    count = cursor.fetchone()[0]
+    print(f"\nTotal rows in table: {count}")
+    
+    # First 3 rows
+    cursor.execute(f"SELECT * FROM {table_name} LIMIT 3")
+    rows = cursor.fetchall()
+    
+    # Get column names
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    columns = [col[1] for col in cursor.fetchall()]
+    
+    print("\nFirst 3 rows:")
+    print("-" * 80)
+    for row in rows:
+        print(dict(zip(columns, row)))
+    
+    logger.info(f"✓ Verification complete: {count} rows in table '{table_name}'")
+
+
+# ============================================================================
+# BATCH MODE
+# ============================================================================
+
+BATCH_DEFAULTS = {
+    'database': 'bc_assets.db',
+    'download_workers': 4,
+    'parse_workers': 2,
+    'if_exists': 'fail',
+    'chunksize': STREAM_CHUNK_ROWS,
+}
+
+DATASET_DEFAULTS = {
+    'remove_coord_problems': False,
+    'remove_capacity_problems': False,
+    'indexes': [],
+    'types': {},
+    'columns': {},
+    'resumable': False,
+}
+
+IF_EXISTS_CHOICES = ('fail', 'skip', 'replace')
+
+
+def load_batch_config(path: str) -> Dict:
+    """
+    Read a TOML batch config and fill in defaults.
+    
+    Top-level keys: database, download_workers, parse_workers, if_exists
+    (fail/skip/replace), chunksize. Each [datasets.<name>] table needs a url;
+    optional keys are table (default <name>), remove_coord_problems,
+    remove_capacity_problems, indexes, types ({column = "INTEGER"}),
+    columns (constant values added to every row, e.g. property_type) and
+    resumable (always use the checkpointed loader).
+    
+    Args:
+        path: Config file path
+        
+    Returns:
+        Config dict with a 'datasets' dict of per-dataset settings
+        
+    Raises:
+        ValueError: If the config is invalid
+    """
+    with open(path, 'rb') as f:
+        config = tomllib.load(f)
+    
+    config = {**BATCH_DEFAULTS, **config}
+    
+    if config['if_exists'] not in IF_EXISTS_CHOICES:
+        raise ValueError(f"if_exists must be one of {IF_EXISTS_CHOICES}, got '{config['if_exists']}'")
+    
+    datasets = config.get('datasets') or {}
+    if not datasets:
+        raise ValueError(f"No [datasets.<name>] sections in {path}")
+    
+    downloads = {}
+    for name, dataset in datasets.items():
+        if 'url' not in dataset:
+            raise ValueError(f"Dataset '{name}' has no url")
+        
+        # Downloads are saved under their URL's file name, so two datasets can't share one
+        file_name = Path(urlparse(dataset['url']).path).name
+        if file_name in downloads:
+            raise ValueError(f"Datasets '{downloads[file_name]}' and '{name}' both download to {file_name}")
+        downloads[file_name] = name
+        
+        datasets[name] = {**DATASET_DEFAULTS, **dataset, 'name': name}
+        datasets[name]['table'] = clean_column_name(dataset.get('table', name))
+        datasets[name]['indexes'] = [clean_column_name(col) for col in datasets[name]['indexes']]
+        datasets[name]['types'] = {clean_column_name(col): t.upper() for col, t in datasets[name]['types'].items()}
+        datasets[name]['columns'] = {clean_column_name(col): v for col, v in datasets[name]['columns'].items()}
+    
+    return config
+
+
+def table_exists(conn: sqlite3.Connection, table_name: str) -> bool:
+    """Check whether a table exists."""
+    cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+    return cursor.fetchone() is not None
+
+
+def parse_dataset(path: str, remove_coord_problems: bool, remove_capacity_problems: bool) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Process pool task: read, clean and validate one downloaded CSV.
+    
+    Args:
+        path: Local CSV file
+        remove_coord_problems: Drop rows with null or out-of-BC coordinates
+        remove_capacity_problems: Drop rows with unreasonable capacity
+        
+    Returns:
+        Tuple of (cleaned DataFrame, stats with rows_read, removed counts and parse seconds)
+    """
+    start = time.perf_counter()
+    df = pd.read_csv(path)
+    
+    column_mapping = {col: clean_column_name(col) for col in df.columns}
+    cleaned, removed = clean_chunk(df, column_mapping, remove_coord_problems, remove_capacity_problems)
+    
+    stats = {'rows_read': len(df), **removed, 'parse_seconds': time.perf_counter() - start}
+    return cleaned.reset_index(drop=True), stats
+
+
+def add_constant_columns(conn: sqlite3.Connection, table_name: str, columns: Dict[str, object]):
+    """
+    Add columns holding one value for every row (what populate_db.py does interactively).
+    
+    Args:
+        conn: Database connection
+        table_name: Table to update
+        columns: Column name to value
+    """
+    if not columns:
+        return
+    
+    cursor = conn.execute(f"PRAGMA table_info({table_name})")
+    existing = {col[1] for col in cursor.fetchall()}
+    
+    with conn:
+        for col, value in columns.items():
+            if col not in existing:
+                sqlite_type = 'INTEGER' if isinstance(value, (bool, int)) else 'REAL' if isinstance(value, float) else 'TEXT'
+                conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {col} {sqlite_type}")
+            conn.execute(f"UPDATE {table_name} SET {col} = ?", (value,))
+    
+    logger.info(f"Set constant columns on '{table_name}': {', '.join(columns)}")
+
+
+def write_dataset(db_path: str, dataset: Dict, df: Optional[pd.DataFrame] = None,
+                  chunksize: int = STREAM_CHUNK_ROWS, path: Optional[Path] = None) -> Dict[str, int]:
+    """
+    Load one dataset into SQLite. Only ever called from the batch's main thread,
+    so writes to the database are serialized.
+    
+    With a parsed DataFrame it is bulk loaded into a new table; without one,
+    the downloaded file goes through the checkpointed chunk loader (resuming an
+    unfinished load of the same URL).
+    
+    Args:
+        db_path: Database path
+        dataset: Dataset settings from load_batch_config()
+        df: Parsed and cleaned rows, or None for the chunked loader
+        chunksize: Rows per chunk for the chunked loader
+        path: Downloaded file for the chunked loader (a resumed load uses its own)
+        
+    Returns:
+        Load counts (rows_read and removed counts only for the chunked loader)
+    """
+    table_name = dataset['table']
+    constant_columns = dataset['columns']
+    
+    # Indexes on constant columns are created after those columns are added
+    load_indexes = [col for col in dataset['indexes'] if col not in constant_columns]
+    later_indexes = [col for col in dataset['indexes'] if col in constant_columns]
+    
+    conn = sqlite3.connect(db_path)
+    progress = get_progress(conn, table_name)
+    resuming = progress is not None and not progress['completed'] and progress['source'] == dataset['url']
+    
+    # if_exists=fail/skip were handled before downloading; here the table is being replaced
+    if table_exists(conn, table_name) and not (resuming and df is None):
+        logger.info(f"Replacing table '{table_name}'")
+        with conn:
+            drop_table(conn, table_name)
+    conn.close()
+    
+    if df is not None:
+        overrides = {col: map_dtype_to_sqlite(dtype) for col, dtype in df.dtypes.items()}
+        overrides.update(dataset['types'])
+        conn = create_and_populate_table(df, db_path, table_name, overrides, load_indexes)
+        counts = {'rows_inserted': len(df)}
+    else:
+        conn, counts = ingest_csv_resumable(
+            dataset['url'], db_path, table_name, chunksize, dataset['types'],
+            dataset['remove_coord_problems'], dataset['remove_capacity_problems'], load_indexes,
+            path=path
+        )
+        counts = {key: value for key, value in counts.items() if key != 'timings'}
+    
+    try:
+        add_constant_columns(conn, table_name, constant_columns)
+        if later_indexes:
+            create_indexes(conn, table_name, later_indexes)
+    finally:
+        conn.close()
+    
+    return counts
+
+
+def run_batch(config: Dict) -> List[Dict]:
+    """
+    Ingest every dataset in a batch config without prompts.
+    
+    Downloads run in a thread pool and CSV parsing/validation in a process
+    pool; each dataset is written to SQLite from this thread as soon as it
+    is ready, so writes never overlap. Files over STREAMING_THRESHOLD_BYTES
+    (or marked resumable) skip the process pool and use the checkpointed
+    chunk loader instead, keeping memory bounded.
+    
+    Args:
+        config: Config from load_batch_config()
+        
+    Returns:
+        One result dict per dataset (status, counts, timings, error)
+    """
+    db_path = config['database']
+    datasets = config['datasets']
+    batch_start = time.perf_counter()
+    
+    results = {
+        name: {'dataset': name, 'table': dataset['table'], 'status': 'pending', 'rows_read': None,
+               'rows_removed': None, 'rows_inserted': None, 'download_seconds': None,
+               'parse_seconds': None, 'write_seconds': None, 'error': None}
+        for name, dataset in datasets.items()
+    }
+    
+    def fail(name, error):
+        results[name]['status'] = 'failed'
+        results[name]['error'] = str(error)
+        logger.error(f"[{name}] {error}")
+    
+    # Tables that already exist are skipped or fail up front (before any download),
+    # unless they hold an unfinished resumable load of the same URL
+    conn = sqlite3.connect(db_path)
+    to_load = []
+    unfinished = {}
+    for name, dataset in datasets.items():
+        progress = get_progress(conn, dataset['table'])
+        unfinished[name] = progress is not None and not progress['completed'] and progress['source'] == dataset['url']
+        
+        if table_exists(conn, dataset['table']) and not unfinished[name] and config['if_exists'] != 'replace':
+            if config['if_exists'] == 'skip':
+                results[name]['status'] = 'skipped'
+                logger.info(f"[{name}] Table '{dataset['table']}' exists, skipping")
+            else:
+                fail(name, f"Table '{dataset['table']}' already exists (set if_exists = \"replace\" or \"skip\")")
+        else:
+            to_load.append(name)
+    conn.close()
+    
+    def download(name):
+        # Earlier downloads are only reused to finish an unfinished load of the same file;
+        # every other load (including replacing a table) starts from a fresh copy
+        start = time.perf_counter()
+        path = download_with_resume(datasets[name]['url'], fresh=not unfinished[name])
+        return path, time.perf_counter() - start
+    
+    def write(name, df=None, path=None):
+        start = time.perf_counter()
+        try:
+            counts = write_dataset(db_path, datasets[name], df, config['chunksize'], path)
+        except Exception as e:
+            fail(name, e)
+            return
+        finally:
+            results[name]['write_seconds'] = time.perf_counter() - start
+        
+        results[name]['status'] = 'ok'
+        results[name]['rows_inserted'] = counts['rows_inserted']
+        if 'rows_read' in counts:
+            results[name]['rows_read'] = counts['rows_read']
+            results[name]['rows_removed'] = counts['rows_read'] - counts['rows_inserted']
+        logger.info(f"[{name}] ✓ Loaded {counts['rows_inserted']:,} rows into '{datasets[name]['table']}'")
+    
+    with ThreadPoolExecutor(max_workers=config['download_workers']) as downloads, \
+            ProcessPoolExecutor(max_workers=config['parse_workers']) as parsers:
+        
+        futures = {downloads.submit(download, name): ('download', name) for name in to_load}
+        
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                stage, name = futures.pop(future)
+                dataset = datasets[name]
+                
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    fail(name, f"{stage} failed: {e}")
+                    continue
+                
+                if stage == 'download':
+                    path, results[name]['download_seconds'] = outcome
+                    
+                    if dataset['resumable'] or path.stat().st_size > STREAMING_THRESHOLD_BYTES:
+                        # Large file: parsed chunk by chunk while writing
+                        write(name, path=path)
+                    else:
+                        parse = parsers.submit(parse_dataset, str(path), dataset['remove_coord_problems'],
+                                               dataset['remove_capacity_problems'])
+                        futures[parse] = ('parse', name)
+                else:
+                    df, stats = outcome
+                    results[name]['rows_read'] = stats['rows_read']
+                    results[name]['rows_removed'] = stats['rows_read'] - len(df)
+                    results[name]['parse_seconds'] = stats['parse_seconds']
+                    write(name, df)
+    
+    print_batch_summary(list(results.values()), time.perf_counter() - batch_start, db_path)
+    return list(results.values())
+
+
+def print_batch_summary(results: List[Dict], seconds: float, db_path: str):
+    """
+    Print and log one report for a batch run.
+    
+    Args:
+        results: Per-dataset results from run_batch()
+        seconds: Wall clock time of the batch
+        db_path: Database path
+    """
+    def number(value):
+        return f"{value:,}" if value is not None else "-"
+    
+    def duration(value):
+        return f"{value:.1f}" if value is not None else "-"
+    
+    print("\n" + "=" * 100)
+    print(f"BATCH SUMMARY: {db_path}")
+    print("=" * 100)
+    print(f"{'dataset':<16} {'table':<16} {'status':<8} {'read':>10} {'removed':>9} {'inserted':>10} "
+          f"{'download s':>11} {'parse s':>8} {'write s':>8}")
+    print("-" * 100)
+    
+    for r in results:
+        print(f"{r['dataset']:<16} {r['table']:<16} {r['status']:<8} {number(r['rows_read']):>10} "
+              f"{number(r['rows_removed']):>9} {number(r['rows_inserted']):>10} "
+              f"{duration(r['download_seconds']):>11} {duration(r['parse_seconds']):>8} {duration(r['write_seconds']):>8}")
+    
+    statuses = [r['status'] for r in results]
+    print("-" * 100)
+    print(f"{len(results)} datasets: {statuses.count('ok')} ok, {statuses.count('skipped')} skipped, "
+          f"{statuses.count('failed')} failed in {seconds:.1f} s")
+    
+    for r in results:
+        if r['error']:
+            print(f"  ❌ {r['dataset']}: {r['error']}")
+    
+    print(f"Log: {log_file}")
+    logger.info(f"Batch finished: {statuses.count('ok')} ok, {statuses.count('skipped')} skipped, "
+                f"{statuses.count('failed')} failed in {seconds:.1f}s")
 
 
 # ============================================================================
-# MAIN ORCHESTRATION
-# ============================================================================
+# MAIN ORCHESTRATION
+# ============================================================================
+
+def ask_db_and_table_names() -> Tuple[str, str]:
+    """Prompt for the database file and table name."""
+    print("\n" + "=" * 80)
+    print("DATABASE & TABLE NAMES")
+    print("=" * 80)
+    
+    db_name = input("\nEnter database name (e.g., 'bc_facilities.db'): ").strip()
+    if not db_name.endswith('.db'):
+        db_name += '.db'
+    
+    table_name = input("Enter table name (e.g., 'schools'): ").strip()
+    table_name = clean_column_name(table_name)  # Clean table name too
+    
+    logger.info(f"Target: {db_name} / {table_name}")
+    return db_name, table_name
+
+
+def run_streaming_ingestion(url: str):
+    """
+    Interactive streaming mode: preview and choose options on the first
+    chunk, then load the whole file chunk by chunk.
+    """
+    # A local copy makes the load resumable: the download continues with a Range
+    # request and the inserts continue from the last committed chunk
+    resumable = input(
+        "Download to a local file first, so an interrupted load can be resumed? (yes/no): "
+    ).strip().lower() in ['yes', 'y']
+    
+    if resumable:
+        chunks = iter(pd.read_csv(download_with_resume(url), chunksize=STREAM_CHUNK_ROWS))
+    else:
+        chunks = stream_csv_chunks(url, STREAM_CHUNK_ROWS)
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        raise ValueError("CSV contained no rows")
+    
+    print(f"\nPreviewing the first chunk ({len(first_chunk):,} rows)")
+    first_cleaned, column_mapping = preview_and_clean_data(first_chunk)
+    
+    # Validation choices apply to every chunk, so they're made once here
+    print("\n" + "=" * 80)
+    print("DATA VALIDATION (applied to every chunk)")
+    print("=" * 80)
+    print("Rows with BOTH name AND address missing are always removed.")
+    remove_coord_problems = input(
+        f"Remove rows with null coordinates or outside BC "
+        f"(lat [{BC_LAT_MIN}, {BC_LAT_MAX}], lon [{BC_LON_MIN}, {BC_LON_MAX}])? (yes/no): "
+    ).strip().lower() in ['yes', 'y']
+    remove_capacity_problems = input(
+        f"Remove rows with negative or > {MAX_REASONABLE_CAPACITY} capacity? (yes/no): "
+    ).strip().lower() in ['yes', 'y']
+    
+    type_overrides = get_type_overrides(first_cleaned)
+    indexes = get_index_columns(first_cleaned)
+    db_name, table_name = ask_db_and_table_names()
+    
+    print("\n" + "=" * 80)
+    print("STREAMING DATA")
+    print("=" * 80)
+    
+    conn, summary = ingest_chunks(
+        chain([first_chunk], chunks), db_name, table_name, column_mapping,
+        type_overrides, remove_coord_problems, remove_capacity_problems, indexes,
+        checkpoint_source=url if resumable else None, chunksize=STREAM_CHUNK_ROWS
+    )
+    
+    verify_insertion(conn, table_name)
+    conn.close()
+    
+    print("\n" + "=" * 80)
+    print("✓ SUCCESS")
+    print("=" * 80)
+    print(f"Database: {db_name}")
+    print(f"Table: {table_name}")
+    print(f"Chunks: {summary['chunks']}")
+    print(f"Rows read: {summary['rows_read']}")
+    print(f"Rows removed: {summary['rows_read'] - summary['rows_inserted']} "
+          f"(missing name+address: {summary['missing_name_address']}, "
+          f"coordinates: {summary['coordinates']}, capacity: {summary['capacity']})")
+    print(f"Rows inserted: {summary['rows_inserted']}")
+    print(f"Log: {log_file}")
+    
+    logger.info("Streaming ingestion completed successfully")
+
 
 def main():
     """Main execution flow."""
@@ -691,6 +2051,16 @@ def main():
             url = input("\nEnter dataset URL: ").strip()
             
             try:
+                # Large files can be streamed in chunks instead of loaded whole
+                file_size = check_file_size(url)
+                if file_size is None or file_size > STREAMING_THRESHOLD_BYTES:
+                    size_text = f"{file_size / 1024 ** 2:,.0f} MB" if file_size else "unknown size"
+                    print(f"\nℹ️  File is {size_text}. Streaming mode loads it "
+                          f"{STREAM_CHUNK_ROWS:,} rows at a time with bounded memory.")
+                    if input("Use streaming mode? (yes/no): ").strip().lower() in ['yes', 'y']:
+                        run_streaming_ingestion(url)
+                        return
+                
                 df = fetch_csv_from_url(url, retries=1)
                 break
             except (ValueError, requests.RequestException) as e:
@@ -720,23 +2090,13 @@ def main():
         
         # Step 4: Type overrides
         type_overrides = get_type_overrides(df_cleaned)
+        indexes = get_index_columns(df_cleaned)
         
         # Step 5: Get database and table names
-        print("\n" + "=" * 80)
-        print("DATABASE & TABLE NAMES")
-        print("=" * 80)
-        
-        db_name = input("\nEnter database name (e.g., 'bc_facilities.db'): ").strip()
-        if not db_name.endswith('.db'):
-            db_name += '.db'
-        
-        table_name = input("Enter table name (e.g., 'schools'): ").strip()
-        table_name = clean_column_name(table_name)  # Clean table name too
-        
-        logger.info(f"Target: {db_name} / {table_name}")
+        db_name, table_name = ask_db_and_table_names()
         
         # Step 6: Create table and insert
-        conn = create_and_populate_table(df_cleaned, db_name, table_name, type_overrides)
+        conn = create_and_populate_table(df_cleaned, db_name, table_name, type_overrides, indexes)
         
         # Step 7: Verify
         verify_insertion(conn, table_name)
@@ -774,8 +2134,80 @@ def main():
         print(f"See log file for details: {log_file}")
 
 
+def run_resume(db_path: str, table_name: str):
+    """Resume an interrupted load from the command line."""
+    try:
+        conn, summary = resume_ingestion(db_path, table_name)
+        verify_insertion(conn, table_name)
+        conn.close()
+        print(f"\n✓ Resumed load complete: {summary['rows_inserted']:,} rows inserted this run")
+    except (ValueError, requests.RequestException) as e:
+        logger.error(f"Resume failed: {e}")
+        print(f"\n❌ Error: {e}")
+
+
+def run_spatial_index(db_path: str, table_name: str):
+    """Build (or rebuild) the spatial index of an existing table from the command line."""
+    conn = sqlite3.connect(db_path)
+    try:
+        if not table_exists(conn, table_name):
+            print(f"\n❌ Error: Table '{table_name}' not found in '{db_path}'")
+            return
+        
+        rtree = create_spatial_index(conn, table_name)
+        if rtree:
+            print(f"\n✓ Spatial index {rtree} ready")
+        else:
+            print(f"\n⚠️  No latitude/longitude columns found in '{table_name}'")
+    finally:
+        conn.close()
+
+
+def run_batch_cli(args: argparse.Namespace) -> int:
+    """Run batch mode from the command line; returns the exit status."""
+    try:
+        config = load_batch_config(args.config)
+    except (OSError, ValueError, tomllib.TOMLDecodeError) as e:
+        logger.error(f"Invalid config: {e}")
+        print(f"\n❌ Invalid config: {e}")
+        return 2
+    
+    if args.db:
+        config['database'] = args.db
+    if args.if_exists:
+        config['if_exists'] = args.if_exists
+    if args.only:
+        unknown = set(args.only) - set(config['datasets'])
+        if unknown:
+            print(f"\n❌ Unknown datasets: {', '.join(sorted(unknown))}")
+            return 2
+        config['datasets'] = {name: config['datasets'][name] for name in args.only}
+    
+    logger.info(f"Batch ingestion of {len(config['datasets'])} datasets into {config['database']}")
+    results = run_batch(config)
+    return 1 if any(r['status'] == 'failed' for r in results) else 0
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Ingest CSV datasets into SQLite (interactive by default)")
+    parser.add_argument('--config', help="TOML batch config: ingest every dataset in it without prompts")
+    parser.add_argument('--only', nargs='+', metavar='DATASET', help="with --config: only these datasets")
+    parser.add_argument('--db', help="with --config: override the database path")
+    parser.add_argument('--if-exists', choices=IF_EXISTS_CHOICES, help="with --config: override if_exists")
+    parser.add_argument('--resume', nargs=2, metavar=('DB', 'TABLE'),
+                        help="continue an interrupted resumable load")
+    parser.add_argument('--spatial-index', nargs=2, metavar=('DB', 'TABLE'),
+                        help="build the R*Tree spatial index of an existing table")
+    args = parser.parse_args()
+    
+    if args.config:
+        sys.exit(run_batch_cli(args))
+    elif args.resume:
+        run_resume(*args.resume)
+    elif args.spatial_index:
+        run_spatial_index(*args.spatial_index)
+    else:
+        main()
 
 # # daycare = "https://catalogue.data.gov.bc.ca/dataset/4cc207cc-ff03-44f8-8c5f-415af5224646/resource/9a9f14e1-03ea-4a11-936a-6e77b15eeb39/download/childcare_locations.csv"
 # schools = "https://catalogue.data.gov.bc.ca/dataset/95da1091-7e8c-4aa6-9c1b-5ab159ea7b42/resource/5832eff2-3380-435e-911b-5ada41c1d30b/download/bc_k12_schools_2024-10.csv"
\ No newline at end of file
@@ -1,7 +1,14 @@
 import sqlite3
+import sys
 import pandas as pd
 from pathlib import Path
 
+SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from sites_db import FACILITIES_TABLE, refresh_facilities
+
 def check_null_columns(df):
     """Check for columns that are entirely NULL and alert the user."""
     null_columns = []
@@ -20,6 +27,9 @@ def combine_schools_daycares(db_path, output_csv=None):
     """
     Combine schools and daycares tables into a single DataFrame.
     
+    Reads the facilities table, first refreshing whichever source was
+    reloaded since it was last materialized.
+    
     Parameters:
     -----------
     db_path : str
@@ -33,27 +43,17 @@ def combine_schools_daycares(db_path, output_csv=None):
         Combined DataFrame with unified column names
     """
     
-    # SQL query to union both tables with column renaming
-    query = """
-    SELECT 
-        school_name AS facility_name,
-        school_latitude AS lat,
-        school_longitude AS lon,
-        CAST(district_number AS INTEGER) AS max_capacity,
-        TRIM(street_address) || ', ' || TRIM(physical_address_city) || ', BC' AS full_address,
-        property_type
-    FROM schools
-    
-    UNION
-    
+    # The combined rows live in the materialized facilities table (see src/sites_db.py),
+    # kept current by triggers on schools and daycares, so this is a single table read
+    query = f"""
     SELECT 
-        facility_name,
-        latitude AS lat,
-        longitude AS lon,
-        CAST(total_spaces AS INTEGER) AS max_capacity,
-        TRIM(address) || ', ' || TRIM(city) || ', BC' AS full_address,
+        site_name AS facility_name,
+        lat,
+        lon,
+        max_capacity,
+        full_address,
         property_type
-    FROM daycares;
+    FROM {FACILITIES_TABLE};
     """
     
     try:
@@ -63,6 +63,7 @@ def combine_schools_daycares(db_path, output_csv=None):
         
         # Execute query and load into DataFrame
         print("Executing query and combining tables...")
+        refresh_facilities(conn)
         df = pd.read_sql_query(query, conn)
         
         # Close connection
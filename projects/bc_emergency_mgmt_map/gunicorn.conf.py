@@ -0,0 +1,65 @@
+"""
+Gunicorn configuration for the BC Emergency Management Dashboard.
+
+Run from the project root:
+    gunicorn -c gunicorn.conf.py
+
+Callbacks mostly wait on I/O (ArcGIS API, geocoder) or release the GIL in
+pandas/shapely, so each worker runs several threads. The app is preloaded so
+the initial data fetch and spatial join happen once in the master process and
+the workers share that memory copy-on-write after fork.
+
+Data is published to memory-mapped files under SHARED_DATA_DIR, so after a
+refresh in any worker the others load the same version from those files
+instead of keeping (and fetching) their own copy.
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+# src/ holds app.py and its sibling modules (utils, data_snapshot, ...)
+chdir = str(Path(__file__).resolve().parent / 'src')
+wsgi_app = 'app:server'
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8050')}"
+
+# Workers: WEB_CONCURRENCY if set (Render sets it per instance type), otherwise
+# a small multiple of the CPUs - each worker holds its own Python heap after a refresh
+workers = int(os.environ.get('WEB_CONCURRENCY', min(2 * multiprocessing.cpu_count() + 1, 4)))
+
+# Threads per worker for I/O-bound callbacks
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Load the app (and its startup data) once, before forking the workers
+preload_app = True
+
+# One data directory per server run (RAM-backed /dev/shm when available), set before the app is loaded
+_shm_dir = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+os.environ.setdefault('SHARED_DATA_DIR', os.path.join(_shm_dir, f'bc_emergency_map-{os.getpid()}'))
+
+
+# Refreshes run the spatial join in a process pool of this size (one process per available core)
+_cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+os.environ.setdefault('SPATIAL_JOIN_PROCESSES', str(_cores))
+
+
+def on_exit(server):
+    """Remove this run's shared data files"""
+    shutil.rmtree(os.environ['SHARED_DATA_DIR'], ignore_errors=True)
+
+# A refresh downloads the full alert layer and re-runs the spatial join
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers occasionally so a slow leak can't grow forever
+max_requests = 2000
+max_requests_jitter = 200
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info')
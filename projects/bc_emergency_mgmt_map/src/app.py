@@ -1,34 +1,66 @@
+import hashlib
 import json
 import os
+import time
 import requests
 import numpy as np
-import pandas as pd
-import geopandas as gpd
 import plotly.graph_objects as go
 
-from dash import Dash, dcc, html, Input, Output, State, dash_table, callback_context
+from dash import Dash, DiskcacheManager, dcc, html, Input, Output, State, Patch, dash_table, callback_context, no_update
+from flask import request
 from datetime import datetime, timedelta
-from io import StringIO
 from shapely.geometry import shape, Point, Polygon
 from zoneinfo import ZoneInfo
 from utils import *
+from data_snapshot import get_snapshot_store, RefreshCoordinator
+from shared_dataset import get_shared_dataset
+from vector_tiles import register_tile_routes, tile_url_template
+from geocode_cache import get_cache
+from rate_limiter import get_rate_limiter
+from instrumentation import instrument_dash, instrument_callback, span, record_span
+
+# flask-compress is optional - responses go out uncompressed without it
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+# diskcache is optional - without it refresh and geocoding run as regular callbacks
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
 
 
 # ============================================================================
 # DASH APP
 # ============================================================================
 
-# Initializing data with some diagnostics...
-print("Fetching emergency data...")
-poly_geodf = bc_alerts_api()
-print(f"✓ Got {len(poly_geodf)} emergency events")
+# With SHARED_DATA_DIR set (see gunicorn.conf.py) all worker processes read one
+# memory-mapped copy of the data, and only one of them fetches it
+if get_shared_dataset() is not None:
+    get_snapshot_store().attach_shared_dataset(get_shared_dataset())
 
-print("Fetching sites data...")
-sites_df = retrieve_site_data()
-print(f"✓ Got {len(sites_df)} sites")
+with get_snapshot_store().refresh_lock():
+    initial_snapshot = get_snapshot_store().sync()
 
-print("Checking affected sites...")
-sites_with_events = check_sites_in_emergencies(sites_df, poly_geodf)
+    if initial_snapshot is None:
+        # Initializing data with some diagnostics...
+        print("Fetching emergency data...")
+        poly_geodf = bc_alerts_api()
+        print(f"✓ Got {len(poly_geodf)} emergency events")
+
+        print("Fetching sites data...")
+        sites_df = retrieve_site_data()
+        print(f"✓ Got {len(sites_df)} sites")
+
+        print("Checking affected sites...")
+        sites_with_events = check_sites_in_emergencies(sites_df, poly_geodf)
+        initial_snapshot = get_snapshot_store().publish(poly_geodf, sites_with_events, sites_df)
+    else:
+        print(f"✓ Using shared data version {initial_snapshot.version}")
+
+sites_df = initial_snapshot.base_sites
 print("✓ Initialization complete")
 
 # Color mapping for event types
@@ -62,6 +94,39 @@ MONOSPACE = "'Courier New', 'Courier', monospace"
 # Initialize Dash app
 app = Dash(__name__)
 
+# WSGI entry point for production servers (gunicorn -c gunicorn.conf.py)
+server = app.server
+
+# Brotli/gzip compress callback responses (figure + table JSON), assets and vector tiles
+if Compress is not None:
+    app.server.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.server.config['COMPRESS_MIMETYPES'] = [
+        'text/html', 'text/css', 'application/javascript', 'application/json',
+        'application/vnd.mapbox-vector-tile'
+    ]
+    app.server.config['COMPRESS_MIN_SIZE'] = 500
+    Compress(app.server)
+else:
+    print("WARNING: flask-compress not installed - responses will not be compressed")
+
+# Timing spans, payload sizes and JSON logs for every callback request; METRICS_ENDPOINT=1 adds /metrics
+instrument_dash(app, metrics_endpoint=os.environ.get('METRICS_ENDPOINT', '0') == '1')
+
+# Refresh and address search run as background callbacks when the data is shared between
+# processes (see gunicorn.conf.py), so a slow API round trip doesn't hold a web worker thread.
+# Job results, geocode cache and rate limiter counters live in diskcache next to the shared data.
+background_callback_manager = None
+if diskcache is not None and get_shared_dataset() is not None and os.environ.get('BACKGROUND_CALLBACKS', '1') == '1':
+    background_callback_manager = DiskcacheManager(diskcache.Cache(str(get_shared_dataset().root / 'callbacks')))
+
+    get_cache().use_store(diskcache.Cache(str(get_shared_dataset().root / 'geocode')))
+    get_rate_limiter().use_store(diskcache.Cache(str(get_shared_dataset().root / 'rate_limiter')))
+
+BACKGROUND_CALLBACK = {'background': True, 'manager': background_callback_manager} if background_callback_manager else {}
+
+# Mapbox Vector Tile endpoint for alert polygons: /tiles/<version>/alerts/<z>/<x>/<y>.pbf
+register_tile_routes(app.server, get_snapshot_store())
+
 # RECENT EDIT - Add custom CSS for hover effects and global styles
 app.index_string = '''
 <!DOCTYPE html>
@@ -115,6 +180,12 @@ app.index_string = '''
                 transition: all 0.3s ease;
             }
 
+            /* Refresh/search buttons while their callback is running */
+            button:disabled {
+                opacity: 0.6;
+                cursor: wait !important;
+            }
+
             /* Radius button hover */
             button[id^="radius-"]:hover {
                 background-color: #00aeff !important;
@@ -176,8 +247,8 @@ app.index_string = '''
 </html>
 '''
 
-# App Layout
-app.layout = html.Div([
+# App Layout (the data version store is added per page load, see serve_layout)
+main_layout = html.Div([
     # Header
     html.Div(
         [
@@ -211,6 +282,18 @@ app.layout = html.Div([
                 }
             ),
 
+            html.Span(
+                format_data_age(initial_snapshot.age_seconds()),
+                id='data-age',
+                style={
+                    'marginLeft': '10px',
+                    'color': COLORS['dark_text'],
+                    'fontFamily': FONT_FAMILY_REGULAR,
+                    'fontSize': '12px',
+                    'opacity': 0.7
+                }
+            ),
+
             html.Div(
                 [
                     html.Label(
@@ -426,6 +509,7 @@ app.layout = html.Div([
         id="loading-map",
         type="circle",  # Options: "circle", "default", "dot", "cube"
         color="#00aeff",  # Match your blue accent color
+        delay_show=500,  # Don't flash the spinner for quick pan/zoom re-clustering
         children=[
             dcc.Graph(
                 id='emergency-map',
@@ -621,7 +705,16 @@ app.layout = html.Div([
                             'border': f'1px solid {COLORS["blue"]}'
                         }
                     ],
-                    page_size=15
+                    # Paging, sorting and filtering happen server-side so the
+                    # browser only ever receives one page of rows
+                    page_current=0,
+                    page_size=15,
+                    page_action='custom',
+                    sort_action='custom',
+                    sort_mode='multi',
+                    sort_by=[],
+                    filter_action='custom',
+                    filter_query=''
                 )
             ]
         )
@@ -652,9 +745,8 @@ app.layout = html.Div([
         'textAlign': 'left'
     }),
 
-    # Hidden div to store data
-    html.Div(id='emergency-data-store', style={'display': 'none'}),
-    html.Div(id='sites-data-store', style={'display': 'none'})
+    dcc.Interval(id='data-age-interval', interval=60 * 1000),
+    html.Div(id='map-version-store', style={'display': 'none'})
 ], 
 style={
     'backgroundColor': COLORS['dark_bg'],
@@ -663,30 +755,104 @@ style={
 })
 
 
+def serve_layout():
+    """Page layout, seeded with the data version that is current when the page loads"""
+    return html.Div([
+        main_layout,
+        # Hidden div to store data
+        html.Div(id='data-version-store', style={'display': 'none'}, children=get_snapshot_store().sync().version)
+    ])
+
+
+app.layout = serve_layout
+
+
 # ============================================================================
 # CALLBACKS
 # ============================================================================
 
+# Processes used for the spatial join on refresh (set by gunicorn.conf.py; 1 = inline).
+# Startup stays inline so no pool is started in the gunicorn master before it forks.
+SPATIAL_JOIN_PROCESSES = int(os.environ.get('SPATIAL_JOIN_PROCESSES', '1'))
+# Sites per pool task; unset = split the sites evenly across the processes
+SPATIAL_JOIN_CHUNK_SIZE = int(os.environ.get('SPATIAL_JOIN_CHUNK_SIZE', '0')) or None
+
+# Refresh requests within this many seconds of the last fetch reuse the current data
+REFRESH_FRESHNESS_SECONDS = int(os.environ.get('REFRESH_FRESHNESS_SECONDS', '300'))
+
+refresh_coordinator = RefreshCoordinator(get_snapshot_store(), freshness_seconds=REFRESH_FRESHNESS_SECONDS)
+
+
+def fetch_emergency_data(current_snapshot):
+    """Download the alert polygons and join them to the current sites"""
+    base_sites = current_snapshot.base_sites
+
+    print("Fetching emergency data from function...")
+    poly_geodf_new = bc_alerts_api()
+
+    print("Fetching site data from function...")
+    sites_with_events_new = check_sites_in_emergencies(
+        base_sites, poly_geodf_new,
+        processes=SPATIAL_JOIN_PROCESSES,
+        chunk_size=SPATIAL_JOIN_CHUNK_SIZE
+    )
+
+    return poly_geodf_new, sites_with_events_new, base_sites
+
+
 # Refresh Data button callback
 @app.callback(
-    [Output('emergency-data-store', 'children'),
-     Output('sites-data-store', 'children')],
-    Input('refresh-button', 'n_clicks')
+    Output('data-version-store', 'children'),
+    Input('refresh-button', 'n_clicks'),
+    # Disabled while a refresh runs, so repeated clicks don't queue more fetches
+    running=[
+        (Output('refresh-button', 'disabled'), True, False),
+        (Output('refresh-button', 'children'), 'Refreshing...', 'Refresh Data'),
+    ],
+    # The page load already has the current version (serve_layout), so only clicks refresh
+    prevent_initial_call=True,
+    **BACKGROUND_CALLBACK
 )
+@instrument_callback
 def refresh_emergency_data(n_clicks):
     """Refresh emergency data from API"""
-    # In real implementation, fetch from API here
-    print("Fetching emergency data from function...")
-    poly_geodf_new = bc_alerts_api()
 
-    print("Fetching site data from function...")
-    sites_with_events_new = check_sites_in_emergencies(sites_df, poly_geodf_new)
+    # Only fetches when the current data is older than the freshness window; concurrent
+    # requests (from any worker when the data is shared) share a single fetch.
+    # The new snapshot's derived lookups (e.g. filter options) are computed once at publish,
+    # and only the version id goes to the browser - callbacks read the data server-side.
+    # Each worker drops tiles of the versions it stops keeping (see register_tile_routes)
+    snapshot, _ = refresh_coordinator.refresh(fetch_emergency_data)
+    return snapshot.version
 
-    # Store as JSON
-    poly_json = poly_geodf_new.to_json()
-    sites_json = sites_with_events_new.to_json(orient='records')
 
-    return poly_json, sites_json
+# Data age label (re-rendered every minute and after each refresh)
+@app.callback(
+    Output('data-age', 'children'),
+    [Input('data-version-store', 'children'),
+     Input('data-age-interval', 'n_intervals')]
+)
+@instrument_callback
+def update_data_age(data_version, n_intervals):
+    """Show how old the data behind the current version is"""
+    snapshot = get_snapshot_store().get(data_version)
+    return format_data_age(snapshot.age_seconds())
+
+
+# Move the browser onto the current version once its version is no longer kept
+@app.callback(
+    Output('data-version-store', 'children', allow_duplicate=True),
+    Input('data-age-interval', 'n_intervals'),
+    State('data-version-store', 'children'),
+    prevent_initial_call=True
+)
+@instrument_callback
+def sync_data_version(n_intervals, data_version):
+    """Replace a version that no worker can load with the current one"""
+    snapshot = get_snapshot_store().get(data_version)
+    if snapshot.version == data_version:
+        return no_update
+    return snapshot.version
 
 
 # Slicers affecting one another callback
@@ -694,122 +860,61 @@ def refresh_emergency_data(n_clicks):
     [Output('event-type-filter', 'options'),
      Output('facility-type-filter', 'options')],
     [Input('city-filter', 'value'),
-     Input('sites-data-store', 'children'),
-     Input('emergency-data-store', 'children')]
+     Input('data-version-store', 'children')]
 )
-def update_filter_options(selected_city, sites_json, poly_json):
+@instrument_callback
+def update_filter_options(selected_city, data_version):
     """Update filter options based on selected city"""
 
-    if sites_json and poly_json:
-        import json
-        sites_data = pd.read_json(StringIO(sites_json))
-        poly_data = gpd.GeoDataFrame.from_features(json.loads(poly_json))  # <-- BETTER FIX
-    else:
-        sites_data = sites_with_events
-        poly_data = poly_geodf
+    # Option lists are precomputed per city when the snapshot is published
+    snapshot = get_snapshot_store().get(data_version)
+    event_types, facility_types = snapshot.get_filter_options(selected_city)
 
-    # Filter sites by city if selected
-    if selected_city != 'all':
-        filtered_sites = sites_data[sites_data['city'] == selected_city]
-    else:
-        filtered_sites = sites_data
+    return event_types, facility_types
 
-    # Get unique event types and names from affected sites
-    affected_sites = filtered_sites[filtered_sites['event_type'].notna()]
 
-    # Event types
-    if len(affected_sites) > 0:
-        event_types = [{'label': 'All Types', 'value': 'all'}] + [{'label': et, 'value': et} for et in sorted(affected_sites['event_type'].unique())]
-        # event_names = [{'label': 'All Events', 'value': 'all'}] + [{'label': en, 'value': en} for en in sorted(affected_sites['event_name'].unique())]
-    else:
-        event_types = [{'label': 'All Types', 'value': 'all'}]
-        # event_names = [{'label': 'All Events', 'value': 'all'}]
+# Number of traces drawn on top of the polygons: radius circle, user pin,
+# and one marker layer each for affected and unaffected sites
+MARKER_TRACE_COUNT = 4
 
-    if len(filtered_sites) > 0:
-        facility_types = [{'label': 'All Facility Types', 'value': 'all'}] + [{'label': pt, 'value': pt} for pt in sorted(filtered_sites['property_type'].dropna().unique())]
-    else:
-        facility_types = [{'label': 'All Facility Types', 'value': 'all'}]
+# Draw alert polygons from the vector tile endpoint instead of inline traces
+# (the browser then only downloads geometry for the tiles in view; polygon hover is lost)
+USE_VECTOR_TILES = os.environ.get('VECTOR_TILES', '0') == '1'
 
-    return event_types, facility_types
+# Send trace coordinates as base64 typed arrays instead of JSON number lists
+COMPACT_COORDS = os.environ.get('COMPACT_COORDS', '0') == '1'
 
+# Only features within the visible map area, padded by this fraction per side, are sent
+VIEWPORT_MARGIN = 0.5
 
-# Filter affecting map and table callback
-@app.callback(
-    [Output('emergency-map', 'figure'),
-     Output('sites-table', 'data')],
-    [Input('city-filter', 'value'),
-     Input('event-type-filter', 'value'),
-     Input('facility-type-filter', 'value'),
-     Input('affected-toggle', 'value'),
-     Input('sites-data-store', 'children'),
-     Input('emergency-data-store', 'children'),
-     Input('user-location-store', 'children'),
-     Input('selected-radius-store', 'children')]
-)
+# Below this zoom, large site sets are aggregated into grid clusters
+CLUSTER_MAX_ZOOM = 11
+CLUSTER_MIN_SITES = 500
+CLUSTER_CELL_PX = 40
 
-def update_map_and_table(city_filter, event_type_filter, facility_type_filter,
-                        affected_toggle, sites_json, poly_json, user_location_json, selected_radius):
-    """Update map and table based on filters"""
-
-    # Load data
-    if sites_json and poly_json:
-        import json
-        sites_data = pd.read_json(StringIO(sites_json))
-        poly_data = gpd.GeoDataFrame.from_features(json.loads(poly_json))  # <-- BETTER FIX
-    else:
-        sites_data = sites_with_events
-        poly_data = poly_geodf
 
-    # Apply filters
-    filtered_sites = sites_data.copy()
-
-    # Parse user location
-    user_lat, user_lon = None, None
-    if user_location_json:
-        try:
-            location_data = json.loads(user_location_json)
-            user_lat = location_data['lat']
-            user_lon = location_data['lon']
-        except:
-            pass
-    
-    # Apply radius filter if location exists
-    if user_lat and user_lon:
-        radius_km = float(selected_radius) if selected_radius else 10
-        
-        # Calculate distances
-        filtered_sites['distance_km'] = filtered_sites.apply(
-            lambda row: haversine_distance(user_lat, user_lon, row['lat'], row['lon']),
-            axis=1
-        )
-        
-        # Filter by radius
-        filtered_sites = filtered_sites[filtered_sites['distance_km'] <= radius_km]
+def build_site_layer(sites, zoom, label):
+    """Get (lon, lat, size, hovertext) for a marker layer, clustered when zoomed out"""
 
-    # City filter
-    if city_filter != 'all':
-        filtered_sites = filtered_sites[filtered_sites['city'] == city_filter]
+    # Few sites or zoomed in: draw every site individually
+    if len(sites) < CLUSTER_MIN_SITES or zoom >= CLUSTER_MAX_ZOOM:
+        return sites['lon'], sites['lat'], 8, sites['hover_text']
 
-    # Event type filter
-    if event_type_filter != 'all':
-        filtered_sites = filtered_sites[filtered_sites['event_type'] == event_type_filter]
+    clusters = cluster_sites(sites, zoom, cell_px=CLUSTER_CELL_PX, label=label)
 
-    # Facility type filter
-    if facility_type_filter != 'all':
-        filtered_sites = filtered_sites[filtered_sites['property_type'] == facility_type_filter]
+    # Marker size grows with the log of the number of sites in the cell
+    sizes = np.clip(8 + 3 * np.log2(clusters['count']), 8, 30)
 
-    # Affected toggle
-    if 'affected' in affected_toggle:
-        filtered_sites = filtered_sites[filtered_sites['event_type'].notna()]
+    return clusters['lon'], clusters['lat'], sizes, clusters['hover_text']
 
-    # Create map figure
-    fig = go.Figure()
 
-    # Add emergency polygons
-    for idx, row in poly_data.iterrows():
-        # coords = list(row.geometry.exterior.coords)
-        # lons, lats = zip(*coords)
-        geometry = row.geometry
+def build_polygon_traces(snapshot):
+    """Build the emergency polygon traces and their bounding boxes once per data version"""
+    polygon_traces = []
+    polygon_bounds = []
+
+    # Shared WKB polygons are decoded one at a time, so the worker only keeps the traces
+    for row, geometry in snapshot.iter_alerts():
 
         # Check if the geometry is a MultiPolygon or a single Polygon
         if geometry.geom_type == 'MultiPolygon':
@@ -827,8 +932,9 @@ def update_map_and_table(city_filter, event_type_filter, facility_type_filter,
             if geom_part.exterior:
                 coords = list(geom_part.exterior.coords)
                 lons, lats = zip(*coords)
+                polygon_bounds.append(geom_part.bounds)
 
-                fig.add_trace(
+                polygon_traces.append(
                     go.Scattermapbox(
                       lon=list(lons),
                       lat=list(lats),
@@ -846,29 +952,93 @@ def update_map_and_table(city_filter, event_type_filter, facility_type_filter,
                   )
                 )
 
+    # (min_lon, min_lat, max_lon, max_lat) per trace, used as a bbox index for viewport queries
+    return {
+        'traces': polygon_traces,
+        'bounds': np.array(polygon_bounds, dtype=float).reshape(-1, 4)
+    }
+
+
+def sites_in_bbox(sites, bbox):
+    """Sites inside a (min_lon, min_lat, max_lon, max_lat) box"""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    lons = sites['lon'].to_numpy()
+    lats = sites['lat'].to_numpy()
+    return sites[(lons >= min_lon) & (lons <= max_lon) & (lats >= min_lat) & (lats <= max_lat)]
+
+
+def polygons_in_bbox(polygon_layer, bbox):
+    """Indices of the polygon traces whose bounds intersect a (min_lon, min_lat, max_lon, max_lat) box"""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    bounds = polygon_layer['bounds']
+    hits = (bounds[:, 0] <= max_lon) & (bounds[:, 2] >= min_lon) & (bounds[:, 1] <= max_lat) & (bounds[:, 3] >= min_lat)
+    return np.flatnonzero(hits)
+
+
+def build_alert_tile_layers(version):
+    """Mapbox vector layers that draw the alert polygons from /tiles (one fill + outline per status)"""
+    source = [request.host_url.rstrip('/') + tile_url_template(version, 'alerts')]
+    layers = []
+
+    for status, fill_color in list(EVENT_COLORS.items()) + [('Other', 'rgba(128, 128, 128, 0.3)')]:
+        layers.append(dict(
+            sourcetype='vector',
+            source=source,
+            sourcelayer=status,
+            type='fill',
+            color=fill_color,
+            opacity=0.6,
+            below='traces'
+        ))
+        layers.append(dict(
+            sourcetype='vector',
+            source=source,
+            sourcelayer=status,
+            type='line',
+            color='rgba(80, 80, 80, 0.6)',
+            line=dict(width=2),
+            below='traces'
+        ))
+
+    return layers
+
+
+def trace_payload(trace):
+    """Serialize a trace for a figure/Patch, with compact coordinates when enabled"""
+    trace_json = trace.to_plotly_json()
+    if COMPACT_COORDS:
+        trace_json = compact_trace_arrays(trace_json)
+    return trace_json
+
+
+def build_marker_traces(filtered_sites, user_lat, user_lon, selected_radius, zoom):
+    """Build the MARKER_TRACE_COUNT traces drawn over the polygons (empty when unused)"""
+
+    circle_lats, circle_lons = [], []
+    pin_lats, pin_lons = [], []
+    radius_km = float(selected_radius) if selected_radius else 10
+
     # Add radius circle if user location exists
     if user_lat and user_lon:
-        radius_km = float(selected_radius) if selected_radius else 10
-        
-        # Create circle points (approximate)
-        import numpy as np
-        circle_lats = []
-        circle_lons = []
-        
-        for angle in np.linspace(0, 360, 100):
-            # Approximate circle (not perfect for large radii, but good enough)
-            angle_rad = np.radians(angle)
-            dx = radius_km / 111.32  # 1 degree latitude ≈ 111.32 km
-            dy = radius_km / (111.32 * np.cos(np.radians(user_lat)))
-            
-            circle_lat = user_lat + dx * np.cos(angle_rad)
-            circle_lon = user_lon + dy * np.sin(angle_rad)
-            
-            circle_lats.append(circle_lat)
-            circle_lons.append(circle_lon)
-        
-        # Add circle
-        fig.add_trace(go.Scattermapbox(
+        # Create circle points (approximate, not perfect for large radii, but good enough)
+        angle_rad = np.radians(np.linspace(0, 360, 100))
+        dx = radius_km / 111.32  # 1 degree latitude ≈ 111.32 km
+        dy = radius_km / (111.32 * np.cos(np.radians(user_lat)))
+
+        circle_lats = (user_lat + dx * np.cos(angle_rad)).tolist()
+        circle_lons = (user_lon + dy * np.sin(angle_rad)).tolist()
+        pin_lats, pin_lons = [user_lat], [user_lon]
+
+    # Separate affected and unaffected sites (use filtered_sites instead)
+    affected_sites = filtered_sites[filtered_sites['event_type'].notna()]
+    unaffected_sites = filtered_sites[filtered_sites['event_type'].isna()]
+
+    affected_lon, affected_lat, affected_size, affected_text = build_site_layer(affected_sites, zoom, 'affected sites')
+    unaffected_lon, unaffected_lat, unaffected_size, unaffected_text = build_site_layer(unaffected_sites, zoom, 'sites')
+
+    return [
+        # Radius circle
+        go.Scattermapbox(
             lon=circle_lons,
             lat=circle_lats,
             mode='lines',
@@ -879,12 +1049,12 @@ def update_map_and_table(city_filter, event_type_filter, facility_type_filter,
             hoverinfo='text',
             hovertext=f'{radius_km} km radius from your location',
             showlegend=False
-        ))
-        
-        # Add user location pin
-        fig.add_trace(go.Scattermapbox(
-            lon=[user_lon],
-            lat=[user_lat],
+        ),
+
+        # User location pin
+        go.Scattermapbox(
+            lon=pin_lons,
+            lat=pin_lats,
             mode='markers',
             marker=dict(
                 size=15,
@@ -896,82 +1066,36 @@ def update_map_and_table(city_filter, event_type_filter, facility_type_filter,
             hoverinfo='text',
             hovertext='<b>Your Location</b>',
             showlegend=True
-        ))
-
-    # Separate affected and unaffected sites (use filtered_sites instead)
-    affected_sites = filtered_sites[filtered_sites['event_type'].notna()]
-    unaffected_sites = filtered_sites[filtered_sites['event_type'].isna()]
+        ),
 
-    # Add affected sites (red markers)
-    if len(affected_sites) > 0:
-        # Adding the black outline
-        fig.add_trace(go.Scattermapbox(
-            lon=affected_sites['lon'],
-            lat=affected_sites['lat'],
+        # Affected sites (red markers)
+        go.Scattermapbox(
+            lon=affected_lon,
+            lat=affected_lat,
             mode='markers',
-            marker=dict(size=10, color='black', opacity=0.5),
-            name='Affected Sites Line',
+            marker=dict(size=affected_size, color='#FF3333', opacity=0.8), # Line border didn't work: , line=dict(color='black', width=2)
+            name='Affected Sites',
+            hoverinfo='text',
+            hovertext=affected_text,  # Precomputed once per data version
             showlegend=False
-        ))
-
-        fig.add_trace(
-            go.Scattermapbox(
-                lon=affected_sites['lon'],
-                lat=affected_sites['lat'],
-                mode='markers',
-                marker=dict(size=8, color='#FF3333', opacity=0.8), # Line border didn't work: , line=dict(color='black', width=2)
-                name='Affected Sites',
-                hoverinfo='text',
-                hovertext=[
-                    f"<b>{row['site_name']}</b><br>"
-                    f"City: {row['city']}<br>"
-                    f"Facility Type: {row['property_type']}<br>"
-                    f"Capacity: {row['max_capacity']}<br>"
-                    f"<b>⚠️ Affected by: {row['event_type']}</b>"
-                    for _, row in affected_sites.iterrows()
-                ],
-                showlegend=False
-            )
-        )
+        ),
 
-    # Add unaffected sites (green markers)
-    if len(unaffected_sites) > 0:
-        # Adding the black outline
-        fig.add_trace(go.Scattermapbox(
-            lon=unaffected_sites['lon'],
-            lat=unaffected_sites['lat'],
+        # Unaffected sites (green markers)
+        go.Scattermapbox(
+            lon=unaffected_lon,
+            lat=unaffected_lat,
             mode='markers',
-            marker=dict(size=10, color='black', opacity=0.5),
-            name='Affected Sites Line',
+            marker=dict(size=unaffected_size, color=COLORS['darkgreen'], opacity=0.8), # Line border didn't work: , line=dict(color='black', width=2)
+            name='Unaffected Sites',
+            hoverinfo='text',
+            hovertext=unaffected_text,  # Precomputed once per data version
             showlegend=False
-        ))
+        ),
+    ]
 
-        fig.add_trace(
-            go.Scattermapbox(
-                lon=unaffected_sites['lon'],
-                lat=unaffected_sites['lat'],
-                mode='markers',
-                marker=dict(size=8, color=COLORS['darkgreen'], opacity=0.8), # Line border didn't work: , line=dict(color='black', width=2)
-                name='Unaffected Sites',
-                hoverinfo='text',
-                hovertext=[
-                    f"<b>{row['site_name']}</b><br>"
-                    f"City: {row['city']}<br>"
-                    f"Facility Type: {row['property_type']}<br>"
-                    f"Capacity: {row['max_capacity']}<br>"
-                    f"Status: Not affected"
-                    for _, row in unaffected_sites.iterrows()
-                ],
-                showlegend=False
-            )
-        )
 
-    # Adding automatic zoom calculations
-    # Calculate map center and zoom based on filtered sites
-    is_default_view = (city_filter == 'all' and 
-                   event_type_filter == 'all' and 
-                   facility_type_filter == 'all' and 
-                   'affected' not in affected_toggle)
+def compute_map_view(filtered_sites, user_lat, user_lon, is_default_view):
+    """Calculate map center and zoom based on filtered sites"""
 
     # Priority 1: User searched an address - zoom to that location
     if user_lat and user_lon:
@@ -1025,6 +1149,111 @@ def update_map_and_table(city_filter, event_type_filter, facility_type_filter,
         center_lon = -123.15151571413801
         zoom_level = 8
 
+    return float(center_lat), float(center_lon), zoom_level
+
+
+# Filter affecting map callback
+@app.callback(
+    [Output('emergency-map', 'figure'),
+     Output('map-version-store', 'children')],
+    [Input('city-filter', 'value'),
+     Input('event-type-filter', 'value'),
+     Input('facility-type-filter', 'value'),
+     Input('affected-toggle', 'value'),
+     Input('data-version-store', 'children'),
+     Input('user-location-store', 'children'),
+     Input('selected-radius-store', 'children'),
+     Input('emergency-map', 'relayoutData')],
+    State('map-version-store', 'children')
+)
+@instrument_callback
+def update_map_and_table(city_filter, event_type_filter, facility_type_filter,
+                        affected_toggle, data_version, user_location_json, selected_radius,
+                        relayout_data, map_version):
+    """Update map based on filters
+
+    Only polygons and sites within the viewport (plus VIEWPORT_MARGIN) are sent.
+    The full figure is only sent when the data version changes. Otherwise a Patch
+    replaces just the marker traces and map view, or the trace list if the set of
+    visible polygons changed. Pan/zoom events (relayoutData) never move the view.
+    """
+
+    snapshot = get_snapshot_store().get(data_version)
+    triggered_ids = [t['prop_id'] for t in callback_context.triggered]
+    view_changed_only = triggered_ids == ['emergency-map.relayoutData']
+
+    # Apply filters
+    with span('filter'):
+        filtered_sites = filter_sites(snapshot.sites, city_filter, event_type_filter, facility_type_filter,
+                                      affected_toggle, user_location_json, selected_radius)
+    user_lat, user_lon = parse_user_location(user_location_json)
+
+    # Adding automatic zoom calculations
+    is_default_view = (city_filter == 'all' and 
+                   event_type_filter == 'all' and 
+                   facility_type_filter == 'all' and 
+                   'affected' not in affected_toggle)
+    center_lat, center_lon, zoom_level = compute_map_view(filtered_sites, user_lat, user_lon, is_default_view)
+
+    # The client already has this data version, so the update is a Patch
+    patching = bool(map_version) and map_version.split('|')[0] == snapshot.version
+
+    # Cluster for the zoom the map will actually show. A Patch for a filter change or
+    # address search moves the map to zoom_level. A pan/zoom, or a full figure (uirevision
+    # keeps the user's view), leaves it at the user's last zoom from relayoutData.
+    map_zoom = zoom_level
+    keeps_user_view = view_changed_only or not patching
+    if keeps_user_view and relayout_data and 'mapbox.zoom' in relayout_data:
+        map_zoom = relayout_data['mapbox.zoom']
+
+    # Visible area: the user's current view, plus the computed view when filters may move the map
+    view_bbox = relayout_bbox(relayout_data, margin=VIEWPORT_MARGIN)
+    if view_bbox is None or not view_changed_only:
+        computed_bbox = viewport_bbox(center_lat, center_lon, zoom_level, margin=VIEWPORT_MARGIN)
+        if view_bbox is None:
+            view_bbox = computed_bbox
+        else:
+            view_bbox = (min(view_bbox[0], computed_bbox[0]), min(view_bbox[1], computed_bbox[1]),
+                         max(view_bbox[2], computed_bbox[2]), max(view_bbox[3], computed_bbox[3]))
+
+    with span('figure_build'):
+        if USE_VECTOR_TILES:
+            visible_polygons = np.array([], dtype=int)
+            polygon_traces = []
+        else:
+            polygon_layer = snapshot.get_or_build('polygon_traces', build_polygon_traces)
+            visible_polygons = polygons_in_bbox(polygon_layer, view_bbox)
+            polygon_traces = [polygon_layer['traces'][i] for i in visible_polygons]
+
+        visible_sites = sites_in_bbox(filtered_sites, view_bbox)
+        marker_traces = build_marker_traces(visible_sites, user_lat, user_lon, selected_radius, map_zoom)
+
+    # The client's trace layout is identified by data version + which polygons it holds
+    polygon_key = hashlib.md5(visible_polygons.astype('int64').tobytes()).hexdigest()[:12]
+    map_state = f"{snapshot.version}|{polygon_key}"
+
+    # Same data the client already has: only send the changed traces and view
+    if patching:
+        patched_figure = Patch()
+
+        if map_version == map_state:
+            for offset, trace in enumerate(marker_traces):
+                patched_figure['data'][len(polygon_traces) + offset] = trace_payload(trace)
+        else:
+            # Different polygons are in view - replace the (viewport-sized) trace list
+            patched_figure['data'] = [trace_payload(trace) for trace in polygon_traces + marker_traces]
+
+        # A pan/zoom by the user shouldn't snap the map back to the computed view
+        if not view_changed_only:
+            patched_figure['layout']['mapbox']['center'] = dict(lat=center_lat, lon=center_lon)
+            patched_figure['layout']['mapbox']['zoom'] = zoom_level
+
+        return patched_figure, map_state
+
+    # Create map figure
+    figure_start = time.perf_counter()
+    fig = go.Figure(data=polygon_traces + marker_traces)
+
     # Brand new update layout with dark mode
     fig.update_layout(
         mapbox=dict(
@@ -1061,10 +1290,66 @@ def update_map_and_table(city_filter, event_type_filter, facility_type_filter,
     # Configure scroll zoom behavior
     fig.update_mapboxes(bearing=0, pitch=0)
 
-    # Prepare table data
-    table_data = filtered_sites[['site_name', 'city', 'full_address', 'max_capacity', 'event_type']].fillna('').to_dict('records') # Removed 'phone', 
+    if USE_VECTOR_TILES:
+        fig.update_mapboxes(layers=build_alert_tile_layers(snapshot.version))
+
+    if COMPACT_COORDS:
+        figure = fig.to_plotly_json()
+        figure['data'] = [compact_trace_arrays(trace) for trace in figure['data']]
+        record_span('figure_build', time.perf_counter() - figure_start)
+        return figure, map_state
+
+    record_span('figure_build', time.perf_counter() - figure_start)
+    return fig, map_state
+
+
+# Server-side paging, sorting and filtering for the sites table
+@app.callback(
+    [Output('sites-table', 'data'),
+     Output('sites-table', 'page_count'),
+     Output('sites-table', 'page_current')],
+    [Input('city-filter', 'value'),
+     Input('event-type-filter', 'value'),
+     Input('facility-type-filter', 'value'),
+     Input('affected-toggle', 'value'),
+     Input('data-version-store', 'children'),
+     Input('user-location-store', 'children'),
+     Input('selected-radius-store', 'children'),
+     Input('sites-table', 'page_current'),
+     Input('sites-table', 'page_size'),
+     Input('sites-table', 'sort_by'),
+     Input('sites-table', 'filter_query')]
+)
+@instrument_callback
+def update_table_page(city_filter, event_type_filter, facility_type_filter,
+                      affected_toggle, data_version, user_location_json, selected_radius,
+                      page_current, page_size, sort_by, filter_query):
+    """Return only the requested page of the filtered sites table"""
+
+    snapshot = get_snapshot_store().get(data_version)
+
+    with span('filter'):
+        filtered_sites = filter_sites(snapshot.sites, city_filter, event_type_filter, facility_type_filter,
+                                      affected_toggle, user_location_json, selected_radius)
+
+    table_columns = ['site_name', 'city', 'full_address', 'max_capacity', 'event_type'] # Removed 'phone',
+    with span('table_query'):
+        table_sites = apply_table_query(filtered_sites[table_columns], sort_by, filter_query)
+
+    # Any change other than paging sends the user back to the first page
+    triggered_ids = [t['prop_id'] for t in callback_context.triggered]
+    if 'sites-table.page_current' not in triggered_ids:
+        page_current = 0
+
+    # Slice out the requested page (clamped in case the filters shrank the table)
+    page_size = page_size or 15
+    page_count = max(1, -(-len(table_sites) // page_size))
+    page_current = min(page_current or 0, page_count - 1)
+
+    start = page_current * page_size
+    page_data = table_sites.iloc[start:start + page_size].fillna('').to_dict('records')
 
-    return fig, table_data
+    return page_data, page_count, page_current
 
 
 # Reset Filters Callback
@@ -1077,6 +1362,7 @@ def update_map_and_table(city_filter, event_type_filter, facility_type_filter,
     Input('reset-button', 'n_clicks'),
     prevent_initial_call=True
 )
+@instrument_callback
 def reset_filters(n_clicks):
     """Reset all filters to default values"""
     return 'all', 'all', 'all', [], ''
@@ -1090,65 +1376,24 @@ def reset_filters(n_clicks):
      Input('event-type-filter', 'value'),
      Input('facility-type-filter', 'value'),
      Input('affected-toggle', 'value'),
-     Input('sites-data-store', 'children'),
-     Input('emergency-data-store', 'children'),
+     Input('data-version-store', 'children'),
      Input('user-location-store', 'children'),  # NEW
      Input('selected-radius-store', 'children')]  # NEW
 )
+@instrument_callback
 def update_metric_cards(city_filter, event_type_filter, facility_type_filter,
-                       affected_toggle, sites_json, poly_json,
+                       affected_toggle, data_version,
                        user_location_json, selected_radius): 
     """Update the metric cards based on filters"""
     
     # Load data (same logic as update_map_and_table)
-    if sites_json and poly_json:
-        sites_data = pd.read_json(StringIO(sites_json))
-    else:
-        sites_data = sites_with_events.copy()
+    sites_data = get_snapshot_store().get(data_version).sites
     
     # Apply filters (same logic as update_map_and_table)
-    filtered_sites = sites_data.copy()
-
-    # Parse user location
-    user_lat, user_lon = None, None
-    if user_location_json:
-        try:
-            location_data = json.loads(user_location_json)
-            user_lat = location_data['lat']
-            user_lon = location_data['lon']
-        except:
-            pass
-    
-    # Apply radius filter if location exists (SAME AS MAP CALLBACK)
-    if user_lat and user_lon:
-        # from utils import haversine_distance
-        radius_km = float(selected_radius) if selected_radius else 10
-        
-        # Calculate distances
-        filtered_sites['distance_km'] = filtered_sites.apply(
-            lambda row: haversine_distance(user_lat, user_lon, row['lat'], row['lon']),
-            axis=1
-        )
-        
-        # Filter by radius
-        filtered_sites = filtered_sites[filtered_sites['distance_km'] <= radius_km]
-    
-    # City filter
-    if city_filter != 'all':
-        filtered_sites = filtered_sites[filtered_sites['city'] == city_filter]
-    
-    # Event type filter
-    if event_type_filter != 'all':
-        filtered_sites = filtered_sites[filtered_sites['event_type'] == event_type_filter]
+    with span('filter'):
+        filtered_sites = filter_sites(sites_data, city_filter, event_type_filter, facility_type_filter,
+                                      affected_toggle, user_location_json, selected_radius)
 
-    # Facility type filter
-    if facility_type_filter != 'all':
-        filtered_sites = filtered_sites[filtered_sites['property_type'] == facility_type_filter]
-    
-    # Affected toggle
-    if 'affected' in affected_toggle:
-        filtered_sites = filtered_sites[filtered_sites['event_type'].notna()]
-    
     # Calculate metrics
     total_sites = len(filtered_sites)
     total_spaces = int(filtered_sites['max_capacity'].sum())
@@ -1171,8 +1416,14 @@ def update_metric_cards(city_filter, event_type_filter, facility_type_filter,
     [Input('search-button', 'n_clicks'),
      Input('reset-button', 'n_clicks')],
     [State('address-search', 'value')],
-    prevent_initial_call=True
+    prevent_initial_call=True,
+    running=[
+        (Output('search-button', 'disabled'), True, False),
+        (Output('search-button', 'children'), '⏳', '🔍'),
+    ],
+    **BACKGROUND_CALLBACK
 )
+@instrument_callback
 def handle_location_search(search_clicks, reset_clicks, address):
     """Handle address search with error feedback"""
     from dash import callback_context
@@ -1245,6 +1496,7 @@ def handle_location_search(search_clicks, reset_clicks, address):
      Input('reset-button', 'n_clicks')],
     prevent_initial_call=True
 )
+@instrument_callback
 def update_selected_radius(clicks_2, clicks_5, clicks_10, reset_clicks):
     """Update selected radius and button styles"""
     
@@ -1292,6 +1544,7 @@ def update_selected_radius(clicks_2, clicks_5, clicks_10, reset_clicks):
     Input('address-search', 'value'),
     prevent_initial_call=True
 )
+@instrument_callback
 def clear_error_on_typing(value):
     """Clear error styling when user starts typing"""
     default_style = {
@@ -1317,6 +1570,7 @@ def clear_error_on_typing(value):
 
 
 if __name__ == '__main__':
+    # Local development only - production runs `server` under gunicorn (see gunicorn.conf.py)
     # For Google Colab, use mode='inline' or 'external'
     # For local Jupyter, use mode='inline' or mode='jupyterlab'
     port = int(os.environ.get('PORT', 8050))
@@ -0,0 +1,279 @@
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from utils import build_site_hover_text
+from shared_dataset import decode_geometry, iter_geometries
+
+logger = logging.getLogger(__name__)
+
+
+def _options_for_sites(sites):
+    """Build the event type and facility type dropdown options for a set of sites"""
+
+    affected_sites = sites[sites['event_type'].notna()]
+
+    event_types = [{'label': 'All Types', 'value': 'all'}] + \
+        [{'label': et, 'value': et} for et in sorted(affected_sites['event_type'].unique())]
+
+    facility_types = [{'label': 'All Facility Types', 'value': 'all'}] + \
+        [{'label': pt, 'value': pt} for pt in sorted(sites['property_type'].dropna().unique())]
+
+    return event_types, facility_types
+
+
+def build_filter_options(sites):
+    """Precompute the dropdown options for every city (plus 'all') in one pass"""
+    options = {'all': _options_for_sites(sites)}
+
+    for city, city_sites in sites.groupby('city'):
+        options[city] = _options_for_sites(city_sites)
+
+    return options
+
+
+VERSION_TIME_FORMAT = '%Y%m%d%H%M%S%f'
+
+
+def make_version(counter):
+    """Version id: publish counter + timestamp"""
+    return f"{counter}-{datetime.now().strftime(VERSION_TIME_FORMAT)}"
+
+
+def version_counter(version):
+    """Publish counter of a version (orders versions across processes)"""
+    return int(version.split('-', 1)[0])
+
+
+def version_time(version):
+    """When a version was published (parsed from its id, so every process agrees)"""
+    return datetime.strptime(version.split('-', 1)[1], VERSION_TIME_FORMAT)
+
+
+def with_hover_text(sites):
+    """Add the marker hover text column unless it was already computed (e.g. by another worker)"""
+    if 'hover_text' in sites.columns:
+        return sites
+    return sites.assign(hover_text=build_site_hover_text(sites))
+
+
+class DataSnapshot:
+    """One refresh worth of emergency polygons and sites, plus lookups derived from them"""
+
+    def __init__(self, poly_geodf, sites_with_events, version, base_sites=None):
+        self.alerts = poly_geodf  # GeoDataFrame, or a shared frame with WKB geometry
+        self.sites = with_hover_text(sites_with_events)
+        self.base_sites = base_sites  # Sites before the spatial join (input for the next refresh)
+        self.version = version
+        self.created_at = version_time(version)
+
+        # Derived once per data version so callbacks never recompute them
+        self.filter_options = build_filter_options(sites_with_events)
+
+        # Lazily built artifacts (figure traces, indexes, ...) keyed by name
+        self._derived = {}
+        self._derived_lock = threading.RLock()  # Builders may use other derived artifacts
+
+    def get_or_build(self, key, builder):
+        """Return a derived artifact for this version, building it on first use"""
+        with self._derived_lock:
+            if key not in self._derived:
+                self._derived[key] = builder(self)
+            return self._derived[key]
+
+    @property
+    def poly_geodf(self):
+        """Alert polygons as a GeoDataFrame (shared WKB is decoded on first use, e.g. by the vector tiles)"""
+        return self.get_or_build('poly_geodf', lambda snapshot: decode_geometry(snapshot.alerts))
+
+    def iter_alerts(self):
+        """(alert row, geometry) pairs, without decoding every shared polygon at once"""
+        return iter_geometries(self.alerts)
+
+    def age_seconds(self):
+        """Seconds since this version was published"""
+        return (datetime.now() - self.created_at).total_seconds()
+
+    def get_filter_options(self, city):
+        """Get (event_types, facility_types) options for a city, or empty options if unknown"""
+        if city in self.filter_options:
+            return self.filter_options[city]
+
+        return [{'label': 'All Types', 'value': 'all'}], [{'label': 'All Facility Types', 'value': 'all'}]
+
+
+class SnapshotStore:
+    """
+    Keeps the most recent data snapshots keyed by version.
+
+    With a SharedDataset attached, published data is written to the shared
+    files and every worker loads snapshots from there, so versions are the
+    same across processes.
+    """
+
+    def __init__(self, max_snapshots=3):
+        self.max_snapshots = max_snapshots
+        self.snapshots = OrderedDict()
+        self.counter = 0
+        self.lock = threading.Lock()
+
+        self.shared_dataset = None
+        self.shared_mtime = None
+        self.sync_lock = threading.Lock()
+        self.local_refresh_lock = threading.Lock()
+
+        self.eviction_listeners = []
+
+    def attach_shared_dataset(self, shared_dataset):
+        """Publish to and load from a SharedDataset instead of keeping data per process"""
+        self.shared_dataset = shared_dataset
+
+    def add_eviction_listener(self, listener):
+        """Call listener(version) whenever this process drops a snapshot (e.g. to free per-version caches)"""
+        self.eviction_listeners.append(listener)
+
+    def refresh_lock(self):
+        """Lock held around fetch + publish so only one thread (or process, when shared) refreshes at a time"""
+        if self.shared_dataset is None:
+            return self.local_refresh_lock
+        return self.shared_dataset.refresh_lock()
+
+    def _add(self, snapshot):
+        """Insert a snapshot, keeping the snapshots ordered oldest to newest"""
+        with self.lock:
+            self.snapshots[snapshot.version] = snapshot
+
+            # An older version loaded on request must not become current()
+            for version in sorted(self.snapshots, key=version_counter):
+                self.snapshots.move_to_end(version)
+
+            # Drop the oldest snapshots so memory stays bounded
+            evicted = []
+            while len(self.snapshots) > self.max_snapshots:
+                evicted.append(self.snapshots.popitem(last=False)[0])
+
+        for version in evicted:
+            for listener in self.eviction_listeners:
+                listener(version)
+
+    def publish(self, poly_geodf, sites_with_events, base_sites=None):
+        """Register freshly fetched data as the newest snapshot (inside refresh_lock when shared)"""
+        if self.shared_dataset is not None:
+            version = make_version(self.shared_dataset.next_counter())
+            self.shared_dataset.write(version, poly_geodf, base_sites, with_hover_text(sites_with_events))
+            # Re-read so this process also serves the memory-mapped copy, not its private one
+            snapshot = self._load_shared(version)
+        else:
+            with self.lock:
+                self.counter += 1
+                version = make_version(self.counter)
+            snapshot = DataSnapshot(poly_geodf, sites_with_events, version, base_sites)
+            self._add(snapshot)
+
+        print(f"[SNAPSHOT] Published version {version} ({len(sites_with_events)} sites, {len(poly_geodf)} polygons)")
+        return snapshot
+
+    def _load_shared(self, version):
+        """Load a version from the shared dataset into this process"""
+        poly_geodf, base_sites, sites_with_events = self.shared_dataset.read(version)
+        snapshot = DataSnapshot(poly_geodf, sites_with_events, version, base_sites)
+        self._add(snapshot)
+        return snapshot
+
+    def sync(self):
+        """Load the shared dataset's current version if another process published a newer one"""
+        if self.shared_dataset is None:
+            return self.current()
+
+        with self.sync_lock:
+            mtime = self.shared_dataset.pointer_mtime()
+            if mtime is not None and mtime != self.shared_mtime:
+                version = self.shared_dataset.current_version()
+                with self.lock:
+                    loaded = version in self.snapshots
+                if not loaded:
+                    print(f"[SNAPSHOT] Loading shared version {version}")
+                    self._load_shared(version)
+                self.shared_mtime = mtime
+
+        return self.current()
+
+    def get(self, version):
+        """
+        Get the snapshot for a version, falling back to the newest one.
+
+        With a SharedDataset, a version this process has not loaded yet is read
+        from the shared files while its directory is still kept (newer or older
+        than the current one). Otherwise the current snapshot is returned;
+        callers can compare its version to tell the client to switch.
+        """
+        with self.lock:
+            if version in self.snapshots:
+                return self.snapshots[version]
+
+        # Another worker may have published this version
+        snapshot = self.sync()
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        if version and self.shared_dataset is not None and self.shared_dataset.has_version(version):
+            try:
+                return self._load_shared(version)
+            except FileNotFoundError:
+                pass  # Pruned while we were reading it
+
+        if version:
+            logger.info(f"[SNAPSHOT] MISS for version {version} - using current snapshot")
+        return snapshot
+
+    def current(self):
+        """Get the newest snapshot (None before the first publish)"""
+        with self.lock:
+            if not self.snapshots:
+                return None
+            return next(reversed(self.snapshots.values()))
+
+
+class RefreshCoordinator:
+    """
+    Decides whether a refresh request actually fetches.
+
+    Requests are answered with the current snapshot while it is younger than
+    `freshness_seconds`. Requests that wait on the refresh lock while another
+    caller fetches reuse that caller's result instead of fetching again.
+    """
+
+    def __init__(self, snapshot_store, freshness_seconds=300):
+        self.snapshot_store = snapshot_store
+        self.freshness_seconds = freshness_seconds
+
+    def refresh(self, fetch):
+        """
+        Return (snapshot, fetched). `fetch(current_snapshot)` must return
+        (poly_geodf, sites_with_events, base_sites) and is only called when needed.
+        """
+        requested_at = datetime.now()
+
+        with self.snapshot_store.refresh_lock():
+            current = self.snapshot_store.sync()
+
+            if current is not None:
+                if current.created_at >= requested_at:
+                    print(f"[REFRESH] Joined concurrent refresh -> version {current.version}")
+                    return current, False
+
+                if current.age_seconds() < self.freshness_seconds:
+                    print(f"[REFRESH] Version {current.version} is fresh ({current.age_seconds():.0f}s old) - not fetching")
+                    return current, False
+
+            poly_geodf, sites_with_events, base_sites = fetch(current)
+            return self.snapshot_store.publish(poly_geodf, sites_with_events, base_sites), True
+
+
+# Global snapshot store instance
+_snapshot_store = SnapshotStore(max_snapshots=3)
+
+
+def get_snapshot_store():
+    """Get the global snapshot store instance"""
+    return _snapshot_store
@@ -1,5 +1,6 @@
 import json
 import hashlib
+from itertools import islice
 from datetime import datetime, timedelta
 
 class GeocodeCache:
@@ -8,6 +9,10 @@ class GeocodeCache:
     def __init__(self, ttl_days=30):
         self.cache = {}
         self.ttl_days = ttl_days
+
+    def use_store(self, store):
+        """Keep entries in a dict-like store shared between processes (e.g. diskcache.Cache)"""
+        self.cache = store
     
     def _get_key(self, address):
         """Generate cache key from address"""
@@ -27,7 +32,7 @@ class GeocodeCache:
                 return cached['lat'], cached['lon']
             else:
                 print(f"[CACHE] EXPIRED for: {address}")
-                del self.cache[key]
+                self.cache.pop(key, None)
         
         print(f"[CACHE] MISS for: {address}")
         return None, None
@@ -46,7 +51,7 @@ class GeocodeCache:
         """Get cache statistics"""
         return {
             'size': len(self.cache),
-            'entries': list(self.cache.keys())[:10]  # First 10 keys
+            'entries': list(islice(iter(self.cache), 10))  # First 10 keys
         }
 
 
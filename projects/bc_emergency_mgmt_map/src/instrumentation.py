@@ -0,0 +1,290 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, g, request
+
+
+# Structured performance logs (one JSON object per line on stderr); PERF_LOG=0 turns them off
+PERF_LOG_ENABLED = os.environ.get('PERF_LOG', '1') == '1'
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CALLBACK_PATH = '/_dash-update-component'
+
+
+# ============================================================================
+# STRUCTURED LOGS
+# ============================================================================
+
+class JsonFormatter(logging.Formatter):
+    """Format a log record as a single JSON line with its extra `fields`"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'event': record.getMessage(),
+            'pid': os.getpid(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        return json.dumps(entry, default=str)
+
+
+perf_logger = logging.getLogger('perf')
+perf_logger.setLevel(logging.INFO)
+perf_logger.propagate = False  # Keep JSON lines out of the '[LEVEL] message' root handler
+
+if not perf_logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(JsonFormatter())
+    perf_logger.addHandler(_handler)
+
+
+def log_event(event, **fields):
+    """Write one structured performance log line"""
+    if PERF_LOG_ENABLED:
+        perf_logger.info(event, extra={'fields': fields})
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+class MetricsRegistry:
+    """Counters and histograms for this process, rendered in Prometheus text format"""
+
+    def __init__(self):
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.help = {}
+        self.lock = threading.Lock()
+
+    def inc(self, name, labels, value=1, help_text=''):
+        """Add to a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.help.setdefault(name, (help_text, 'counter'))
+            self.counters[key] += value
+
+    def observe(self, name, labels, value, help_text='', buckets=DURATION_BUCKETS):
+        """Record a value in a histogram"""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.help.setdefault(name, (help_text, 'histogram'))
+            if key not in self.histograms:
+                self.histograms[key] = {'buckets': buckets, 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+
+            histogram = self.histograms[key]
+            for i, bound in enumerate(histogram['buckets']):
+                if value <= bound:
+                    histogram['counts'][i] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def render(self):
+        """Prometheus text exposition format (every series labelled with this worker's pid)"""
+        worker = str(os.getpid())
+        lines = []
+
+        def format_labels(labels, extra=()):
+            pairs = list(labels) + [('worker', worker)] + list(extra)
+            return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+        with self.lock:
+            for name, (help_text, metric_type) in sorted(self.help.items()):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+
+                if metric_type == 'counter':
+                    for (metric, labels), value in sorted(self.counters.items()):
+                        if metric == name:
+                            lines.append(f"{name}{format_labels(labels)} {value}")
+                else:
+                    for (metric, labels), histogram in sorted(self.histograms.items()):
+                        if metric != name:
+                            continue
+                        for bound, count in zip(histogram['buckets'], histogram['counts']):
+                            lines.append(f"{name}_bucket{format_labels(labels, [('le', bound)])} {count}")
+                        lines.append(f"{name}_bucket{format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+                        lines.append(f"{name}_sum{format_labels(labels)} {histogram['sum']}")
+                        lines.append(f"{name}_count{format_labels(labels)} {histogram['count']}")
+
+        return '\n'.join(lines) + '\n'
+
+
+# Global metrics registry instance
+_metrics = MetricsRegistry()
+
+
+def get_metrics():
+    """Get the global metrics registry instance"""
+    return _metrics
+
+
+# ============================================================================
+# SPANS
+# ============================================================================
+
+# Spans recorded while handling the current request (None outside a callback request)
+_request_state = threading.local()
+
+
+def _current_spans():
+    return getattr(_request_state, 'spans', None)
+
+
+def record_span(name, seconds):
+    """Add time to a named span of the current request"""
+    spans = _current_spans()
+    if spans is not None:
+        spans[name] = spans.get(name, 0.0) + seconds
+
+
+@contextmanager
+def span(name):
+    """Time a block as part of the current request, e.g. `with span('filter'):`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - start)
+
+
+def timed(func):
+    """Time a data function (fetch, join, geocode) - logged on its own and as a span of the request"""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        status = 'ok'
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            status = 'error'
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            record_span(func.__name__, elapsed)
+            _metrics.observe('function_duration_seconds', {'function': func.__name__}, elapsed,
+                             'Duration of data fetch/join functions')
+            log_event('function', function=func.__name__, duration_ms=round(elapsed * 1000, 2), status=status)
+
+    return wrapper
+
+
+def instrument_callback(func):
+    """Time a Dash callback body as the 'callback' span (background jobs log it directly)"""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        in_request = _current_spans() is not None
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            record_span('callback', elapsed)
+
+            # Background callbacks run in a job process without the request hooks
+            if not in_request:
+                _metrics.observe('dash_callback_duration_seconds', {'callback': func.__name__}, elapsed,
+                                 'Total time handling a Dash callback request')
+                log_event('callback', callback=func.__name__, duration_ms=round(elapsed * 1000, 2), background=True)
+
+    return wrapper
+
+
+# ============================================================================
+# FLASK HOOKS
+# ============================================================================
+
+def _callback_name(app, body):
+    """Function name of the callback a /_dash-update-component body targets"""
+    entry = app.callback_map.get(body.get('output', ''))
+    if entry and 'callback' in entry:
+        return entry['callback'].__name__
+    return body.get('output', 'unknown')
+
+
+def instrument_dash(app, metrics_endpoint=False):
+    """
+    Time every callback request and log/count it.
+
+    Spans per request: deserialize (request JSON), callback (the function
+    itself, plus any inner spans it records), serialize (Dash dispatch and
+    response JSON, i.e. the rest). The spans also go out as a Server-Timing
+    header, so the browser's network panel separates server time from network time.
+    """
+    server = app.server
+
+    @server.before_request
+    def _start_callback_timing():
+        if not request.path.endswith(CALLBACK_PATH):
+            return
+
+        _request_state.spans = {}
+        g.perf_start = time.perf_counter()
+
+        # Dash reads the same cached JSON afterwards, so parsing here is the deserialization cost
+        start = time.perf_counter()
+        body = request.get_json(silent=True) or {}
+        record_span('deserialize', time.perf_counter() - start)
+
+        g.perf_callback = _callback_name(app, body)
+
+    @server.after_request
+    def _finish_callback_timing(response):
+        if 'perf_start' not in g:
+            return response
+
+        total = time.perf_counter() - g.perf_start
+        spans = _current_spans() or {}
+        _request_state.spans = None
+
+        # Inner spans (filter, figure_build, ...) are part of 'callback'; the remainder is Dash itself
+        outer = spans.get('deserialize', 0.0) + spans.get('callback', 0.0)
+        spans['serialize'] = max(total - outer, 0.0)
+
+        callback = g.perf_callback
+        request_bytes = request.content_length or 0
+        response_bytes = response.calculate_content_length() or 0
+
+        _metrics.observe('dash_callback_duration_seconds', {'callback': callback}, total,
+                         'Total time handling a Dash callback request')
+        for name, seconds in spans.items():
+            _metrics.observe('dash_callback_span_seconds', {'callback': callback, 'span': name}, seconds,
+                             'Time per span of a Dash callback request')
+        _metrics.inc('dash_callback_requests_total', {'callback': callback, 'status': response.status_code}, 1,
+                     'Dash callback requests')
+        _metrics.inc('dash_callback_request_bytes_total', {'callback': callback}, request_bytes,
+                     'Bytes received in callback request bodies')
+        _metrics.inc('dash_callback_response_bytes_total', {'callback': callback}, response_bytes,
+                     'Bytes sent in callback response bodies (before compression)')
+
+        response.headers['Server-Timing'] = ', '.join(
+            f"{name};dur={seconds * 1000:.1f}" for name, seconds in spans.items()
+        )
+
+        log_event(
+            'callback',
+            callback=callback,
+            status=response.status_code,
+            duration_ms=round(total * 1000, 2),
+            spans_ms={name: round(seconds * 1000, 2) for name, seconds in spans.items()},
+            request_bytes=request_bytes,
+            response_bytes=response_bytes
+        )
+        return response
+
+    if metrics_endpoint:
+        @server.route('/metrics')
+        def metrics():
+            return Response(get_metrics().render(), mimetype='text/plain; version=0.0.4')
@@ -2,10 +2,15 @@ import time
 import json
 import os
 from collections import defaultdict
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 
 class RateLimiter:
     """Rate limiter with daily caps and cost tracking"""
+
+    STATE_KEY = 'rate_limiter_state'
+    STATE_FIELDS = ('last_request_time', 'daily_count', 'monthly_count', 'last_reset_day',
+                    'last_reset_month', 'daily_cost', 'monthly_cost')
     
     def __init__(self, 
                  requests_per_second=10,
@@ -27,10 +32,65 @@ class RateLimiter:
         # Track costs
         self.daily_cost = 0.0
         self.monthly_cost = 0.0
+
+        # Optional shared store so separate processes count against the same limits
+        self.store = None
+
+    def use_store(self, store):
+        """Keep the counters in a store shared between processes (e.g. diskcache.Cache)"""
+        self.store = store
+        if self.store.get(self.STATE_KEY) is None:
+            self._save_state()
+
+    def _load_state(self):
+        """Pull the latest counters from the shared store"""
+        if self.store is None:
+            return
+        state = self.store.get(self.STATE_KEY)
+        if state:
+            for field in self.STATE_FIELDS:
+                setattr(self, field, state[field])
+
+    def _save_state(self):
+        """Push the counters to the shared store"""
+        if self.store is None:
+            return
+        self.store[self.STATE_KEY] = {field: getattr(self, field) for field in self.STATE_FIELDS}
+
+    def _transaction(self):
+        """Atomic read-modify-write on the shared store (no-op without one)"""
+        if self.store is None or not hasattr(self.store, 'transact'):
+            return nullcontext()
+        return self.store.transact()
     
     def can_make_request(self):
         """Check if request is allowed"""
         now = datetime.now()
+
+        with self._transaction():
+            self._load_state()
+            self._reset_counters(now)
+            self._save_state()
+
+        # Check monthly budget
+        if self.monthly_cost >= self.monthly_budget:
+            print(f"[RATE LIMITER] BLOCKED - Monthly budget ${self.monthly_budget:.2f} exceeded (${self.monthly_cost:.2f})")
+            return False
+
+        # Check daily limit
+        if self.daily_count >= self.requests_per_day:
+            print(f"[RATE LIMITER] BLOCKED - Daily limit {self.requests_per_day} reached")
+            return False
+
+        # Check rate limit (requests per second)
+        elapsed = time.time() - self.last_request_time
+        if elapsed < (1.0 / self.requests_per_second):
+            time.sleep((1.0 / self.requests_per_second) - elapsed)
+
+        return True
+
+    def _reset_counters(self, now):
+        """Reset the daily and monthly counters when the day or month rolls over"""
         
         # Reset daily counter
         if now.date() > self.last_reset_day:
@@ -45,31 +105,17 @@ class RateLimiter:
             self.monthly_count = 0
             self.monthly_cost = 0.0
             self.last_reset_month = now.month
-        
-        # Check monthly budget
-        if self.monthly_cost >= self.monthly_budget:
-            print(f"[RATE LIMITER] BLOCKED - Monthly budget ${self.monthly_budget:.2f} exceeded (${self.monthly_cost:.2f})")
-            return False
-        
-        # Check daily limit
-        if self.daily_count >= self.requests_per_day:
-            print(f"[RATE LIMITER] BLOCKED - Daily limit {self.requests_per_day} reached")
-            return False
-        
-        # Check rate limit (requests per second)
-        elapsed = time.time() - self.last_request_time
-        if elapsed < (1.0 / self.requests_per_second):
-            time.sleep((1.0 / self.requests_per_second) - elapsed)
-        
-        return True
     
     def record_request(self):
         """Record that a request was made"""
-        self.last_request_time = time.time()
-        self.daily_count += 1
-        self.monthly_count += 1
-        self.daily_cost += self.cost_per_request
-        self.monthly_cost += self.cost_per_request
+        with self._transaction():
+            self._load_state()
+            self.last_request_time = time.time()
+            self.daily_count += 1
+            self.monthly_count += 1
+            self.daily_cost += self.cost_per_request
+            self.monthly_cost += self.cost_per_request
+            self._save_state()
     
     def get_stats(self):
         """Get current usage stats"""
@@ -0,0 +1,234 @@
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+# fcntl is POSIX-only - without it (Windows dev machines) the refresh lock only covers this process
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# pyarrow is optional - without it each worker keeps its own copy of the data
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Frames stored per data version
+FRAMES = ('alerts', 'sites', 'sites_with_events')
+
+# Schema metadata key naming the geometry column and its CRS
+GEOMETRY_METADATA = b'shared_dataset'
+
+
+def _text_array(column):
+    """Text column as an Arrow large_string array (the type pandas wraps without copying)"""
+    return pa.array(column.astype(object), type=pa.large_string(), from_pandas=True)
+
+
+def write_frame(frame, path):
+    """
+    Write a DataFrame as one uncompressed Arrow IPC file that readers can memory-map.
+
+    Text is stored as Arrow strings and geometry as WKB, so both are read in
+    place instead of being rebuilt as Python objects. Float columns keep NaN as
+    a value (not a null), so they map straight to NumPy arrays. Other columns
+    go through pyarrow's pandas conversion, which records their dtypes.
+    Object columns holding anything but strings are rejected rather than
+    converted to text.
+    """
+    data = pd.DataFrame(frame, copy=False)
+    geometry = frame.geometry.name if isinstance(frame, gpd.GeoDataFrame) else None
+    arrays = {}
+
+    for name, column in data.items():
+        if name == geometry:
+            arrays[name] = pa.array(shapely.to_wkb(column.values, output_dimension=2), type=pa.large_binary())
+            data[name] = None  # Converted above; keeps pandas metadata off the geometry dtype
+
+        elif column.dtype == object or isinstance(column.dtype, pd.StringDtype):
+            kind = pd.api.types.infer_dtype(column, skipna=True)
+            if kind not in ('string', 'empty'):
+                raise TypeError(f"Column {name!r} holds {kind} values; only text, numeric, datetime and geometry columns can be shared")
+            arrays[name] = _text_array(column)
+
+        elif column.dtype.kind == 'f':
+            arrays[name] = pa.array(column.to_numpy(), from_pandas=False)
+
+    table = pa.Table.from_pandas(data, preserve_index=True)
+    for name, array in arrays.items():
+        position = table.schema.get_field_index(name)
+        table = table.set_column(position, pa.field(name, array.type), array)
+
+    table = table.replace_schema_metadata({
+        **table.schema.metadata,
+        GEOMETRY_METADATA: json.dumps({
+            'geometry': geometry,
+            'crs': frame.crs.to_string() if geometry and frame.crs else None,
+        }).encode()
+    })
+
+    with pa.OSFile(str(path), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _read_types(arrow_type):
+    """pandas dtype for Arrow text/binary columns, wrapping the mapped buffers instead of copying them"""
+    if arrow_type == pa.large_string():
+        return pd.StringDtype('pyarrow', na_value=np.nan)
+    if arrow_type == pa.large_binary():
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def read_frame(path):
+    """
+    Read a frame written by write_frame from a read-only memory map.
+
+    Numeric, text and WKB columns point into the mapped file, so every worker
+    shares the same page cache pages. The geometry column stays WKB; see
+    decode_geometry().
+    """
+    table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    frame = table.to_pandas(split_blocks=True, types_mapper=_read_types)
+    frame.attrs.update(json.loads(table.schema.metadata[GEOMETRY_METADATA]))
+    return frame
+
+
+def decode_geometry(frame):
+    """GeoDataFrame from a frame read by read_frame (frames without geometry are returned as is)"""
+    name = frame.attrs.get('geometry')
+    if not name:
+        return frame
+
+    geometry = shapely.from_wkb(frame[name].to_numpy(dtype=object))
+    return gpd.GeoDataFrame(frame.assign(**{name: geometry}), geometry=name, crs=frame.attrs['crs'])
+
+
+def iter_geometries(frame):
+    """
+    (row, geometry) for each row, decoding WKB one row at a time.
+
+    Lets a worker walk the shared polygons without holding a decoded copy of
+    all of them.
+    """
+    name = frame.geometry.name if isinstance(frame, gpd.GeoDataFrame) else frame.attrs['geometry']
+    decode = not isinstance(frame, gpd.GeoDataFrame)
+
+    for (_, row), geometry in zip(frame.iterrows(), frame[name]):
+        yield row, shapely.from_wkb(geometry) if decode else geometry
+
+
+class SharedDataset:
+    """
+    Versioned data files shared by every worker process.
+
+    One process writes a new version directory and then swaps the CURRENT
+    pointer file with an atomic rename; readers memory-map whatever version
+    CURRENT names, so all workers serve the same refresh from one copy of
+    the data.
+    """
+
+    def __init__(self, root, keep_versions=3):
+        self.root = Path(root)
+        self.versions_dir = self.root / 'versions'
+        self.pointer = self.root / 'CURRENT'
+        self.keep_versions = keep_versions
+        self.lock = threading.Lock()
+
+        self.versions_dir.mkdir(parents=True, exist_ok=True)
+
+    def current_version(self):
+        """Version named by the CURRENT pointer (None before the first write)"""
+        try:
+            return self.pointer.read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def pointer_mtime(self):
+        """Modification time of the CURRENT pointer, used by readers to notice a swap cheaply"""
+        try:
+            return self.pointer.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def refresh_lock(self):
+        """Exclusive lock across processes (and threads) so only one refresher writes at a time"""
+        with self.lock, open(self.root / 'refresh.lock', 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def next_counter(self):
+        """Publish counter for the next version, continuing from the current one"""
+        current = self.current_version()
+        return int(current.split('-')[0]) + 1 if current else 1
+
+    def write(self, version, poly_geodf, sites_df, sites_with_events):
+        """Write a new version and make it current (call inside refresh_lock)"""
+        staging = self.versions_dir / f".{version}.tmp"
+        staging.mkdir()
+
+        try:
+            for name, frame in zip(FRAMES, (poly_geodf, sites_df, sites_with_events)):
+                write_frame(frame, staging / f"{name}.arrow")
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        staging.rename(self.versions_dir / version)
+
+        # Atomic swap: readers see either the old or the new version, never a partial one
+        pointer_tmp = self.root / f".CURRENT.{os.getpid()}"
+        pointer_tmp.write_text(version)
+        os.replace(pointer_tmp, self.pointer)
+
+        self._prune()
+        print(f"[SHARED DATA] Wrote version {version} to {self.root}")
+        return version
+
+    def has_version(self, version):
+        """Whether a version's directory is still kept (versions come from clients, so only plain names)"""
+        version_dir = self.versions_dir / version
+        return version_dir.name == version and not version.startswith('.') and version_dir.is_dir()
+
+    def read(self, version):
+        """Load (alerts, sites_df, sites_with_events) for a version (alert geometry still WKB, see decode_geometry())"""
+        version_dir = self.versions_dir / version
+        return tuple(read_frame(version_dir / f"{name}.arrow") for name in FRAMES)
+
+    def _prune(self):
+        """Delete all but the newest versions (open memory maps stay valid after unlink)"""
+        versions = sorted(
+            (path for path in self.versions_dir.iterdir() if not path.name.startswith('.')),
+            key=lambda path: int(path.name.split('-')[0])
+        )
+        for old in versions[:-self.keep_versions]:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+# Global shared dataset instance (None unless SHARED_DATA_DIR is set and pyarrow is installed)
+_shared_dataset = None
+if os.environ.get('SHARED_DATA_DIR'):
+    if pa is not None:
+        _shared_dataset = SharedDataset(os.environ['SHARED_DATA_DIR'])
+    else:
+        print("WARNING: pyarrow not installed - SHARED_DATA_DIR is ignored and each worker keeps its own copy of the data")
+
+
+def get_shared_dataset():
+    """Get the global shared dataset instance, or None when running single-process"""
+    return _shared_dataset
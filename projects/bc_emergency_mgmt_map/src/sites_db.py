@@ -0,0 +1,347 @@
+"""
+Sites straight from the local SQLite database built by data/init_sqlite_db.py.
+
+The schools and daycares tables are combined into one materialized
+`facilities` table with the columns the app uses, indexed on city and
+property_type, with an R*Tree (facilities_rtree) over lat/lon for bounding
+box lookups. query_sites() pushes column selection and city / property type /
+bounding box filters down to SQLite, so only the rows and columns needed are read.
+
+Each facilities row is keyed by its source table and that table's rowid.
+Triggers on the source tables apply inserts, updates and deletes to
+facilities as they happen, and triggers on facilities apply them in turn to
+the R*Tree. A source table that was dropped and reloaded
+(which also drops its triggers) is re-copied when the database is next opened
+with connect(), and only that source is re-copied. Reads never write.
+
+Set SITES_DB=<path to bc_assets.db> to make retrieve_site_data() read from here
+instead of downloading combined_facilities.csv.
+"""
+
+import os
+import sqlite3
+
+import pandas as pd
+
+SITES_DB_PATH = os.environ.get('SITES_DB')
+
+FACILITIES_TABLE = 'facilities'
+
+# Columns of the facilities table, as retrieve_site_data() returns them
+SITE_COLUMNS = ['site_name', 'lat', 'lon', 'max_capacity', 'full_address', 'city', 'property_type']
+
+# Stable key of a facilities row: source table name + rowid in that table
+FACILITIES_SCHEMA = f"""
+CREATE TABLE {FACILITIES_TABLE} (
+    source TEXT NOT NULL,
+    source_rowid INTEGER NOT NULL,
+    site_name TEXT,
+    lat REAL,
+    lon REAL,
+    max_capacity INTEGER,
+    full_address TEXT,
+    city TEXT,
+    property_type TEXT,
+    PRIMARY KEY (source, source_rowid)
+)
+"""
+
+TRIGGER_EVENTS = ('insert', 'update', 'delete')
+
+FACILITIES_INDEXES = ['city', 'property_type']
+
+# R*Tree over the facilities coordinates, registered in the same table as the
+# spatial indexes built by data/init_sqlite_db.py so data/db_query.py finds it
+FACILITIES_RTREE = f'{FACILITIES_TABLE}_rtree'
+SPATIAL_INDEX_TABLE = 'spatial_indexes'
+
+# Only rows with numeric coordinates go in the R*Tree
+HAS_POINT = "typeof({row}.lat) IN ('real', 'integer') AND typeof({row}.lon) IN ('real', 'integer')"
+
+# Source tables and how their columns map onto SITE_COLUMNS
+SOURCES = {
+    'schools': {
+        'site_name': 'school_name',
+        'lat': 'school_latitude',
+        'lon': 'school_longitude',
+        'max_capacity': 'CAST(district_number AS INTEGER)',
+        'full_address': "TRIM(street_address) || ', ' || TRIM(physical_address_city) || ', BC'",
+        'city': 'TRIM(physical_address_city)',
+        'property_type': 'property_type',
+    },
+    'daycares': {
+        'site_name': 'facility_name',
+        'lat': 'latitude',
+        'lon': 'longitude',
+        'max_capacity': 'CAST(total_spaces AS INTEGER)',
+        'full_address': "TRIM(address) || ', ' || TRIM(city) || ', BC'",
+        'city': 'TRIM(city)',
+        'property_type': 'property_type',
+    },
+}
+
+
+def connect(db_path=None):
+    """Open the sites database (SITES_DB by default) with the facilities table up to date"""
+    db_path = db_path or SITES_DB_PATH
+    if not db_path or not os.path.exists(db_path):
+        raise FileNotFoundError(f"Sites database not found: {db_path}")
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_facilities(conn)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+def _table_exists(conn, table):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    return row is not None
+
+
+def source_select_sql(table, where=''):
+    """SELECT mapping a source table's rows onto the facilities columns (key first)"""
+    expressions = SOURCES[table]
+    columns = ',\n    '.join(f"{expressions[col]} AS {col}" for col in SITE_COLUMNS)
+    return f"SELECT\n    '{table}' AS source,\n    rowid AS source_rowid,\n    {columns}\nFROM {table} {where}"
+
+
+def combined_sites_sql(tables):
+    """
+    SELECT combining the given source tables.
+
+    UNION ALL rather than UNION: rows from different sources never collide
+    (the key includes the source), so there is nothing to dedup and no sort.
+    """
+    return '\n\nUNION ALL\n\n'.join(source_select_sql(table) for table in tables)
+
+
+def _trigger_name(table, event):
+    return f"{FACILITIES_TABLE}_{table}_{event}"
+
+
+def _triggers_installed(conn, table):
+    names = [_trigger_name(table, event) for event in TRIGGER_EVENTS]
+    count = conn.execute(
+        f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN ({', '.join('?' * len(names))})",
+        names
+    ).fetchone()[0]
+    return count == len(names)
+
+
+def _install_triggers(conn, table):
+    """Keep facilities in sync with inserts, updates and deletes on a source table"""
+    delete_old = f"DELETE FROM {FACILITIES_TABLE} WHERE source = '{table}' AND source_rowid = OLD.rowid;"
+    insert_new = f"INSERT INTO {FACILITIES_TABLE} {source_select_sql(table, 'WHERE rowid = NEW.rowid')};"
+
+    bodies = {
+        'insert': insert_new,
+        'update': delete_old + '\n' + insert_new,
+        'delete': delete_old,
+    }
+    for event, body in bodies.items():
+        name = _trigger_name(table, event)
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.execute(f"CREATE TRIGGER {name} AFTER {event.upper()} ON {table}\nBEGIN\n{body}\nEND")
+
+
+def _spatial_index_installed(conn):
+    names = [FACILITIES_RTREE] + [f"{FACILITIES_RTREE}_{event}" for event in TRIGGER_EVENTS]
+    count = conn.execute(
+        f"SELECT COUNT(*) FROM sqlite_master WHERE name IN ({', '.join('?' * len(names))})", names
+    ).fetchone()[0]
+    return count == len(names)
+
+
+def _install_spatial_index(conn):
+    """Build the facilities R*Tree from the current rows, with triggers keeping it in sync"""
+    rtree = FACILITIES_RTREE
+    conn.execute(f"DROP TABLE IF EXISTS {rtree}")
+    conn.execute(f"CREATE VIRTUAL TABLE {rtree} USING rtree(id, min_lat, max_lat, min_lon, max_lon)")
+    conn.execute(
+        f"INSERT INTO {rtree} SELECT rowid, lat, lat, lon, lon "
+        f"FROM {FACILITIES_TABLE} WHERE {HAS_POINT.format(row=FACILITIES_TABLE)}"
+    )
+
+    insert_new = (f"INSERT INTO {rtree} SELECT NEW.rowid, NEW.lat, NEW.lat, NEW.lon, NEW.lon "
+                  f"WHERE {HAS_POINT.format(row='NEW')};")
+    delete_old = f"DELETE FROM {rtree} WHERE id = OLD.rowid;"
+    bodies = {
+        'insert': ('AFTER INSERT', insert_new),
+        'update': ('AFTER UPDATE OF lat, lon', delete_old + '\n' + insert_new),
+        'delete': ('AFTER DELETE', delete_old),
+    }
+    for event, (when, body) in bodies.items():
+        name = f"{rtree}_{event}"
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.execute(f"CREATE TRIGGER {name} {when} ON {FACILITIES_TABLE}\nBEGIN\n{body}\nEND")
+
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SPATIAL_INDEX_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            rtree_name TEXT,
+            lat_col TEXT,
+            lon_col TEXT
+        )
+    """)
+    conn.execute(
+        f"INSERT OR REPLACE INTO {SPATIAL_INDEX_TABLE} VALUES (?, ?, 'lat', 'lon')", (FACILITIES_TABLE, rtree)
+    )
+
+
+def bbox_filter(rtree, lat_col, lon_col, bbox):
+    """
+    WHERE condition and parameters for the rows inside bbox, found through the
+    table's R*Tree instead of a full scan. bbox is (min_lon, min_lat, max_lon,
+    max_lat), the order of the app's viewport_bbox() and shapely bounds. The
+    R*Tree stores 32-bit floats, so the exact bounds are re-checked on the
+    rows it returns.
+    """
+    min_lon, min_lat, max_lon, max_lat = bbox
+    condition = (
+        f"rowid IN (SELECT id FROM {rtree} WHERE max_lat >= ? AND min_lat <= ? AND max_lon >= ? AND min_lon <= ?) "
+        f"AND {lat_col} BETWEEN ? AND ? AND {lon_col} BETWEEN ? AND ?"
+    )
+    return condition, [min_lat, max_lat, min_lon, max_lon] * 2
+
+
+def _has_keyed_schema(conn):
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({FACILITIES_TABLE})")]
+    return columns[:2] == ['source', 'source_rowid']
+
+
+def facilities_stale(conn):
+    """Whether refresh_facilities() has anything to copy or remove (only reads)"""
+    if not _table_exists(conn, FACILITIES_TABLE) or not _has_keyed_schema(conn):
+        return True
+    if not _spatial_index_installed(conn):
+        return True
+
+    for table in SOURCES:
+        if _table_exists(conn, table):
+            if not _triggers_installed(conn, table):
+                return True
+        elif conn.execute(f"SELECT 1 FROM {FACILITIES_TABLE} WHERE source = ? LIMIT 1", (table,)).fetchone():
+            return True
+
+    return False
+
+
+def refresh_facilities(conn, full=False):
+    """
+    Bring the facilities table up to date, copying only the sources that need it.
+
+    A source is (re)copied when it has no triggers yet: it is new, it was
+    dropped and reloaded, or full=True. Sources that still have their triggers
+    are already current. The R*Tree is built when missing and otherwise
+    follows facilities through its own triggers. Rows of source tables that no longer exist are
+    removed. Rowids of a table without an INTEGER PRIMARY KEY can change on
+    VACUUM, so run with full=True after vacuuming. When nothing needs copying
+    no write transaction is opened.
+
+    Returns the sources that were copied, with their row counts.
+    """
+    refreshed = {}
+
+    if not full and not facilities_stale(conn):
+        return refreshed
+
+    with conn:
+        if _table_exists(conn, FACILITIES_TABLE) and not _has_keyed_schema(conn):
+            # Unkeyed table from an earlier version: rebuild it
+            conn.execute(f"DROP TABLE {FACILITIES_TABLE}")
+
+        if not _table_exists(conn, FACILITIES_TABLE):
+            if not any(_table_exists(conn, table) for table in SOURCES):
+                raise ValueError(f"None of the source tables ({', '.join(SOURCES)}) are in the database")
+            conn.execute(FACILITIES_SCHEMA)
+            for col in FACILITIES_INDEXES:
+                conn.execute(f"CREATE INDEX idx_{FACILITIES_TABLE}_{col} ON {FACILITIES_TABLE} ({col})")
+            full = True
+
+        if full or not _spatial_index_installed(conn):
+            # Rebuilt on a full refresh too, as facilities rowids can change on VACUUM
+            _install_spatial_index(conn)
+
+        stale = []
+        for table in SOURCES:
+            if not _table_exists(conn, table):
+                conn.execute(f"DELETE FROM {FACILITIES_TABLE} WHERE source = ?", (table,))
+            elif full or not _triggers_installed(conn, table):
+                conn.execute(f"DELETE FROM {FACILITIES_TABLE} WHERE source = ?", (table,))
+                stale.append(table)
+
+        if stale:
+            conn.execute(f"INSERT INTO {FACILITIES_TABLE} {combined_sites_sql(stale)}")
+            for table in stale:
+                _install_triggers(conn, table)
+                refreshed[table] = conn.execute(
+                    f"SELECT COUNT(*) FROM {FACILITIES_TABLE} WHERE source = ?", (table,)
+                ).fetchone()[0]
+
+    for table, count in refreshed.items():
+        print(f"Materialized {count} sites from '{table}' into '{FACILITIES_TABLE}'")
+
+    return refreshed
+
+
+def materialize_facilities(conn):
+    """Rebuild the facilities table from every source table"""
+    return refresh_facilities(conn, full=True)
+
+
+def ensure_facilities(conn):
+    """Refresh any source that changed outside the triggers (only writes when one did)"""
+    refresh_facilities(conn)
+
+
+def query_sites(conn, columns=None, city=None, property_type=None, bbox=None):
+    """
+    Read sites with the filters applied in SQLite (conn from connect(), which
+    brings the facilities table up to date).
+
+    city and property_type take a value or a list of values ('all' or None = no
+    filter; both are indexed). bbox is (min_lon, min_lat, max_lon, max_lat), as
+    from viewport_bbox(), and goes through the R*Tree (see bbox_filter()).
+    Rows without valid numeric coordinates are left out.
+    """
+    columns = columns or SITE_COLUMNS
+
+    conditions = ["typeof(lat) IN ('real', 'integer')", "typeof(lon) IN ('real', 'integer')"]
+    params = []
+
+    for col, value in (('city', city), ('property_type', property_type)):
+        if value is None or value == 'all':
+            continue
+        values = [value] if isinstance(value, str) else list(value)
+        conditions.append(f"{col} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+
+    if bbox is not None:
+        condition, bbox_params = bbox_filter(FACILITIES_RTREE, 'lat', 'lon', bbox)
+        conditions.append(condition)
+        params.extend(bbox_params)
+
+    query = f"SELECT {', '.join(columns)} FROM {FACILITIES_TABLE} WHERE {' AND '.join(conditions)}"
+    return pd.read_sql_query(query, conn, params=params)
+
+
+def count_invalid_coordinates(conn):
+    """Sites that query_sites() leaves out for missing or non-numeric coordinates"""
+    return conn.execute(
+        f"SELECT COUNT(*) FROM {FACILITIES_TABLE} "
+        "WHERE typeof(lat) NOT IN ('real', 'integer') OR typeof(lon) NOT IN ('real', 'integer')"
+    ).fetchone()[0]
+
+
+def load_sites(db_path=None, **filters):
+    """All sites (or a filtered subset, see query_sites()) from the sites database"""
+    conn = connect(db_path)
+    try:
+        invalid = count_invalid_coordinates(conn)
+        if invalid:
+            print(f"WARNING: Dropped {invalid} sites with invalid coordinates")
+        return query_sites(conn, **filters)
+    finally:
+        conn.close()
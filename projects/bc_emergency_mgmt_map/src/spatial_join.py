@@ -0,0 +1,106 @@
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import shapely
+
+
+# Polygon columns copied onto each site row
+JOIN_COLUMNS = ['event_name', 'event_type']
+
+# Fewest sites per pool task; smaller inputs are joined inline, where a pool costs more than it saves
+MIN_CHUNK_SIZE = 1_000
+
+# Set in each pool process by _init_worker so the polygons are sent once per process, not per chunk
+_worker_polygons = None
+
+
+def _init_worker(polygons_wkb):
+    """Pool initializer: decode the polygons once per worker process"""
+    global _worker_polygons
+    _worker_polygons = shapely.from_wkb(polygons_wkb)
+
+
+def _query_within(polygons, lons, lats, offset):
+    """(site position, polygon position) pairs for sites lying within a polygon"""
+    points = shapely.points(lons, lats)
+
+    # Index the points and query with the polygons: shapely prepares the query geometries,
+    # so each polygon is prepared once instead of being re-tested unprepared per point
+    poly_idx, site_idx = shapely.STRtree(points).query(polygons, predicate='contains')
+    return site_idx + offset, poly_idx
+
+
+def _join_chunk(lons, lats, offset):
+    """Join one partition of sites against the worker's polygons"""
+    return _query_within(_worker_polygons, lons, lats, offset)
+
+
+def _merge_pairs(sites_df, poly_geodf, site_pos, poly_pos):
+    """Build the left-join result: one row per (site, polygon) match, plus unmatched sites with NaN"""
+    matched = np.zeros(len(sites_df), dtype=bool)
+    matched[site_pos] = True
+    unmatched = np.flatnonzero(~matched)
+
+    rows = np.concatenate([site_pos, unmatched])
+    polys = np.concatenate([poly_pos, np.full(len(unmatched), -1)])
+
+    # Same order as gpd.sjoin(how='left'): by site, then by polygon
+    order = np.lexsort((polys, rows))
+    rows, polys = rows[order], polys[order]
+
+    result = sites_df.iloc[rows].copy()
+    for col in JOIN_COLUMNS:
+        # Position -1 picks the trailing NaN for unmatched sites
+        values = np.append(poly_geodf[col].to_numpy(dtype=object), np.nan)
+        result[col] = values[polys]
+
+    return result
+
+
+def pool_chunk_size(num_sites, processes):
+    """Sites per pool task: one chunk per process, but no fewer than MIN_CHUNK_SIZE"""
+    return max(MIN_CHUNK_SIZE, math.ceil(num_sites / max(processes, 1)))
+
+
+def join_sites_to_polygons(sites_df, poly_geodf, processes=1, chunk_size=None):
+    """
+    Left 'within' join of site points onto emergency polygons.
+
+    With processes > 1 the sites are split into chunks (one per process by
+    default, see pool_chunk_size(); `chunk_size` overrides it) and each chunk's
+    points are built and joined in a process pool, so the work runs outside
+    this process's GIL. Only the matches are merged here.
+    """
+    if len(poly_geodf) == 0 or 'geometry' not in poly_geodf.columns:
+        return sites_df.assign(**{col: np.nan for col in JOIN_COLUMNS})
+
+    lons = sites_df['lon'].to_numpy(dtype=float)
+    lats = sites_df['lat'].to_numpy(dtype=float)
+    polygons_wkb = shapely.to_wkb(poly_geodf.geometry.values)
+
+    chunk_size = chunk_size or pool_chunk_size(len(sites_df), processes)
+    starts = list(range(0, len(sites_df), chunk_size))
+
+    if processes > 1 and len(starts) > 1:
+        # forkserver: safe to start from a threaded server process. Children re-run the __main__
+        # script, so only use processes > 1 when __main__ is guarded (e.g. under gunicorn)
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+
+        with ProcessPoolExecutor(max_workers=min(processes, len(starts)), mp_context=context,
+                                 initializer=_init_worker, initargs=(polygons_wkb,)) as pool:
+            results = list(pool.map(
+                _join_chunk,
+                [lons[start:start + chunk_size] for start in starts],
+                [lats[start:start + chunk_size] for start in starts],
+                starts
+            ))
+    else:
+        results = [_query_within(poly_geodf.geometry.values, lons, lats, 0)]
+
+    site_pos = np.concatenate([site_idx for site_idx, _ in results])
+    poly_pos = np.concatenate([poly_idx for _, poly_idx in results])
+
+    return _merge_pairs(sites_df, poly_geodf, site_pos, poly_pos)
@@ -1,15 +1,21 @@
+import base64
+import json
 import logging
 import requests
 import os
+import re
 import sys
 import numpy as np
 import pandas as pd
 import geopandas as gpd
 
 from shapely.geometry import shape, Point, Polygon
-from math import radians, cos, sin, asin, sqrt
+from math import radians, cos
 from rate_limiter import get_rate_limiter
 from geocode_cache import get_cache
+from spatial_join import join_sites_to_polygons
+from sites_db import SITES_DB_PATH, load_sites
+from instrumentation import timed
 
 # Force immediate output to stderr (works better on Render)
 logging.basicConfig(
@@ -19,10 +25,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Evacuation Orders and Alerts layer. ALERTS_LAYER_URL points the app at another
+# FeatureServer, e.g. the local stand-in in benchmarks/fake_featureserver.py
+ALERTS_LAYER_URL = os.environ.get(
+    'ALERTS_LAYER_URL',
+    "https://services6.arcgis.com/ubm4tcTYICKBpist/ArcGIS/rest/services/Evacuation_Orders_and_Alerts/FeatureServer/0"
+)
+
+@timed
 def bc_alerts_api():
     """Retrieves the data from fake the B.C. Emergency Orders and Alerts API"""
 
-    alerts_api = "https://services6.arcgis.com/ubm4tcTYICKBpist/ArcGIS/rest/services/Evacuation_Orders_and_Alerts/FeatureServer/0/query?where=1%3D1&objectIds=&time=&geometry=&geometryType=esriGeometryEnvelope&inSR=&spatialRel=esriSpatialRelIntersects&resultType=none&distance=0.0&units=esriSRUnit_Meter&returnGeodetic=false&outFields=*&returnGeometry=true&returnCentroid=false&featureEncoding=esriDefault&multipatchOption=xyFootprint&maxAllowableOffset=&geometryPrecision=&outSR=&datumTransformation=&applyVCSProjection=false&returnIdsOnly=false&returnUniqueIdsOnly=false&returnCountOnly=false&returnExtentOnly=false&returnQueryGeometry=false&returnDistinctValues=false&cacheHint=false&orderByFields=&groupByFieldsForStatistics=&outStatistics=&having=&resultOffset=&resultRecordCount=0&returnZ=false&returnM=false&returnExceededLimitFeatures=true&quantizationParameters=&sqlFormat=none&f=pgeojson&token="
+    alerts_api = f"{ALERTS_LAYER_URL}/query?where=1%3D1&objectIds=&time=&geometry=&geometryType=esriGeometryEnvelope&inSR=&spatialRel=esriSpatialRelIntersects&resultType=none&distance=0.0&units=esriSRUnit_Meter&returnGeodetic=false&outFields=*&returnGeometry=true&returnCentroid=false&featureEncoding=esriDefault&multipatchOption=xyFootprint&maxAllowableOffset=&geometryPrecision=&outSR=&datumTransformation=&applyVCSProjection=false&returnIdsOnly=false&returnUniqueIdsOnly=false&returnCountOnly=false&returnExtentOnly=false&returnQueryGeometry=false&returnDistinctValues=false&cacheHint=false&orderByFields=&groupByFieldsForStatistics=&outStatistics=&having=&resultOffset=&resultRecordCount=0&returnZ=false&returnM=false&returnExceededLimitFeatures=true&quantizationParameters=&sqlFormat=none&f=pgeojson&token="
 
     try:
         print("Now calling the B.C. Emergency Orders and Alerts API...")
@@ -138,8 +152,18 @@ def bc_alerts_api():
         return gpd.GeoDataFrame()
 
 
+@timed
 def retrieve_site_data():
-    """Retrieve the geocoordinates of our sites assets"""
+    """Retrieve the geocoordinates of our sites assets
+
+    From the local SQLite database when SITES_DB is set (see sites_db.py),
+    otherwise from the combined_facilities.csv published on GitHub.
+    """
+
+    if SITES_DB_PATH:
+        sites = load_sites(SITES_DB_PATH)
+        print(f"Successfully loaded {len(sites)} sites with valid coordinates from {SITES_DB_PATH}")
+        return sites
 
     # synth_link = "https://raw.githubusercontent.com/vanislekahuna/bc-cc-maps/refs/heads/main/data/synth_data.csv"
     synth_link = "https://raw.githubusercontent.com/vanislekahuna/bc-cc-maps/refs/heads/main/data/combined_facilities.csv"
@@ -169,44 +193,303 @@ def retrieve_site_data():
     return sites
 
 
-def check_sites_in_emergencies(sites_df, poly_geodf):
-    """Check which sites fall within emergency polygons"""
+@timed
+def check_sites_in_emergencies(sites_df, poly_geodf, processes=1, chunk_size=None):
+    """
+    Check which sites fall within emergency polygons.
+
+    With processes > 1, the sites are partitioned across a process pool (see
+    join_sites_to_polygons()) so the refresh doesn't hold the web worker's GIL.
+    """
 
+    sites_in_emergency = join_sites_to_polygons(sites_df, poly_geodf, processes=processes, chunk_size=chunk_size)
 
-    sites_gdf = gpd.GeoDataFrame(
-        sites_df,
-        geometry=gpd.points_from_xy(sites_df.lon, sites_df.lat),
-        crs='EPSG:4326'
+    return sites_in_emergency
+
+
+
+def _as_text(column):
+    """Convert a column to strings for hover text, rendering missing values as ''"""
+    return column.astype(object).where(column.notna(), '').astype(str)
+
+
+def build_site_hover_text(sites):
+    """Build the marker hover HTML for every site with vectorized string ops"""
+
+    details = (
+        '<b>' + _as_text(sites['site_name']) + '</b><br>'
+        + 'City: ' + _as_text(sites['city']) + '<br>'
+        + 'Facility Type: ' + _as_text(sites['property_type']) + '<br>'
+        + 'Capacity: ' + _as_text(sites['max_capacity']) + '<br>'
     )
 
-    sites_in_emergency = gpd.sjoin(
-        sites_gdf,
-        poly_geodf[['event_name', 'event_type', 'geometry']],
-        how='left',
-        predicate='within'
+    status = ('<b>⚠️ Affected by: ' + _as_text(sites['event_type']) + '</b>').where(
+        sites['event_type'].notna(),
+        'Status: Not affected'
     )
 
-    sites_in_emergency = sites_in_emergency.drop(columns=['geometry', 'index_right'], errors='ignore')
+    return details + status
 
-    return sites_in_emergency
+
+def cluster_sites(sites, zoom, cell_px=40, label='sites'):
+    """
+    Aggregate sites into a zoom-dependent grid so the map draws one marker per cell.
+
+    Each cell is roughly `cell_px` screen pixels wide at the given zoom. Returns a
+    DataFrame with the cell centroid (lat, lon), site count, capacity sum and hover
+    text; single-site cells keep the site's own hover text.
+    """
+    cell_deg = cell_px * 360 / (256 * 2 ** zoom)
+
+    cells = pd.DataFrame({
+        'cell_x': np.floor(sites['lon'].to_numpy(dtype=float) / cell_deg),
+        'cell_y': np.floor(sites['lat'].to_numpy(dtype=float) / cell_deg),
+        'lat': sites['lat'].to_numpy(dtype=float),
+        'lon': sites['lon'].to_numpy(dtype=float),
+        'capacity': pd.to_numeric(sites['max_capacity'], errors='coerce').to_numpy(),
+        'hover_text': sites['hover_text'].to_numpy(),
+    })
+
+    clusters = cells.groupby(['cell_x', 'cell_y'], sort=False).agg(
+        lat=('lat', 'mean'),
+        lon=('lon', 'mean'),
+        count=('lat', 'size'),
+        capacity=('capacity', 'sum'),
+        hover_text=('hover_text', 'first')
+    ).reset_index(drop=True)
+
+    cluster_text = (
+        '<b>' + clusters['count'].astype(str) + f' {label}</b><br>'
+        + 'Total capacity: ' + clusters['capacity'].round().astype('int64').map('{:,}'.format) + '<br>'
+        + 'Zoom in to see individual sites'
+    )
+    clusters['hover_text'] = clusters['hover_text'].where(clusters['count'] == 1, cluster_text)
+
+    return clusters
+
+
+def viewport_bbox(center_lat, center_lon, zoom, width_px=1600, height_px=800, margin=0.5):
+    """
+    Approximate (min_lon, min_lat, max_lon, max_lat) shown by a web map at a center/zoom.
+
+    `margin` pads each side by that fraction of the view so small pans stay inside it.
+    """
+    lon_per_px = 360 / (256 * 2 ** zoom)
+    lat_per_px = lon_per_px * cos(radians(center_lat))  # Mercator squeezes latitude
+
+    half_lon = width_px * lon_per_px * (0.5 + margin)
+    half_lat = height_px * lat_per_px * (0.5 + margin)
+
+    return (center_lon - half_lon, max(center_lat - half_lat, -90),
+            center_lon + half_lon, min(center_lat + half_lat, 90))
+
+
+def relayout_bbox(relayout_data, margin=0.5):
+    """Get the padded viewport bbox from a mapbox relayoutData event, or None if it has no view"""
+    if not relayout_data:
+        return None
+
+    # Plotly reports the visible corners directly when it can
+    derived = relayout_data.get('mapbox._derived')
+    if derived and derived.get('coordinates'):
+        lons = [coord[0] for coord in derived['coordinates']]
+        lats = [coord[1] for coord in derived['coordinates']]
+        pad_lon = (max(lons) - min(lons)) * margin
+        pad_lat = (max(lats) - min(lats)) * margin
+        return min(lons) - pad_lon, min(lats) - pad_lat, max(lons) + pad_lon, max(lats) + pad_lat
+
+    center = relayout_data.get('mapbox.center')
+    zoom = relayout_data.get('mapbox.zoom')
+    if center and zoom is not None:
+        return viewport_bbox(center['lat'], center['lon'], zoom, margin=margin)
+
+    return None
 
 
+def encode_typed_array(values, dtype='f4'):
+    """Encode numbers as a Plotly typed array ({'dtype', 'bdata'}: base64 of little-endian bytes)"""
+    array = np.asarray(values, dtype=np.dtype(dtype).newbyteorder('<'))
+    return {'dtype': dtype, 'bdata': base64.b64encode(array.tobytes()).decode('ascii')}
+
+
+def compact_trace_arrays(trace, dtype='f4'):
+    """Replace a trace's lon/lat (and per-point marker sizes) with base64 typed arrays"""
+    for key in ('lon', 'lat'):
+        if key in trace and trace[key] is not None and len(trace[key]) > 0:
+            trace[key] = encode_typed_array(trace[key], dtype)
+
+    marker = trace.get('marker')
+    if marker is not None and np.ndim(marker.get('size')) == 1:
+        marker['size'] = encode_typed_array(marker['size'], dtype)
+
+    return trace
+
 
 def haversine_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two points in km"""
+    """Calculate distance between points in km (scalars or numpy arrays)"""
     # Convert to radians
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
     
     # Haversine formula
     dlat = lat2 - lat1
     dlon = lon2 - lon1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
+    a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+    c = 2 * np.arcsin(np.sqrt(a))
     km = 6371 * c  # Radius of Earth in km
     
     return km
 
 
+def format_data_age(seconds):
+    """Human-readable age of the data shown next to the refresh button"""
+    if seconds < 60:
+        return 'Updated just now'
+    if seconds < 3600:
+        return f"Updated {int(seconds // 60)} min ago"
+    return f"Updated {int(seconds // 3600)} h {int(seconds % 3600 // 60)} min ago"
+
+
+def parse_user_location(user_location_json):
+    """Parse the stored {'lat', 'lon'} JSON, returning (None, None) if missing or invalid"""
+    if user_location_json:
+        try:
+            location_data = json.loads(user_location_json)
+            return location_data['lat'], location_data['lon']
+        except (ValueError, KeyError, TypeError):
+            pass
+
+    return None, None
+
+
+def filter_sites(sites_data, city_filter, event_type_filter, facility_type_filter,
+                 affected_toggle, user_location_json, selected_radius):
+    """Apply the dashboard slicers (radius, city, event, facility, affected) to the sites"""
+
+    filtered_sites = sites_data.copy()
+
+    # Apply radius filter if location exists
+    user_lat, user_lon = parse_user_location(user_location_json)
+    if user_lat and user_lon:
+        radius_km = float(selected_radius) if selected_radius else 10
+
+        # Calculate distances over the whole lat/lon columns at once
+        filtered_sites['distance_km'] = haversine_distance(
+            user_lat, user_lon,
+            filtered_sites['lat'].to_numpy(dtype=float),
+            filtered_sites['lon'].to_numpy(dtype=float)
+        )
+
+        # Filter by radius
+        filtered_sites = filtered_sites[filtered_sites['distance_km'] <= radius_km]
+
+    # City filter
+    if city_filter != 'all':
+        filtered_sites = filtered_sites[filtered_sites['city'] == city_filter]
+
+    # Event type filter
+    if event_type_filter != 'all':
+        filtered_sites = filtered_sites[filtered_sites['event_type'] == event_type_filter]
+
+    # Facility type filter
+    if facility_type_filter != 'all':
+        filtered_sites = filtered_sites[filtered_sites['property_type'] == facility_type_filter]
+
+    # Affected toggle
+    if affected_toggle and 'affected' in affected_toggle:
+        filtered_sites = filtered_sites[filtered_sites['event_type'].notna()]
+
+    return filtered_sites
+
+
+# DataTable filter_query: `{column} <operator> <value>`, the operator read right after the column
+TABLE_FILTER_OPERATORS = {
+    'ge': 'ge', '>=': 'ge',
+    'le': 'le', '<=': 'le',
+    'lt': 'lt', '<': 'lt',
+    'gt': 'gt', '>': 'gt',
+    'ne': 'ne', '!=': 'ne',
+    'eq': 'eq', '=': 'eq',
+    'contains': 'contains',
+    'datestartswith': 'datestartswith',
+}
+
+TABLE_FILTER_PART = re.compile(
+    r"^\s*\{(.+?)\}\s*(ge|le|lt|gt|ne|eq|contains|datestartswith|>=|<=|!=|<|>|=)(?:\s+|(?<=[<>=])\s*)(.*)$",
+    re.DOTALL
+)
+
+# A column filter with no operator, e.g. `{site_name} "Pine Ridge"` or just `Pine Ridge`
+TABLE_FILTER_VALUE_ONLY = re.compile(r"^\s*(?:\{(.+?)\}\s*)?(.*)$", re.DOTALL)
+
+
+def _filter_value(value_part, numeric=True):
+    """Unquote a filter value, or (for comparisons) read it as a number if unquoted"""
+    value_part = value_part.strip()
+    v0 = value_part[0] if value_part else ''
+    if v0 and len(value_part) > 1 and v0 == value_part[-1] and v0 in ("'", '"', '`'):
+        return value_part[1:-1].replace('\\' + v0, v0)
+    if not numeric:
+        return value_part
+    try:
+        return float(value_part)
+    except ValueError:
+        return value_part
+
+
+def split_filter_part(filter_part):
+    """
+    Split one DataTable filter expression into (column, operator, value).
+
+    The operator is the token right after `{column}`, so operator words inside
+    the value (`contains "Ridge Park"`) are left alone. An expression with no
+    operator is a `contains` filter, like the Dash custom filtering example.
+    """
+    match = TABLE_FILTER_PART.match(filter_part)
+    if match:
+        name, operator, value_part = match.groups()
+        operator = TABLE_FILTER_OPERATORS[operator]
+        return name, operator, _filter_value(value_part, numeric=operator not in ('contains', 'datestartswith'))
+
+    name, value_part = TABLE_FILTER_VALUE_ONLY.match(filter_part).groups()
+    value = _filter_value(value_part, numeric=False)
+    if value == '':
+        return None, None, None
+    return name, 'contains', value
+
+
+def apply_table_query(df, sort_by=None, filter_query=None):
+    """Apply DataTable custom filtering and sorting on the server-side frame"""
+
+    if filter_query:
+        for filter_part in filter_query.split(' && '):
+            col_name, operator, filter_value = split_filter_part(filter_part)
+
+            if col_name not in df.columns:
+                continue
+
+            if operator in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
+                column = df[col_name]
+                if isinstance(filter_value, float):
+                    column = pd.to_numeric(column, errors='coerce')
+                    df = df.loc[getattr(column, operator)(filter_value)]
+                else:
+                    # Compare text as text; missing values never match
+                    df = df.loc[column.notna() & getattr(column.astype(str), operator)(filter_value)]
+            elif operator == 'contains':
+                df = df.loc[df[col_name].astype(str).str.contains(str(filter_value), case=False, regex=False, na=False)]
+            elif operator == 'datestartswith':
+                df = df.loc[df[col_name].astype(str).str.startswith(str(filter_value), na=False)]
+
+    if sort_by:
+        df = df.sort_values(
+            [col['column_id'] for col in sort_by],
+            ascending=[col['direction'] == 'asc' for col in sort_by],
+            na_position='last'
+        )
+
+    return df
+
+
 def generate_search_suggestion(failed_address):
     """Generate helpful search suggestion based on failed input"""
     
@@ -280,6 +563,7 @@ def generate_search_suggestion(failed_address):
     #     return None, None
 
 
+@timed
 def geocode_address(address):
     """
     Geocode address using Google Maps with rate limiting and caching
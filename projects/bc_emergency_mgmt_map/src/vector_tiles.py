@@ -0,0 +1,197 @@
+import math
+import threading
+from collections import OrderedDict
+
+import geopandas as gpd
+import shapely
+from flask import Response, abort
+from shapely.geometry import box
+
+# mapbox-vector-tile is optional - without it the tile endpoint answers 501
+try:
+    import mapbox_vector_tile
+except ImportError:
+    mapbox_vector_tile = None
+
+
+# Half the width of the Web Mercator world in metres
+MERCATOR_HALF_WORLD = 20037508.342789244
+TILE_EXTENT = 4096
+TILE_BUFFER_PX = 64  # Geometry outside the tile kept so polygon edges don't show seams
+
+# Sites stay scatter traces (hover text, clustering, affected highlighting), so only alerts are tiled
+TILE_LAYERS = ('alerts',)
+
+ALERT_PROPERTIES = ['event_id', 'event_name', 'event_type', 'order_alert_status']
+
+
+def tile_bounds(z, x, y):
+    """Web Mercator (EPSG:3857) bounds of a z/x/y tile"""
+    tile_size = 2 * MERCATOR_HALF_WORLD / (2 ** z)
+
+    min_x = -MERCATOR_HALF_WORLD + x * tile_size
+    max_y = MERCATOR_HALF_WORLD - y * tile_size
+
+    return min_x, max_y - tile_size, min_x + tile_size, max_y
+
+
+def _clean_properties(row, columns):
+    """Tile properties can't be null, so drop missing values"""
+    properties = {}
+    for col in columns:
+        value = row.get(col)
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            continue
+        properties[col] = value.item() if hasattr(value, 'item') else value
+    return properties
+
+
+def build_tile_sources(snapshot):
+    """Project alerts to Web Mercator once per data version (spatial index built lazily)"""
+
+    alerts = snapshot.poly_geodf
+    if len(alerts) > 0:
+        alerts = alerts[ALERT_PROPERTIES + ['geometry']].to_crs('EPSG:3857')
+    else:
+        alerts = gpd.GeoDataFrame(columns=ALERT_PROPERTIES + ['geometry'], geometry='geometry', crs='EPSG:3857')
+
+    return {'alerts': alerts}
+
+
+def render_tile(snapshot, layer, z, x, y):
+    """Encode one layer of a z/x/y tile as a Mapbox Vector Tile"""
+    sources = snapshot.get_or_build('tile_sources', build_tile_sources)
+    source = sources[layer]
+
+    bounds = tile_bounds(z, x, y)
+    buffer = (bounds[2] - bounds[0]) * TILE_BUFFER_PX / TILE_EXTENT
+    query_box = box(bounds[0] - buffer, bounds[1] - buffer, bounds[2] + buffer, bounds[3] + buffer)
+
+    # Only features touching the (buffered) tile, clipped to it so big polygons stay small
+    candidates = source.iloc[source.sindex.query(query_box, predicate='intersects')]
+    candidates = candidates.set_geometry(shapely.clip_by_rect(candidates.geometry.values, *query_box.bounds))
+    candidates = candidates[~candidates.geometry.is_empty]
+
+    # One sub-layer per status so the client can color Orders and Alerts differently
+    properties = ALERT_PROPERTIES
+    groups = candidates.groupby(candidates['order_alert_status'].fillna('Other'))
+
+    tile_layers = []
+    for name, features in groups:
+        tile_layers.append({
+            'name': str(name),
+            'features': [
+                {'geometry': geometry, 'properties': _clean_properties(props, properties)}
+                for geometry, props in zip(features.geometry, features[properties].to_dict('records'))
+            ]
+        })
+
+    return mapbox_vector_tile.encode(
+        tile_layers,
+        default_options={
+            'quantize_bounds': bounds,
+            'extents': TILE_EXTENT,
+            'on_invalid_geometry': mapbox_vector_tile.encoder.on_invalid_geometry_make_valid,
+        }
+    )
+
+
+class TileCache:
+    """LRU cache of encoded tiles, keyed by (version, layer, z, x, y)"""
+
+    def __init__(self, max_tiles=2000):
+        self.max_tiles = max_tiles
+        self.tiles = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Get a cached tile (None on miss) and mark it recently used"""
+        with self.lock:
+            if key in self.tiles:
+                self.tiles.move_to_end(key)
+                self.hits += 1
+                return self.tiles[key]
+
+            self.misses += 1
+            return None
+
+    def set(self, key, tile):
+        """Store a tile, evicting the least recently used ones"""
+        with self.lock:
+            self.tiles[key] = tile
+            self.tiles.move_to_end(key)
+
+            while len(self.tiles) > self.max_tiles:
+                self.tiles.popitem(last=False)
+
+    def drop_version(self, version):
+        """Drop the cached tiles of a data version (called when the snapshot store stops keeping it)"""
+        with self.lock:
+            stale = [key for key in self.tiles if key[0] == version]
+            for key in stale:
+                del self.tiles[key]
+        if stale:
+            print(f"[TILES] Dropped {len(stale)} tiles of version {version}")
+
+    def get_stats(self):
+        """Get cache statistics"""
+        return {
+            'size': len(self.tiles),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+# Global tile cache instance
+_tile_cache = TileCache(max_tiles=2000)
+
+
+def get_tile_cache():
+    """Get the global tile cache instance"""
+    return _tile_cache
+
+
+def tile_url_template(version, layer):
+    """URL template for Plotly mapbox vector layers (version in the path keeps tiles immutable)"""
+    return f"/tiles/{version}/{layer}/{{z}}/{{x}}/{{y}}.pbf"
+
+
+def register_tile_routes(server, snapshot_store):
+    """Add the /tiles/<version>/<layer>/<z>/<x>/<y>.pbf endpoint to the Flask server"""
+
+    # Runs in every process that serves tiles, whichever process published the new version
+    snapshot_store.add_eviction_listener(get_tile_cache().drop_version)
+
+    @server.route('/tiles/<version>/<layer>/<int:z>/<int:x>/<int:y>.pbf')
+    def vector_tile(version, layer, z, x, y):
+        if mapbox_vector_tile is None:
+            abort(501, description="Vector tiles need the 'mapbox-vector-tile' package")
+
+        if layer not in TILE_LAYERS or not (0 <= z <= 22) or not (0 <= x < 2 ** z) or not (0 <= y < 2 ** z):
+            abort(404)
+
+        snapshot = snapshot_store.get(version)
+        if snapshot is None:
+            abort(404)
+
+        cache = get_tile_cache()
+        key = (snapshot.version, layer, z, x, y)
+
+        tile = cache.get(key)
+        if tile is None:
+            tile = render_tile(snapshot, layer, z, x, y)
+            cache.set(key, tile)
+
+        response = Response(tile, mimetype='application/vnd.mapbox-vector-tile')
+
+        # Tiles for a version never change, but fall back to the current version on a miss
+        if snapshot.version == version:
+            response.headers['Cache-Control'] = 'public, max-age=86400, immutable'
+        else:
+            response.headers['Cache-Control'] = 'no-cache'
+
+        return response
+
+    return vector_tile